@@ -1,81 +1,486 @@
 from django.core.cache.backends.base import BaseCache
 from django.core.cache.backends.locmem import LocMemCache
 from django.conf import settings
+from django.db import transaction
 import redis
+import redis.asyncio
+import asyncio
 import json
 import logging
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
 from typing import Any, Optional
 from datetime import timedelta
 logger = logging.getLogger(__name__)
 
+GENERATION_PREFIX = 'pm_gen'
+GENERATION_TIMEOUT = 7 * 24 * 3600
+SCOPE_KINDS = ('org', 'project', 'task', 'user')
+SCAN_BATCH_SIZE = 1000
+INVALIDATION_CHANNEL = 'pm_cache_invalidate'
+PROCESS_ID = uuid.uuid4().hex
+_local_tiers = []
+_listener = None
+_listener_lock = threading.Lock()
+
+def invalidation_message(keys: Optional[list]) -> str:
+    """Pub/sub payload; ``keys=None`` tells every worker to clear its local tier."""
+    return json.dumps({'sender': PROCESS_ID, 'keys': keys})
+
+class LocalLRU:
+    """Thread-safe in-process LRU bounded by the total UTF-8 encoded size of its values in bytes."""
+
+    def __init__(self, max_bytes: int, timeout: int):
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            expires_at, value, _ = entry
+            if expires_at <= time.monotonic():
+                self._pop(key)
+                self.stats['expirations'] += 1
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return value
+
+    def set(self, key: str, value: str, timeout: Optional[int]=None) -> None:
+        size = len(value.encode())
+        if size > self.max_bytes:
+            return
+        timeout = min(timeout or self.timeout, self.timeout)
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (time.monotonic() + timeout, value, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+                self.stats['evictions'] += 1
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                if self._pop(key):
+                    self.stats['invalidations'] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _pop(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._size -= entry[2]
+        return True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class CircuitBreaker:
+    """Skips Redis for ``open_seconds`` after a connection failure so callers fall back at once.
+
+    Once the window passes, the next caller probes Redis while the others keep
+    skipping it; the outage is logged once, at WARNING, and its end at INFO.
+    """
+
+    def __init__(self, open_seconds: float):
+        self.open_seconds = open_seconds
+        self.failing = False
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        if not self.failing:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            if now < self._open_until:
+                return False
+            self._open_until = now + self.open_seconds
+            return True
+
+    def success(self) -> None:
+        if self.failing:
+            with self._lock:
+                self.failing = False
+                self._open_until = 0.0
+            logger.info('Redis is reachable again')
+
+    def failure(self, error: Exception) -> None:
+        with self._lock:
+            first = not self.failing
+            self.failing = True
+            self._open_until = time.monotonic() + self.open_seconds
+        if first:
+            logger.warning(f'Redis unavailable, skipping it for {self.open_seconds}s at a time: {error}')
+
+    def reset(self) -> None:
+        with self._lock:
+            self.failing = False
+            self._open_until = 0.0
+redis_breaker = CircuitBreaker(getattr(settings, 'REDIS_BREAKER_SECONDS', 10))
+# Connection failures that open ``redis_breaker``; anything else is a bug worth an error log.
+REDIS_ERRORS = (redis.RedisError, OSError)
+
+def redis_connection_kwargs() -> dict:
+    return {'host': getattr(settings, 'REDIS_HOST', 'localhost'), 'port': getattr(settings, 'REDIS_PORT', 6379), 'db': getattr(settings, 'REDIS_DB', 0), 'password': getattr(settings, 'REDIS_PASSWORD', None), 'socket_connect_timeout': getattr(settings, 'REDIS_CONNECT_TIMEOUT', 0.25), 'socket_timeout': getattr(settings, 'REDIS_SOCKET_TIMEOUT', 0.5), 'decode_responses': True}
+
+def handle_invalidation(message: dict) -> None:
+    """Hand an ``INVALIDATION_CHANNEL`` message to every local tier in the process."""
+    for cache_instance in _local_tiers:
+        cache_instance.handle_invalidation(message)
+
+def start_invalidation_listener(redis_client) -> None:
+    """Subscribe the process to ``INVALIDATION_CHANNEL`` once, on one connection shared by every local tier."""
+    global _listener
+    if _listener is not None:
+        return
+    with _listener_lock:
+        if _listener is not None:
+            return
+        try:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{INVALIDATION_CHANNEL: handle_invalidation})
+            _listener = pubsub.run_in_thread(sleep_time=1, daemon=True)
+        except Exception as e:
+            logger.error(f'Cache invalidation listener error: {e}')
+
 class SmartCache:
+    """JSON cache on Redis with an optional in-process L1 tier.
 
-    def __init__(self, prefix: str='pm', default_timeout: int=300):
+    When ``local_max_bytes`` is set, values and generation counters are also
+    kept in a ``LocalLRU``. Writes and generation bumps are broadcast on
+    ``INVALIDATION_CHANNEL`` so other workers drop their copies; the local
+    timeout bounds staleness if a message is missed.
+
+    Redis calls go through ``redis_breaker``: once one fails, every cache
+    reads as a miss for ``REDIS_BREAKER_SECONDS`` and callers fall through to
+    the database instead of waiting on socket timeouts.
+    """
+
+    def __init__(self, prefix: str='pm', default_timeout: int=300, redis_client=None, local_max_bytes: int=0, local_timeout: int=30, async_redis_factory=None):
         self.prefix = prefix
         self.default_timeout = default_timeout
-        self.redis_client = redis.Redis(host=getattr(settings, 'REDIS_HOST', 'localhost'), port=getattr(settings, 'REDIS_PORT', 6379), db=getattr(settings, 'REDIS_DB', 0), password=getattr(settings, 'REDIS_PASSWORD', None), decode_responses=True)
+        self.redis_client = redis_client or redis.Redis(**redis_connection_kwargs())
+        self.async_redis_factory = async_redis_factory or (lambda: redis.asyncio.Redis(**redis_connection_kwargs()))
+        self._async_clients = weakref.WeakKeyDictionary()
+        self.stats = {'hits': 0, 'misses': 0, 'errors': 0}
+        self.local = LocalLRU(local_max_bytes, local_timeout) if local_max_bytes else None
+        if self.local is not None:
+            _local_tiers.append(self)
+
+    def _start_listener(self) -> None:
+        start_invalidation_listener(self.redis_client)
+
+    def handle_invalidation(self, message: dict) -> None:
+        if self.local is None:
+            return
+        try:
+            payload = json.loads(message['data'])
+        except (KeyError, TypeError, ValueError):
+            self.local.clear()
+            return
+        if payload.get('sender') == PROCESS_ID:
+            return
+        if payload.get('keys') is None:
+            self.local.clear()
+        else:
+            self.local.delete(*payload['keys'])
+
+    def _publish_invalidation(self, keys: Optional[list]) -> None:
+        if not redis_breaker.allow():
+            return
+        try:
+            self.redis_client.publish(INVALIDATION_CHANNEL, invalidation_message(keys))
+        except Exception as e:
+            self._error(e, f'Cache invalidation publish error for {keys}')
+
+    def _error(self, error: Exception, message: str) -> None:
+        """Count a failed call; connection failures open ``redis_breaker`` instead of logging each time."""
+        self.stats['errors'] += 1
+        if isinstance(error, REDIS_ERRORS):
+            redis_breaker.failure(error)
+        else:
+            logger.error(f'{message}: {error}')
+
+    def get_stats(self) -> dict:
+        stats = {'redis': dict(self.stats)}
+        if self.local is not None:
+            stats['local'] = dict(self.local.stats, entries=len(self.local), bytes=self.local._size, max_bytes=self.local.max_bytes)
+        return stats
+
+    @staticmethod
+    def _scopes_for(key: str) -> list:
+        parts = key.split(':')
+        return [(kind, ident) for kind, ident in zip(parts, parts[1:]) if kind in SCOPE_KINDS]
+
+    @staticmethod
+    def _generation_key(kind: str, ident: Any) -> str:
+        return f'{GENERATION_PREFIX}:{kind}:{ident}'
+
+    def _generation_keys(self, key: str, scopes: Optional[list]=None) -> list:
+        scopes = self._scopes_for(key) if scopes is None else scopes
+        return [self._generation_key(kind, ident) for kind, ident in scopes]
 
-    def _make_key(self, key: str) -> str:
-        return f'{self.prefix}:{key}'
+    def _make_key(self, key: str, scopes: Optional[list]=None) -> str:
+        generation_keys = self._generation_keys(key, scopes)
+        if not generation_keys:
+            return f'{self.prefix}:{key}'
+        generations = self._get_generations(generation_keys)
+        version = '.'.join(generations)
+        return f'{self.prefix}:{key}:g{version}'
 
-    def get(self, key: str) -> Optional[Any]:
+    def _get_generations(self, generation_keys: list) -> list:
+        if self.local is None:
+            return [generation or '0' for generation in self.redis_client.mget(generation_keys)]
+        self._start_listener()
+        generations = [self.local.get(generation_key) for generation_key in generation_keys]
+        missing = [generation_key for generation_key, generation in zip(generation_keys, generations) if generation is None]
+        if missing:
+            fetched = dict(zip(missing, self.redis_client.mget(missing)))
+            for generation_key in missing:
+                self.local.set(generation_key, fetched[generation_key] or '0')
+            generations = [generation if generation is not None else fetched[generation_key] or '0' for generation_key, generation in zip(generation_keys, generations)]
+        return generations
+
+    def generations(self, scopes: list) -> Optional[list]:
+        """The current generation of each ``(kind, id)`` scope, for callers that keep their own derived state; ``None`` if Redis is unavailable."""
+        if not redis_breaker.allow():
+            return None
+        try:
+            return self._get_generations([self._generation_key(kind, ident) for kind, ident in scopes])
+        except Exception as e:
+            self._error(e, f'Cache generation read error for {scopes}')
+            return None
+
+    @property
+    def async_redis_client(self):
+        """``redis.asyncio`` client for the running event loop; connections cannot be shared across loops."""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = self.async_redis_factory()
+        return client
+
+    async def _aget_generations(self, generation_keys: list) -> list:
+        if self.local is None:
+            return [generation or '0' for generation in await self.async_redis_client.mget(generation_keys)]
+        self._start_listener()
+        generations = [self.local.get(generation_key) for generation_key in generation_keys]
+        missing = [generation_key for generation_key, generation in zip(generation_keys, generations) if generation is None]
+        if missing:
+            fetched = dict(zip(missing, await self.async_redis_client.mget(missing)))
+            for generation_key in missing:
+                self.local.set(generation_key, fetched[generation_key] or '0')
+            generations = [generation if generation is not None else fetched[generation_key] or '0' for generation_key, generation in zip(generation_keys, generations)]
+        return generations
+
+    async def agenerations(self, scopes: list) -> Optional[list]:
+        """``generations`` over the asyncio Redis client."""
+        if not redis_breaker.allow():
+            return None
+        try:
+            return await self._aget_generations([self._generation_key(kind, ident) for kind, ident in scopes])
+        except Exception as e:
+            self._error(e, f'Cache generation read error for {scopes}')
+            return None
+
+    async def _amake_key(self, key: str, scopes: Optional[list]=None) -> str:
+        generation_keys = self._generation_keys(key, scopes)
+        if not generation_keys:
+            return f'{self.prefix}:{key}'
+        version = '.'.join(await self._aget_generations(generation_keys))
+        return f'{self.prefix}:{key}:g{version}'
+
+    async def aget(self, key: str, scopes: Optional[list]=None) -> Optional[Any]:
+        """``get`` over the asyncio Redis client, for async resolvers."""
+        if not redis_breaker.allow():
+            return None
+        try:
+            cache_key = await self._amake_key(key, scopes)
+            value = self.local.get(cache_key) if self.local is not None else None
+            if value is not None:
+                return json.loads(value)
+            value = await self.async_redis_client.get(cache_key)
+            redis_breaker.success()
+            if value:
+                self.stats['hits'] += 1
+                if self.local is not None:
+                    self.local.set(cache_key, value)
+                return json.loads(value)
+            self.stats['misses'] += 1
+        except Exception as e:
+            self._error(e, f'Cache get error for key {key}')
+        return None
+
+    async def aset(self, key: str, value: Any, timeout: Optional[int]=None, scopes: Optional[list]=None) -> bool:
+        """``set`` over the asyncio Redis client, for async resolvers."""
+        if not redis_breaker.allow():
+            return False
         try:
-            cache_key = self._make_key(key)
+            cache_key = await self._amake_key(key, scopes)
+            timeout = timeout or self.default_timeout
+            serialized_value = json.dumps(value, default=str)
+            pipe = self.async_redis_client.pipeline(transaction=False)
+            pipe.setex(cache_key, timeout, serialized_value)
+            for generation_key in self._generation_keys(key, scopes):
+                pipe.expire(generation_key, GENERATION_TIMEOUT)
+            if self.local is not None:
+                pipe.publish(INVALIDATION_CHANNEL, invalidation_message([cache_key]))
+            stored = bool((await pipe.execute())[0])
+            redis_breaker.success()
+            if self.local is not None:
+                self.local.set(cache_key, serialized_value, timeout)
+            return stored
+        except Exception as e:
+            self._error(e, f'Cache set error for key {key}')
+            return False
+
+    def get(self, key: str, scopes: Optional[list]=None) -> Optional[Any]:
+        if not redis_breaker.allow():
+            return None
+        try:
+            cache_key = self._make_key(key, scopes)
+            value = self.local.get(cache_key) if self.local is not None else None
+            if value is not None:
+                return json.loads(value)
             value = self.redis_client.get(cache_key)
+            redis_breaker.success()
             if value:
+                self.stats['hits'] += 1
+                if self.local is not None:
+                    self.local.set(cache_key, value)
                 return json.loads(value)
+            self.stats['misses'] += 1
         except Exception as e:
-            logger.error(f'Cache get error for key {key}: {e}')
+            self._error(e, f'Cache get error for key {key}')
         return None
 
-    def set(self, key: str, value: Any, timeout: Optional[int]=None) -> bool:
+    def set(self, key: str, value: Any, timeout: Optional[int]=None, scopes: Optional[list]=None) -> bool:
+        if not redis_breaker.allow():
+            return False
         try:
-            cache_key = self._make_key(key)
+            cache_key = self._make_key(key, scopes)
             timeout = timeout or self.default_timeout
             serialized_value = json.dumps(value, default=str)
-            return self.redis_client.setex(cache_key, timeout, serialized_value)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.setex(cache_key, timeout, serialized_value)
+            for generation_key in self._generation_keys(key, scopes):
+                pipe.expire(generation_key, GENERATION_TIMEOUT)
+            if self.local is not None:
+                pipe.publish(INVALIDATION_CHANNEL, invalidation_message([cache_key]))
+            stored = bool(pipe.execute()[0])
+            redis_breaker.success()
+            if self.local is not None:
+                self.local.set(cache_key, serialized_value, timeout)
+            return stored
         except Exception as e:
-            logger.error(f'Cache set error for key {key}: {e}')
+            self._error(e, f'Cache set error for key {key}')
             return False
 
-    def delete(self, key: str) -> bool:
+    def delete(self, key: str, scopes: Optional[list]=None) -> bool:
+        if not redis_breaker.allow():
+            return False
         try:
-            cache_key = self._make_key(key)
+            cache_key = self._make_key(key, scopes)
+            if self.local is not None:
+                self.local.delete(cache_key)
+                self._publish_invalidation([cache_key])
             return bool(self.redis_client.delete(cache_key))
         except Exception as e:
-            logger.error(f'Cache delete error for key {key}: {e}')
+            self._error(e, f'Cache delete error for key {key}')
             return False
 
     def clear_pattern(self, pattern: str) -> int:
+        """Purge keys matching ``pattern`` with an incremental SCAN.
+
+        Routine invalidation goes through ``bump_generation``; this is only for
+        explicit purges, and never blocks Redis the way ``KEYS`` does.
+        """
         try:
-            keys = self.redis_client.keys(f'{self.prefix}:{pattern}*')
-            if keys:
-                return self.redis_client.delete(*keys)
-            return 0
+            deleted = 0
+            batch = []
+            for key in self.redis_client.scan_iter(match=f'{self.prefix}:{pattern}*', count=SCAN_BATCH_SIZE):
+                batch.append(key)
+                if len(batch) >= SCAN_BATCH_SIZE:
+                    deleted += self.redis_client.unlink(*batch)
+                    batch = []
+            if batch:
+                deleted += self.redis_client.unlink(*batch)
+            if self.local is not None:
+                self.local.clear()
+                self._publish_invalidation(None)
+            return deleted
         except Exception as e:
             logger.error(f'Cache clear pattern error for pattern {pattern}: {e}')
             return 0
 
+    def bump_generation(self, kind: str, ident: Any) -> Optional[int]:
+        generations = self.bump_generations([(kind, ident)])
+        return generations[0] if generations else None
+
+    def bump_generations(self, scopes: list) -> list:
+        generation_keys = [self._generation_key(kind, ident) for kind, ident in scopes]
+        for cache_instance in _local_tiers:
+            cache_instance.local.delete(*generation_keys)
+        if not redis_breaker.allow():
+            return []
+        try:
+            pipe = self.redis_client.pipeline()
+            for generation_key in generation_keys:
+                pipe.incr(generation_key)
+                pipe.expire(generation_key, GENERATION_TIMEOUT)
+            if _local_tiers:
+                pipe.publish(INVALIDATION_CHANNEL, invalidation_message(generation_keys))
+            generations = pipe.execute()[:2 * len(generation_keys):2]
+            redis_breaker.success()
+            return generations
+        except Exception as e:
+            self._error(e, f'Cache generation bump error for {scopes}')
+            return []
+
     def invalidate_organization(self, organization_id: str) -> None:
-        patterns = [f'org:{organization_id}', f'projects:org:{organization_id}', f'tasks:org:{organization_id}', f'comments:org:{organization_id}']
-        for pattern in patterns:
-            self.clear_pattern(pattern)
+        self.bump_generation('org', organization_id)
 
     def invalidate_project(self, project_id: str) -> None:
-        patterns = [f'project:{project_id}', f'tasks:project:{project_id}', f'comments:project:{project_id}']
-        for pattern in patterns:
-            self.clear_pattern(pattern)
+        self.bump_generation('project', project_id)
 
     def invalidate_task(self, task_id: str) -> None:
-        patterns = [f'task:{task_id}', f'comments:task:{task_id}']
-        for pattern in patterns:
-            self.clear_pattern(pattern)
-org_cache = SmartCache(prefix='pm_org', default_timeout=600)
-project_cache = SmartCache(prefix='pm_project', default_timeout=300)
-task_cache = SmartCache(prefix='pm_task', default_timeout=180)
-comment_cache = SmartCache(prefix='pm_comment', default_timeout=120)
+        self.bump_generation('task', task_id)
+
+    def invalidate_user(self, user_id: str) -> None:
+        self.bump_generation('user', user_id)
+LOCAL_MAX_BYTES = getattr(settings, 'SMART_CACHE_LOCAL_MAX_BYTES', 0)
+LOCAL_TIMEOUT = getattr(settings, 'SMART_CACHE_LOCAL_TIMEOUT', 30)
+org_cache = SmartCache(prefix='pm_org', default_timeout=600, local_max_bytes=LOCAL_MAX_BYTES, local_timeout=LOCAL_TIMEOUT)
+project_cache = SmartCache(prefix='pm_project', default_timeout=300, local_max_bytes=LOCAL_MAX_BYTES, local_timeout=LOCAL_TIMEOUT)
+task_cache = SmartCache(prefix='pm_task', default_timeout=180, local_max_bytes=LOCAL_MAX_BYTES, local_timeout=LOCAL_TIMEOUT)
+comment_cache = SmartCache(prefix='pm_comment', default_timeout=120, local_max_bytes=LOCAL_MAX_BYTES, local_timeout=LOCAL_TIMEOUT)
+response_cache = SmartCache(prefix='pm_response', default_timeout=60, local_max_bytes=LOCAL_MAX_BYTES, local_timeout=LOCAL_TIMEOUT)
 
-def cached_query(cache_instance: SmartCache, key_prefix: str, timeout: Optional[int]=None):
+def cached_query(cache_instance: SmartCache, key_prefix: str, timeout: Optional[int]=None, scopes=None):
+    """Cache a function's JSON-serialisable result.
+
+    ``scopes`` is an optional callable taking the call's ``(args, kwargs)`` and
+    returning ``(kind, id)`` pairs whose generations are folded into the key;
+    by default they are parsed from ``org:<id>``/``project:<id>``/``task:<id>``
+    segments of the key itself.
+    """
 
     def decorator(func):
 
@@ -84,19 +489,27 @@ def cached_query(cache_instance: SmartCache, key_prefix: str, timeout: Optional[
             key_parts.extend([str(arg) for arg in args])
             key_parts.extend([f'{k}:{v}' for k, v in sorted(kwargs.items())])
             cache_key = ':'.join(key_parts)
-            cached_result = cache_instance.get(cache_key)
+            key_scopes = scopes(args, kwargs) if scopes else None
+            cached_result = cache_instance.get(cache_key, scopes=key_scopes)
             if cached_result is not None:
                 return cached_result
             result = func(*args, **kwargs)
-            cache_instance.set(cache_key, result, timeout)
+            cache_instance.set(cache_key, result, timeout, scopes=key_scopes)
             return result
         return wrapper
     return decorator
 
+def invalidate_scopes(organization_ids=(), project_ids=(), task_ids=(), user_ids=()) -> None:
+    """Bump every given generation in one round trip once the transaction commits."""
+    scopes = [('org', i) for i in set(organization_ids)] + [('project', i) for i in set(project_ids)] + [('task', i) for i in set(task_ids)] + [('user', i) for i in set(user_ids)]
+    scopes = [(kind, ident) for kind, ident in scopes if ident is not None]
+    if scopes:
+        transaction.on_commit(lambda: org_cache.bump_generations(scopes))
+
 def get_cache_stats():
     try:
         info = org_cache.redis_client.info()
-        return {'used_memory': info.get('used_memory_human', 'N/A'), 'connected_clients': info.get('connected_clients', 0), 'total_commands_processed': info.get('total_commands_processed', 0), 'keyspace_hits': info.get('keyspace_hits', 0), 'keyspace_misses': info.get('keyspace_misses', 0), 'hit_rate': round(info.get('keyspace_hits', 0) / (info.get('keyspace_hits', 0) + info.get('keyspace_misses', 1)) * 100, 2)}
+        return {'used_memory': info.get('used_memory_human', 'N/A'), 'connected_clients': info.get('connected_clients', 0), 'total_commands_processed': info.get('total_commands_processed', 0), 'keyspace_hits': info.get('keyspace_hits', 0), 'keyspace_misses': info.get('keyspace_misses', 0), 'hit_rate': round(info.get('keyspace_hits', 0) / (info.get('keyspace_hits', 0) + info.get('keyspace_misses', 1)) * 100, 2), 'tiers': {c.prefix: c.get_stats() for c in (org_cache, project_cache, task_cache, comment_cache, response_cache)}}
     except Exception as e:
         logger.error(f'Error getting cache stats: {e}')
         return {}
\ No newline at end of file
@@ -0,0 +1,48 @@
+from cache import org_cache
+from project_management.routers import primary_reads
+from .models import Organization
+
+def accessible_organization_ids(user):
+    """IDs of the organizations ``user`` owns or belongs to.
+
+    Resolved once per request (memoised on the user object) and cached in
+    ``org_cache`` under the user's generation, which the membership and
+    ownership signal handlers bump. Misses read the primary, since the result
+    is cached under the freshly bumped generation.
+    """
+    organization_ids = getattr(user, '_accessible_organization_ids', None)
+    if organization_ids is None:
+        key = accessible_organizations_key(user)
+        organization_ids = org_cache.get(key)
+        if organization_ids is None:
+            with primary_reads():
+                owned = Organization._base_manager.filter(owner_id=user.pk).values_list('id', flat=True)
+                member_of = Organization.members.through.objects.filter(user_id=user.pk).values_list('organization_id', flat=True)
+                organization_ids = sorted(set(owned) | set(member_of))
+            org_cache.set(key, organization_ids)
+        user._accessible_organization_ids = organization_ids
+    return organization_ids
+
+async def aaccessible_organization_ids(user):
+    """``accessible_organization_ids`` for async resolvers, using the async cache and ORM APIs."""
+    organization_ids = getattr(user, '_accessible_organization_ids', None)
+    if organization_ids is None:
+        key = accessible_organizations_key(user)
+        organization_ids = await org_cache.aget(key)
+        if organization_ids is None:
+            with primary_reads():
+                owned = [pk async for pk in Organization._base_manager.filter(owner_id=user.pk).values_list('id', flat=True)]
+                member_of = [pk async for pk in Organization.members.through.objects.filter(user_id=user.pk).values_list('organization_id', flat=True)]
+            organization_ids = sorted(set(owned) | set(member_of))
+            await org_cache.aset(key, organization_ids)
+        user._accessible_organization_ids = organization_ids
+    return organization_ids
+
+def accessible_organizations_key(user):
+    return f'user:{user.pk}:orgs'
+
+def forget_accessible_organizations(user):
+    try:
+        del user._accessible_organization_ids
+    except AttributeError:
+        pass
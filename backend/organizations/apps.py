@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 class OrganizationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'organizations'
\ No newline at end of file
+    name = 'organizations'
+
+    def ready(self):
+        from . import signals
\ No newline at end of file
@@ -1,7 +1,51 @@
+from django.db import router
 from django.http import Http404
 from django.contrib.auth.models import AnonymousUser
+from django.utils.functional import SimpleLazyObject
+from cache import org_cache
 from .models import Organization
 
+ORGANIZATION_CACHE_TIMEOUT = 60
+# Enough to identify the tenant and check access. The rest, notably the
+# counters task and project writes keep current, is left deferred so it is
+# read from the database rather than from a copy up to a minute old.
+SLUG_CACHE_FIELDS = ('id', 'slug', 'owner_id')
+
+def slug_cache_key(slug):
+    return f'slug:{slug}'
+
+def get_organization_by_slug(slug):
+    """Return the organization for ``slug``, with ``SLUG_CACHE_FIELDS`` from a short-lived cache and the rest deferred."""
+    key = slug_cache_key(slug)
+    row = org_cache.get(key)
+    if row is None:
+        organization = Organization.objects.filter(slug=slug).first()
+        if organization is None:
+            return None
+        org_cache.set(key, {name: getattr(organization, name) for name in SLUG_CACHE_FIELDS}, ORGANIZATION_CACHE_TIMEOUT)
+        return organization
+    return Organization.from_db(router.db_for_read(Organization), list(SLUG_CACHE_FIELDS), [row[name] for name in SLUG_CACHE_FIELDS])
+
+def user_has_access_cached(organization, user):
+    """``Organization.user_has_access`` cached per user and organization generation."""
+    if user.is_superuser or organization.owner_id == user.id:
+        return True
+    key = f'access:user:{user.id}:org:{organization.id}'
+    has_access = org_cache.get(key)
+    if has_access is None:
+        has_access = organization.user_has_access(user)
+        org_cache.set(key, has_access, ORGANIZATION_CACHE_TIMEOUT)
+    return has_access
+
+def get_request_organization(request, org_slug):
+    user = getattr(request, 'user', None)
+    if user is None or isinstance(user, AnonymousUser):
+        return None
+    organization = get_organization_by_slug(org_slug)
+    if organization is None or not user_has_access_cached(organization, user):
+        return None
+    return organization
+
 class OrganizationMiddleware:
 
     def __init__(self, get_response):
@@ -16,16 +60,7 @@ class OrganizationMiddleware:
         if not org_slug and 'HTTP_X_ORGANIZATION_SLUG' in request.META:
             org_slug = request.META['HTTP_X_ORGANIZATION_SLUG']
         if org_slug:
-            try:
-                organization = Organization.objects.get(slug=org_slug)
-                if isinstance(request.user, AnonymousUser):
-                    request.organization = None
-                elif organization.user_has_access(request.user):
-                    request.organization = organization
-                else:
-                    request.organization = None
-            except Organization.DoesNotExist:
-                request.organization = None
+            request.organization = SimpleLazyObject(lambda: get_request_organization(request, org_slug))
         response = self.get_response(request)
         return response
 
@@ -0,0 +1,45 @@
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Organization = apps.get_model('organizations', 'Organization')
+    Project = apps.get_model('projects', 'Project')
+    projects = Project.objects.filter(organization=OuterRef('pk')).order_by().values('organization')
+
+    def rollup(aggregate):
+        return Coalesce(Subquery(projects.annotate(value=aggregate).values('value'), output_field=IntegerField()), 0)
+
+    Organization.objects.update(
+        project_count=rollup(Count('pk')),
+        total_tasks=rollup(Sum('total_tasks_count')),
+        completed_tasks=rollup(Sum('done_tasks_count')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0002_add_indexes'),
+        ('projects', '0003_project_task_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organization',
+            name='project_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='total_tasks',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='organization',
+            name='completed_tasks',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+from project_management.indexes import AddIndexConcurrently, DropIndexIfExists
+
+
+class Migration(migrations.Migration):
+
+    # Concurrent index builds cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('organizations', '0003_organization_counters'),
+    ]
+
+    operations = [
+        AddIndexConcurrently('organization', models.Index(fields=['owner', 'created_at'], name='idx_org_owner_created')),
+        AddIndexConcurrently('organization', models.Index(fields=['name', 'slug'], name='idx_org_name_slug')),
+        AddIndexConcurrently('organization', models.Index(fields=['contact_email'], name='idx_org_contact_email')),
+        # Superseded by the search index.
+        DropIndexIfExists('idx_org_name_search'),
+    ]
@@ -0,0 +1,19 @@
+from django.contrib.postgres.indexes import OpClass
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+from project_management.indexes import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # Concurrent index builds cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('organizations', '0004_declarative_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently('organization', models.Index(OpClass(Lower('name'), name='text_pattern_ops'), name='idx_org_name_lower')),
+    ]
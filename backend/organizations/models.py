@@ -1,6 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.apps import apps
 from django.db.models import Case, When, IntegerField
+from django.db.models.functions import Coalesce, Lower
+from django.contrib.postgres.indexes import OpClass
+from project_management.search import search_queryset
 
 class OrganizationManager(models.Manager):
 
@@ -10,19 +14,39 @@ class OrganizationManager(models.Manager):
     def for_user(self, user):
         if user.is_superuser:
             return self.get_queryset()
-        return self.get_queryset().filter(models.Q(owner=user) | models.Q(members=user)).distinct().select_related('owner')
+        from .access import accessible_organization_ids
+        return self.get_queryset().filter(id__in=accessible_organization_ids(user))
 
     def search(self, query, user=None):
+        """Organizations matching ``query`` in the full-text index, best match first"""
         if user and (not user.is_superuser):
-            user_orgs = self.for_user(user)
-            return user_orgs.filter(models.Q(name__icontains=query) | models.Q(slug__icontains=query) | models.Q(contact_email__icontains=query)).select_related('owner')
-        return self.get_queryset().filter(models.Q(name__icontains=query) | models.Q(slug__icontains=query) | models.Q(contact_email__icontains=query)).select_related('owner')
+            from .access import accessible_organization_ids
+            organization_ids = accessible_organization_ids(user)
+            return search_queryset(self.get_queryset().filter(id__in=organization_ids), query, organization_ids)
+        return search_queryset(self.get_queryset(), query)
 
     def with_stats(self, user=None):
         if user and (not user.is_superuser):
-            user_orgs = self.for_user(user)
-            return user_orgs.annotate(project_count=models.Count('projects', distinct=True), total_tasks=models.Count('projects__tasks', distinct=True), completed_tasks=models.Count(models.Case(models.When(projects__tasks__status='DONE', then=1), output_field=models.IntegerField()), distinct=True)).select_related('owner')
-        return self.get_queryset().annotate(project_count=models.Count('projects', distinct=True), total_tasks=models.Count('projects__tasks', distinct=True), completed_tasks=models.Count(models.Case(models.When(projects__tasks__status='DONE', then=1), output_field=models.IntegerField()), distinct=True)).select_related('owner')
+            return self.for_user(user)
+        return self.get_queryset()
+
+    def adjust_counters(self, organization_id, **deltas):
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if deltas:
+            self.model._base_manager.filter(pk=organization_id).update(**{field: models.F(field) + delta for field, delta in deltas.items()})
+
+    def reconcile_counters(self, queryset=None):
+        queryset = self.model._base_manager.all() if queryset is None else queryset
+        Project = apps.get_model('projects', 'Project')
+        projects = Project._base_manager.filter(organization=models.OuterRef('pk')).order_by().values('organization')
+        expected = {'project_count': Coalesce(models.Subquery(projects.annotate(value=models.Count('pk')).values('value')), 0), 'total_tasks': Coalesce(models.Subquery(projects.annotate(value=models.Sum('total_tasks_count')).values('value')), 0), 'completed_tasks': Coalesce(models.Subquery(projects.annotate(value=models.Sum('done_tasks_count')).values('value')), 0)}
+        drift = models.Q()
+        for field in expected:
+            drift |= ~models.Q(**{field: models.F(f'expected_{field}')})
+        drifted_ids = list(queryset.order_by().annotate(**{f'expected_{field}': value for field, value in expected.items()}).filter(drift).values_list('pk', flat=True))
+        if drifted_ids:
+            self.model._base_manager.filter(pk__in=drifted_ids).update(**expected)
+        return len(drifted_ids)
 
 class Organization(models.Model):
     name = models.CharField(max_length=100)
@@ -32,12 +56,16 @@ class Organization(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='owned_organizations')
     members = models.ManyToManyField(User, related_name='organizations', blank=True)
+    project_count = models.IntegerField(default=0, editable=False)
+    total_tasks = models.IntegerField(default=0, editable=False)
+    completed_tasks = models.IntegerField(default=0, editable=False)
     objects = OrganizationManager()
 
     class Meta:
         ordering = ['name']
         verbose_name = 'Organization'
         verbose_name_plural = 'Organizations'
+        indexes = [models.Index(fields=['owner', 'created_at'], name='idx_org_owner_created'), models.Index(fields=['name', 'slug'], name='idx_org_name_slug'), models.Index(fields=['contact_email'], name='idx_org_contact_email'), models.Index(OpClass(Lower('name'), name='text_pattern_ops'), name='idx_org_name_lower')]
 
     def __str__(self):
         return self.name
@@ -0,0 +1,50 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from django.dispatch import receiver
+from cache import invalidate_scopes, org_cache
+from .access import forget_accessible_organizations
+from .middleware import slug_cache_key
+from .models import Organization
+
+@receiver(post_init, sender=Organization)
+def remember_organization_fields(sender, instance, **kwargs):
+    instance._original_owner_id = instance.__dict__.get('owner_id')
+    instance._original_slug = instance.__dict__.get('slug')
+
+def forget_slugs(*slugs):
+    slugs = {slug for slug in slugs if slug}
+
+    def delete_slugs():
+        for slug in slugs:
+            org_cache.delete(slug_cache_key(slug))
+    transaction.on_commit(delete_slugs)
+
+@receiver(post_save, sender=Organization)
+def organization_saved(sender, instance, **kwargs):
+    invalidate_scopes(organization_ids=[instance.pk], user_ids=[instance.owner_id, instance._original_owner_id])
+    forget_slugs(instance.slug, instance._original_slug)
+    if Organization.owner.is_cached(instance):
+        forget_accessible_organizations(instance.owner)
+    instance._original_owner_id = instance.owner_id
+    instance._original_slug = instance.slug
+
+@receiver(post_delete, sender=Organization)
+def organization_deleted(sender, instance, **kwargs):
+    invalidate_scopes(organization_ids=[instance.pk], user_ids=[instance.owner_id])
+    forget_slugs(instance.slug)
+
+@receiver(m2m_changed, sender=Organization.members.through)
+def organization_members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        related = instance.organizations if reverse else instance.members
+        instance._cleared_member_pks = set(related.values_list('pk', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_cleared_member_pks', set())
+    elif action not in ('post_add', 'post_remove'):
+        return
+    if reverse:
+        forget_accessible_organizations(instance)
+        invalidate_scopes(organization_ids=pk_set or (), user_ids=[instance.pk])
+    else:
+        invalidate_scopes(organization_ids=[instance.pk], user_ids=pk_set or ())
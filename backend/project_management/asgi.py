@@ -0,0 +1,13 @@
+import os
+from django.core.asgi import get_asgi_application
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project_management.settings')
+django_application = get_asgi_application()
+from .schema import schema
+from .websocket import GraphQLWebSocket
+graphql_websocket = GraphQLWebSocket(schema)
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket' and scope['path'] == '/graphql/':
+        await graphql_websocket(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -0,0 +1,150 @@
+import threading
+from collections import OrderedDict
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Max
+from django.db.models.functions import Lower
+from cache import org_cache
+from .routers import primary_reads
+AUTOCOMPLETE_MAX_LIMIT = 50
+# Shorter fragments match by prefix only: trigram indexes need three characters.
+CONTAINS_MIN_LENGTH = 3
+
+class AutocompleteSource:
+    """The column one ``autocomplete`` entity suggests from.
+
+    ``counter`` names the ``Organization`` counter holding how many rows a
+    tenant has, which decides whether its suggestions are served from memory.
+    ``contains`` sources also match inside the value once the fragment is long
+    enough; ``distinct`` sources suggest each value once, dated by its most
+    recently updated row.
+    """
+
+    def __init__(self, model, column, counter=None, contains=False, distinct=False):
+        self.label = model
+        self.column = column
+        self.counter = counter
+        self.contains = contains
+        self.distinct = distinct
+
+    @property
+    def model(self):
+        return apps.get_model(self.label)
+
+    def lookup(self, prefix):
+        return 'contains' if self.contains and len(prefix) >= CONTAINS_MIN_LENGTH else 'startswith'
+
+    def matches(self, value, prefix):
+        return prefix in value if self.lookup(prefix) == 'contains' else value.startswith(prefix)
+
+    def rows(self, queryset):
+        """``(id, value, updated_at)`` rows of ``queryset``, most recently updated first; ``id`` is ``None`` for distinct sources."""
+        if self.distinct:
+            values = queryset.exclude(**{self.column: ''}).order_by().values(self.column).annotate(latest=Max('updated_at')).order_by('-latest', self.column)
+            return [(None, value, latest) for value, latest in values.values_list(self.column, 'latest')]
+        return list(queryset.order_by('-updated_at', '-pk').values_list('pk', self.column, 'updated_at'))
+
+    def search(self, queryset, prefix, limit):
+        """Matching rows from the database, where ``lower()`` and trigram indexes serve the filter."""
+        queryset = queryset.annotate(autocomplete_value=Lower(self.column)).filter(**{f'autocomplete_value__{self.lookup(prefix)}': prefix})
+        return self.rows(queryset)[:limit] if self.distinct else list(queryset.order_by('-updated_at', '-pk').values_list('pk', self.column, 'updated_at')[:limit])
+AUTOCOMPLETE_SOURCES = {'organization': AutocompleteSource('organizations.Organization', 'name'), 'project': AutocompleteSource('projects.Project', 'name', counter='project_count'), 'task': AutocompleteSource('tasks.Task', 'title', counter='total_tasks', contains=True), 'assignee': AutocompleteSource('tasks.Task', 'assignee_email', counter='total_tasks', distinct=True)}
+
+class TenantIndex:
+    """One tenant's rows for one source, most recent first, valid while the organization's generation is ``version``.
+
+    ``rows`` is ``None`` for tenants too large to keep in memory, so they are
+    not recounted on every keystroke.
+    """
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.rows = None if rows is None else [(value.lower(), (pk, value, updated_at)) for pk, value, updated_at in rows]
+
+    def suggest(self, source, prefix, limit):
+        suggestions = []
+        for value, row in self.rows:
+            if source.matches(value, prefix):
+                suggestions.append(row)
+                if len(suggestions) == limit:
+                    break
+        return suggestions
+_tenant_indexes = OrderedDict()
+_tenant_indexes_lock = threading.Lock()
+
+def cached_index(key, version):
+    with _tenant_indexes_lock:
+        index = _tenant_indexes.get(key)
+        if index is None or index.version != version:
+            return None
+        _tenant_indexes.move_to_end(key)
+        return index
+
+def store_index(key, index):
+    with _tenant_indexes_lock:
+        _tenant_indexes[key] = index
+        _tenant_indexes.move_to_end(key)
+        while len(_tenant_indexes) > settings.AUTOCOMPLETE_MEMORY_TENANTS:
+            _tenant_indexes.popitem(last=False)
+
+def tenant_indexes(entity, source, organization_ids):
+    """``{organization id: TenantIndex}`` for the tenants whose index is current or can be built now."""
+    versions = org_cache.generations([('org', organization_id) for organization_id in organization_ids])
+    if versions is None:
+        return {}
+    indexes = {}
+    stale = {}
+    for organization_id, version in zip(organization_ids, versions):
+        index = cached_index((entity, organization_id), version)
+        if index is None:
+            stale[organization_id] = version
+        else:
+            indexes[organization_id] = index
+    if stale:
+        Organization = apps.get_model('organizations', 'Organization')
+        # The generation was read first, so a write racing the load bumps it
+        # and the index is rebuilt; the primary keeps replica lag out of it.
+        with primary_reads():
+            sizes = dict(Organization._base_manager.filter(pk__in=stale).values_list('pk', source.counter))
+            for organization_id, version in stale.items():
+                size = sizes.get(organization_id)
+                rows = source.rows(source.model._base_manager.filter(organization_id=organization_id)) if size is not None and size <= settings.AUTOCOMPLETE_MEMORY_MAX_ROWS else None
+                indexes[organization_id] = TenantIndex(version, rows)
+                store_index((entity, organization_id), indexes[organization_id])
+    return indexes
+
+def autocomplete(entity, prefix, organization_ids=None, limit=10):
+    """Up to ``limit`` ``(id, value, updated_at)`` suggestions for ``prefix``, most recently updated first.
+
+    Matching is case-insensitive: by prefix, or anywhere in task titles once
+    the fragment has ``CONTAINS_MIN_LENGTH`` characters. Tenants with at most
+    ``AUTOCOMPLETE_MEMORY_MAX_ROWS`` rows are answered from a per-process
+    index rebuilt whenever the organization's cache generation moves; larger
+    ones, and organizations themselves, query the ``lower()``/trigram
+    indexes. ``organization_ids=None`` (superusers) searches every tenant in
+    the database.
+    """
+    if not 1 <= limit <= AUTOCOMPLETE_MAX_LIMIT:
+        raise Exception(f'Argument "limit" must be between 1 and {AUTOCOMPLETE_MAX_LIMIT}')
+    source = AUTOCOMPLETE_SOURCES[entity]
+    prefix = prefix.strip().lower()
+    if not prefix:
+        return []
+    queryset = source.model._base_manager.all()
+    if source.counter is None:
+        return source.search(queryset if organization_ids is None else queryset.filter(pk__in=organization_ids), prefix, limit)
+    if organization_ids is None:
+        return source.search(queryset, prefix, limit)
+    indexes = tenant_indexes(entity, source, list(organization_ids)) if settings.AUTOCOMPLETE_MEMORY_MAX_ROWS else {}
+    suggestions = []
+    in_database = [organization_id for organization_id in organization_ids if indexes.get(organization_id) is None or indexes[organization_id].rows is None]
+    for organization_id, index in indexes.items():
+        if index.rows is not None:
+            suggestions += index.suggest(source, prefix, limit)
+    if in_database:
+        suggestions += source.search(queryset.filter(organization_id__in=in_database), prefix, limit)
+    suggestions.sort(key=lambda row: row[2], reverse=True)
+    if source.distinct:
+        seen = set()
+        suggestions = [row for row in suggestions if not (row[1] in seen or seen.add(row[1]))]
+    return suggestions[:limit]
@@ -0,0 +1,100 @@
+import json
+import time
+from asgiref.sync import async_to_sync
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from graphene_django.settings import graphene_settings
+from graphql_relay import to_global_id
+from cache import comment_cache, org_cache, project_cache, response_cache, task_cache
+from organizations.access import forget_accessible_organizations
+from organizations.models import Organization
+from projects.models import Project
+from tasks.models import Task, TaskComment
+from .schema import schema
+PAGE_SIZE = 20
+TASK_FIELDS = 'id title status priority dueDate assigneeEmail project { id name organization { slug } } createdBy { username }'
+PROJECT_FIELDS = 'id name status dueDate taskCount completedTasksCount completionRate organization { slug } createdBy { username }'
+ORGANIZATION_FIELDS = 'id name slug owner { username }'
+COMMENT_FIELDS = 'id content authorEmail timestamp task { id title } createdBy { username }'
+# Root fields only superusers may query; other benchmark users skip them.
+SUPERUSER_OPERATIONS = {'users'}
+SMART_CACHES = (org_cache, project_cache, task_cache, comment_cache, response_cache)
+
+def connection_query(field, fields, **arguments):
+    """A first-page query for a connection field; ``arguments`` map argument names to GraphQL variable types."""
+    definitions = ''.join((f', ${name}: {graphql_type}' for name, graphql_type in arguments.items()))
+    passed = ''.join((f', {name}: ${name}' for name in arguments))
+    return f'query($first: Int{definitions}) {{ {field}(first: $first{passed}) {{ edges {{ node {{ {fields} }} }} pageInfo {{ hasNextPage endCursor }} }} }}'
+QUERIES = {'me': ('{ me { id username email } }', lambda f: {}), 'users': (connection_query('users', 'id username'), lambda f: {}), 'organization': ('query($slug: String) { organization(slug: $slug) { ' + ORGANIZATION_FIELDS + ' } }', lambda f: {'slug': f['organization_slug']}), 'organizations': (connection_query('organizations', ORGANIZATION_FIELDS), lambda f: {}), 'myOrganizations': (connection_query('myOrganizations', ORGANIZATION_FIELDS), lambda f: {}), 'organizationsWithStats': (connection_query('organizationsWithStats', ORGANIZATION_FIELDS), lambda f: {}), 'searchOrganizations': (connection_query('searchOrganizations', ORGANIZATION_FIELDS, query='String'), lambda f: {'query': f['search']}), 'node': ('query($id: ID!) { node(id: $id) { id ... on ProjectType { name } } }', lambda f: {'id': f['project_global_id']}), 'project': ('query($id: ID!) { project(id: $id) { ' + PROJECT_FIELDS + ' } }', lambda f: {'id': f['project_global_id']}), 'projects': (connection_query('projects', PROJECT_FIELDS), lambda f: {}), 'projectsByOrganization': (connection_query('projectsByOrganization', PROJECT_FIELDS, organizationSlug='String'), lambda f: {'organizationSlug': f['organization_slug']}), 'myProjects': (connection_query('myProjects', PROJECT_FIELDS), lambda f: {}), 'projectsWithStats': (connection_query('projectsWithStats', PROJECT_FIELDS), lambda f: {}), 'searchProjects': (connection_query('searchProjects', PROJECT_FIELDS, query='String'), lambda f: {'query': f['search']}), 'projectsByStatus': (connection_query('projectsByStatus', PROJECT_FIELDS, status='String'), lambda f: {'status': 'ACTIVE'}), 'projectsDueSoon': (connection_query('projectsDueSoon', PROJECT_FIELDS, days='Int'), lambda f: {'days': 30}), 'task': ('query($id: ID!) { task(id: $id) { ' + TASK_FIELDS + ' } }', lambda f: {'id': f['task_global_id']}), 'tasks': (connection_query('tasks', TASK_FIELDS), lambda f: {}), 'tasksByProject': (connection_query('tasksByProject', TASK_FIELDS, projectId='ID'), lambda f: {'projectId': f['project_id']}), 'myTasks': (connection_query('myTasks', TASK_FIELDS), lambda f: {}), 'tasksByStatus': (connection_query('tasksByStatus', TASK_FIELDS, status='String'), lambda f: {'status': 'TODO'}), 'tasksByPriority': (connection_query('tasksByPriority', TASK_FIELDS, priority='String'), lambda f: {'priority': 'HIGH'}), 'tasksByAssignee': (connection_query('tasksByAssignee', TASK_FIELDS, email='String'), lambda f: {'email': f['email']}), 'overdueTasks': (connection_query('overdueTasks', TASK_FIELDS), lambda f: {}), 'tasksDueSoon': (connection_query('tasksDueSoon', TASK_FIELDS, days='Int'), lambda f: {'days': 7}), 'highPriorityTasks': (connection_query('highPriorityTasks', TASK_FIELDS), lambda f: {}), 'searchTasks': (connection_query('searchTasks', TASK_FIELDS, query='String'), lambda f: {'query': f['search']}), 'tasksWithCommentCount': (connection_query('tasksWithCommentCount', TASK_FIELDS), lambda f: {}), 'taskComment': ('query($id: ID!) { taskComment(id: $id) { ' + COMMENT_FIELDS + ' } }', lambda f: {'id': f['comment_global_id']}), 'taskComments': (connection_query('taskComments', COMMENT_FIELDS), lambda f: {}), 'commentsByTask': (connection_query('commentsByTask', COMMENT_FIELDS, taskId='ID'), lambda f: {'taskId': f['task_id']}), 'recentComments': (connection_query('recentComments', COMMENT_FIELDS, days='Int'), lambda f: {'days': 7}), 'commentsByAuthor': (connection_query('commentsByAuthor', COMMENT_FIELDS, email='String'), lambda f: {'email': f['email']}), 'searchComments': (connection_query('searchComments', COMMENT_FIELDS, query='String'), lambda f: {'query': f['search']})}
+MUTATIONS = {'createOrganization': ('mutation($input: OrganizationInput!) { createOrganization(input: $input) { organization { id } } }', lambda f: {'input': {'name': 'Benchmark Org', 'slug': 'benchmark-mutation-org', 'contactEmail': f['email']}}), 'updateOrganization': ('mutation($id: ID!, $input: OrganizationInput!) { updateOrganization(id: $id, input: $input) { organization { id } } }', lambda f: {'id': f['organization_id'], 'input': {'name': 'Renamed', 'contactEmail': f['email']}}), 'createProject': ('mutation($input: ProjectInput!) { createProject(input: $input) { project { id } } }', lambda f: {'input': {'name': 'Benchmark project', 'organizationId': f['organization_id']}}), 'updateProject': ('mutation($id: ID!, $input: ProjectInput!) { updateProject(id: $id, input: $input) { project { id } } }', lambda f: {'id': f['project_id'], 'input': {'name': 'Renamed', 'organizationId': f['organization_id'], 'status': 'ON_HOLD'}}), 'createTask': ('mutation($input: TaskInput!) { createTask(input: $input) { task { id } } }', lambda f: {'input': {'title': 'Benchmark task', 'projectId': f['project_id']}}), 'updateTask': ('mutation($id: ID!, $input: TaskInput!) { updateTask(id: $id, input: $input) { task { id } } }', lambda f: {'id': f['task_id'], 'input': {'title': 'Renamed', 'projectId': f['project_id'], 'status': 'DONE'}}), 'addTaskComment': ('mutation($input: TaskCommentInput!) { addTaskComment(input: $input) { comment { id } } }', lambda f: {'input': {'content': 'Benchmark comment', 'authorEmail': f['email'], 'taskId': f['task_id']}}), 'bulkCreateTasks': ('mutation($input: [TaskInput!]!) { bulkCreateTasks(input: $input) { tasks { id } errors { index message } } }', lambda f: {'input': [{'title': f'Benchmark task {i}', 'projectId': f['project_id']} for i in range(50)]}), 'bulkUpdateTasks': ('mutation($input: [BulkTaskUpdateInput!]!) { bulkUpdateTasks(input: $input) { tasks { id } errors { index message } } }', lambda f: {'input': [{'id': task_id, 'status': 'IN_PROGRESS'} for task_id in f['task_ids']]}), 'bulkAddTaskComments': ('mutation($input: [TaskCommentInput!]!) { bulkAddTaskComments(input: $input) { comments { id } errors { index message } } }', lambda f: {'input': [{'content': 'Benchmark comment', 'authorEmail': f['email'], 'taskId': task_id} for task_id in f['task_ids']]})}
+
+def fixtures_for(user, organization):
+    """Ids and values the benchmark operations are parameterised with, taken from ``organization``."""
+    project = Project._base_manager.filter(organization=organization).order_by('-total_tasks_count', 'pk').first()
+    tasks = list(Task._base_manager.filter(project=project).order_by('pk').values_list('pk', flat=True)[:50])
+    comment = TaskComment._base_manager.filter(task__project=project).order_by('pk').first()
+    return {'organization_slug': organization.slug, 'organization_id': str(organization.pk), 'project_id': str(project.pk), 'project_global_id': to_global_id('ProjectType', project.pk), 'task_id': str(tasks[0]) if tasks else '0', 'task_ids': [str(pk) for pk in tasks], 'task_global_id': to_global_id('TaskType', tasks[0] if tasks else 0), 'comment_global_id': to_global_id('TaskCommentType', comment.pk if comment else 0), 'email': user.email, 'search': 'api'}
+
+def execute(user, query, variables=None):
+    """Execute ``query`` the way the GraphQL view does, on an event loop with the configured middleware."""
+    request = RequestFactory().post('/graphql/', json.dumps({'query': query}), content_type='application/json')
+    request.user = user
+    request.organization = None
+    middleware = [middleware_class() for middleware_class in graphene_settings.MIDDLEWARE]
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        result = async_to_sync(schema.execute_async)(query, context_value=request, variable_values=variables, middleware=middleware)
+        elapsed = time.perf_counter() - start
+    return (result, elapsed, len(queries.captured_queries))
+
+def flush_caches(user):
+    """Empty every ``SmartCache`` and the organization ids memoised on ``user``, so the next execution reads the database."""
+    for smart_cache in SMART_CACHES:
+        smart_cache.clear_pattern('')
+    forget_accessible_organizations(user)
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+def benchmark(user, organization, iterations=20, names=None, cold_cache=False):
+    """Run every query and mutation ``iterations`` times and return per-operation statistics.
+
+    Mutations run in a transaction that is rolled back after each iteration, so
+    the dataset is left untouched and cache invalidations never fire. With
+    ``cold_cache`` the caches are flushed before every execution (outside the
+    timing) so the numbers measure the database path. ``SUPERUSER_OPERATIONS``
+    are skipped unless ``user`` is a superuser.
+    """
+    fixtures = fixtures_for(user, organization)
+    operations = [(name, query, dict(variables(fixtures), first=PAGE_SIZE) if '$first' in query else variables(fixtures), False) for name, (query, variables) in QUERIES.items()]
+    operations += [(name, query, variables(fixtures), True) for name, (query, variables) in MUTATIONS.items()]
+    results = {}
+    for name, query, variables, is_mutation in operations:
+        if (names and name not in names) or (name in SUPERUSER_OPERATIONS and (not user.is_superuser)):
+            continue
+        timings = []
+        query_counts = []
+        errors = None
+        for _ in range(iterations):
+            if cold_cache:
+                flush_caches(user)
+            if is_mutation:
+                with transaction.atomic():
+                    result, elapsed, count = execute(user, query, variables)
+                    transaction.set_rollback(True)
+            else:
+                result, elapsed, count = execute(user, query, variables)
+            timings.append(elapsed * 1000)
+            query_counts.append(count)
+            errors = errors or result.errors
+        results[name] = {'p50_ms': round(percentile(timings, 50), 3), 'p95_ms': round(percentile(timings, 95), 3), 'p99_ms': round(percentile(timings, 99), 3), 'first_ms': round(timings[0], 3), 'queries': max(query_counts), 'errors': [str(error) for error in errors or ()]}
+    return results
+
+def compare(results, baseline, threshold):
+    """Yield ``(name, current, previous, regressed)`` for every operation in ``results``."""
+    for name, current in results.items():
+        previous = baseline.get(name)
+        regressed = bool(previous) and (current['queries'] > previous['queries'] or current['p95_ms'] > previous['p95_ms'] * (1 + threshold / 100))
+        yield (name, current, previous, regressed)
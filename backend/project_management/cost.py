@@ -0,0 +1,89 @@
+from graphql import GraphQLError, GraphQLList, GraphQLObjectType, get_named_type, get_nullable_type
+from graphql.language import FieldNode, FragmentDefinitionNode, FragmentSpreadNode, InlineFragmentNode, IntValueNode, OperationDefinitionNode, OperationType, VariableNode
+from graphql.validation import ValidationRule
+from graphene_django.settings import graphene_settings
+
+def is_connection(graphql_type):
+    named = get_named_type(graphql_type)
+    return isinstance(named, GraphQLObjectType) and 'edges' in named.fields and 'pageInfo' in named.fields
+
+def argument_value(node, name, variables):
+    for argument in node.arguments or ():
+        if argument.name.value != name:
+            continue
+        if isinstance(argument.value, IntValueNode):
+            return int(argument.value.value)
+        if isinstance(argument.value, VariableNode):
+            value = (variables or {}).get(argument.value.name.value)
+            return value if isinstance(value, int) else None
+    return None
+
+def field_multiplier(node, field, variables, default_list_size):
+    """How many times a field's selection set is expected to be resolved per parent."""
+    if is_connection(field.type):
+        size = argument_value(node, 'first', variables)
+        if size is None:
+            size = argument_value(node, 'last', variables)
+        return size if size is not None else graphene_settings.RELAY_CONNECTION_MAX_LIMIT or default_list_size
+    if isinstance(get_nullable_type(field.type), GraphQLList):
+        return default_list_size
+    return 1
+
+def selection_cost(context, parent_type, selection_set, fragments, variables, default_list_size, visited=frozenset()):
+    """Estimated cost of ``selection_set``: one point per object resolved, scaled by list sizes above it."""
+    cost = 0
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            name = selection.name.value
+            if name.startswith('__') or not isinstance(parent_type, GraphQLObjectType) or name not in parent_type.fields:
+                continue
+            field = parent_type.fields[name]
+            if selection.selection_set is None:
+                continue
+            named = get_named_type(field.type)
+            if name == 'edges' and is_connection(parent_type) or (name == 'node' and 'cursor' in parent_type.fields):
+                cost += selection_cost(context, named, selection.selection_set, fragments, variables, default_list_size, visited)
+                continue
+            multiplier = field_multiplier(selection, field, variables, default_list_size)
+            cost += multiplier + multiplier * selection_cost(context, named, selection.selection_set, fragments, variables, default_list_size, visited)
+        elif isinstance(selection, InlineFragmentNode):
+            fragment_type = context.schema.get_type(selection.type_condition.name.value) if selection.type_condition else parent_type
+            cost += selection_cost(context, fragment_type, selection.selection_set, fragments, variables, default_list_size, visited)
+        elif isinstance(selection, FragmentSpreadNode):
+            name = selection.name.value
+            fragment = fragments.get(name)
+            if fragment is None or name in visited:
+                continue
+            fragment_type = context.schema.get_type(fragment.type_condition.name.value)
+            cost += selection_cost(context, fragment_type, fragment.selection_set, fragments, variables, default_list_size, visited | {name})
+    return cost
+
+def query_cost_validator(max_cost, variables=None, default_list_size=20, callback=None):
+    """Validation rule rejecting operations whose estimated cost exceeds ``max_cost``.
+
+    Connection fields multiply their children by ``first``/``last`` (or the relay
+    max limit when omitted) and plain lists by ``default_list_size``, so deeply
+    nested list selections are refused before any resolver runs. ``callback``
+    receives the ``{operation_name: cost}`` mapping for reporting.
+    """
+
+    class QueryCostValidator(ValidationRule):
+
+        def __init__(self, context):
+            super().__init__(context)
+            definitions = context.document.definitions
+            fragments = {d.name.value: d for d in definitions if isinstance(d, FragmentDefinitionNode)}
+            costs = {}
+            for definition in definitions:
+                if not isinstance(definition, OperationDefinitionNode):
+                    continue
+                root_type = context.schema.mutation_type if definition.operation == OperationType.MUTATION else context.schema.subscription_type if definition.operation == OperationType.SUBSCRIPTION else context.schema.query_type
+                if root_type is None:
+                    continue
+                name = definition.name.value if definition.name else ''
+                costs[name] = selection_cost(context, root_type, definition.selection_set, fragments, variables, default_list_size)
+                if costs[name] > max_cost:
+                    context.report_error(GraphQLError(f"'{name or 'anonymous'}' has an estimated cost of {costs[name]}, which exceeds the maximum of {max_cost}.", [definition]))
+            if callable(callback):
+                callback(costs)
+    return QueryCostValidator
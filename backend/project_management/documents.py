@@ -0,0 +1,100 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from graphql import parse, validate
+from cache import org_cache
+logger = logging.getLogger(__name__)
+PERSISTED_QUERY_PREFIX = 'pm_pq'
+PERSISTED_QUERY_TIMEOUT = 7 * 24 * 3600
+
+def query_hash(query):
+    return hashlib.sha256(query.encode()).hexdigest()
+
+class LRUCache:
+    """Thread-safe mapping holding at most ``max_entries`` items, evicting the least recently used."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry
+
+    def remember(self, key, entry):
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+class DocumentCache(LRUCache):
+    """Process-wide LRU of parsed documents and their validation errors, keyed by query hash."""
+
+    def get(self, schema, query, digest=None):
+        """Return ``(document, errors)`` for ``query``, parsing and validating only on a miss."""
+        digest = digest or query_hash(query)
+        entry = self.lookup(digest)
+        if entry is None:
+            document = parse(query)
+            entry = (document, validate(schema.graphql_schema, document))
+            self.remember(digest, entry)
+        return entry
+
+class PersistedQueryStore:
+    """Registered operations by sha256: one Redis key each, memoised in a bounded in-process LRU.
+
+    Client registrations expire ``timeout`` seconds after they were last read.
+    Hashes listed in the ``GRAPHQL_PERSISTED_QUERIES_MANIFEST`` file (an Apollo
+    style ``{"operations": [{"id": ..., "body": ...}]}`` document) are kept
+    apart and never expire, which is how operations reach the allow-list in
+    production.
+    """
+
+    def __init__(self, redis_client, manifest_path='', max_entries=1000, timeout=PERSISTED_QUERY_TIMEOUT):
+        self.redis_client = redis_client
+        self.timeout = timeout
+        self._manifest = {}
+        self._queries = LRUCache(max_entries)
+        if manifest_path:
+            with open(manifest_path) as manifest:
+                for operation in json.load(manifest).get('operations', []):
+                    self._manifest[operation['id']] = operation['body']
+
+    def get(self, digest):
+        query = self._manifest.get(digest) or self._queries.lookup(digest)
+        if query is None:
+            try:
+                query = self.redis_client.getex(f'{PERSISTED_QUERY_PREFIX}:{digest}', ex=self.timeout)
+            except Exception as e:
+                logger.error(f'Error reading persisted query {digest}: {e}')
+            if query is not None:
+                self._queries.remember(digest, query)
+        return query
+
+    def register(self, digest, query):
+        """Store a client-sent operation; callers register only documents that parsed and validated."""
+        self._queries.remember(digest, query)
+        try:
+            self.redis_client.set(f'{PERSISTED_QUERY_PREFIX}:{digest}', query, ex=self.timeout)
+        except Exception as e:
+            logger.error(f'Error registering persisted query {digest}: {e}')
+document_cache = DocumentCache(settings.GRAPHQL_DOCUMENT_CACHE_SIZE)
+persisted_queries = PersistedQueryStore(org_cache.redis_client, settings.GRAPHQL_PERSISTED_QUERIES_MANIFEST, settings.GRAPHQL_DOCUMENT_CACHE_SIZE, settings.GRAPHQL_PERSISTED_QUERY_TIMEOUT)
@@ -0,0 +1,58 @@
+import asyncio
+import inspect
+from functools import partial
+from asgiref.sync import sync_to_async
+from django.db.models import Model, QuerySet
+from graphene.types.resolver import get_default_resolver
+from graphql import get_named_type, get_nullable_type, is_leaf_type, is_list_type
+
+def in_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+def is_plain_read(info, root):
+    """True for default attribute resolvers that cannot reach the database.
+
+    Attribute reads on plain objects (connections, edges, page info) and leaf
+    fields of model instances stay on the event loop; a non-leaf attribute of a
+    model instance may be a lazily loaded relation, so it is not plain.
+    Meta fields such as ``__typename`` are not in ``fields`` and never query.
+    """
+    field = info.parent_type.fields.get(info.field_name)
+    if field is None:
+        return True
+    resolve = field.resolve
+    if not (isinstance(resolve, partial) and resolve.func is get_default_resolver()):
+        return False
+    return not isinstance(root, Model) or is_leaf_type(get_named_type(info.return_type))
+
+class SyncResolverMiddleware:
+    """Run synchronous resolvers in the request's worker thread when executing on an event loop.
+
+    Django refuses ORM access from the event loop, so every resolver other than a
+    plain attribute read is moved to the thread with ``sync_to_async``; when it
+    returns an awaitable (an ``async def`` resolver) that is awaited back on the
+    loop. Under ``execute_sync`` there is no running loop and the middleware is a
+    no-op. A QuerySet returned for a list field is fetched in the thread too,
+    since the executor iterates it on the loop.
+    """
+
+    def resolve(self, next, root, info, **args):
+        if is_plain_read(info, root) or not in_event_loop():
+            return next(root, info, **args)
+        return self.resolve_in_thread(next, root, info, args)
+
+    async def resolve_in_thread(self, next, root, info, args):
+        result = await sync_to_async(resolve_fetched)(next, root, info, args)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+def resolve_fetched(next, root, info, args):
+    result = next(root, info, **args)
+    if isinstance(result, QuerySet) and is_list_type(get_nullable_type(info.return_type)):
+        return list(result)
+    return result
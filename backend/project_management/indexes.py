@@ -0,0 +1,82 @@
+from django.contrib.postgres.indexes import OpClass, PostgresIndex
+from django.db import NotSupportedError
+from django.db.migrations import AddIndex
+from django.db.migrations.operations.base import Operation
+
+def concurrent(schema_editor):
+    """Whether indexes can be built without blocking writes; raises inside a transaction, where PostgreSQL cannot."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return False
+    if schema_editor.connection.in_atomic_block:
+        raise NotSupportedError('Concurrent index operations cannot run inside a transaction; set atomic = False on the migration.')
+    return True
+
+def index_exists(connection, table, name):
+    with connection.cursor() as cursor:
+        return name in connection.introspection.get_constraints(cursor, table)
+
+def buildable_index(index, connection):
+    """``index`` as ``connection`` can build it: PostgreSQL index types are skipped (``None``) and operator classes dropped elsewhere."""
+    if connection.vendor == 'postgresql':
+        return index
+    if isinstance(index, PostgresIndex):
+        return None
+    if not any((isinstance(expression, OpClass) for expression in index.expressions)):
+        return index
+    _, _, kwargs = index.deconstruct()
+    return index.__class__(*[expression.get_source_expressions()[0] if isinstance(expression, OpClass) else expression for expression in index.expressions], **kwargs)
+
+class AddIndexConcurrently(AddIndex):
+    """``AddIndex`` for large tables, usable on every supported database.
+
+    PostgreSQL builds the index with ``CREATE INDEX CONCURRENTLY``, so writes
+    continue while it builds and the migration must set ``atomic = False``;
+    other databases build it in place, without PostgreSQL-only index types and
+    operator classes. An index that already exists under the same name, such
+    as one created by hand, is left alone.
+    """
+    atomic = False
+
+    def describe(self):
+        return f'Concurrently create index {self.index.name} on {self.model_name}'
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        index = buildable_index(self.index, schema_editor.connection)
+        if index is not None and self.allow_migrate_model(schema_editor.connection.alias, model) and (not index_exists(schema_editor.connection, model._meta.db_table, index.name)):
+            if concurrent(schema_editor):
+                schema_editor.add_index(model, index, concurrently=True)
+            else:
+                schema_editor.add_index(model, index)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        index = buildable_index(self.index, schema_editor.connection)
+        if index is not None and self.allow_migrate_model(schema_editor.connection.alias, model):
+            if concurrent(schema_editor):
+                schema_editor.remove_index(model, index, concurrently=True)
+            else:
+                schema_editor.remove_index(model, index)
+
+class DropIndexIfExists(Operation):
+    """Drop an index that exists only in the database, never in model state, such as one created with raw SQL."""
+    atomic = False
+    reversible = True
+
+    def __init__(self, name):
+        self.name = name
+
+    def deconstruct(self):
+        return (self.__class__.__name__, [self.name], {})
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        schema_editor.execute(f"DROP INDEX{(' CONCURRENTLY' if concurrent(schema_editor) else '')} IF EXISTS {schema_editor.quote_name(self.name)}")
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        pass
+
+    def describe(self):
+        return f'Drop index {self.name} if it exists'
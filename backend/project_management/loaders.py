@@ -0,0 +1,151 @@
+import inspect
+from collections import defaultdict
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
+from graphene_django.filter import DjangoFilterConnectionField
+from graphql import OperationType
+from organizations.access import forget_accessible_organizations
+from organizations.models import Organization
+from projects.models import Project
+from tasks.models import Task, TaskComment
+PAGINATION_ARGS = ('first', 'last', 'before', 'after', 'offset')
+
+class BatchLoader:
+    """Request-scoped loader that resolves every pending key with one batch call.
+
+    Keys are queued by ``LoaderMiddleware`` as soon as a list of parent objects
+    is resolved, so the first ``load`` for any sibling fetches them all.
+    """
+
+    def __init__(self, batch_load, default=None):
+        self.batch_load = batch_load
+        self.default = default
+        self._cache = {}
+        self._pending = set()
+
+    def enqueue(self, key):
+        if key is not None and key not in self._cache:
+            self._pending.add(key)
+
+    def load(self, key):
+        if key is None:
+            return self._default()
+        if key not in self._cache:
+            self._pending.add(key)
+            keys = list(self._pending)
+            self._pending.clear()
+            results = self.batch_load(keys)
+            for k in keys:
+                self._cache[k] = results[k] if k in results else self._default()
+        return self._cache[key]
+
+    def _default(self):
+        return self.default() if callable(self.default) else self.default
+
+def load_by_id(model):
+
+    def batch_load(ids):
+        return model._default_manager.in_bulk(ids)
+    return batch_load
+
+def load_grouped(model, fk_attname):
+
+    def batch_load(parent_ids):
+        grouped = defaultdict(list)
+        for obj in model._default_manager.filter(**{f'{fk_attname}__in': parent_ids}):
+            grouped[getattr(obj, fk_attname)].append(obj)
+        return grouped
+    return batch_load
+
+class Loaders:
+    """All loaders for one request, plus which model attribute feeds each one."""
+
+    def __init__(self):
+        self.project_tasks = BatchLoader(load_grouped(Task, 'project_id'), default=list)
+        self.task_comments = BatchLoader(load_grouped(TaskComment, 'task_id'), default=list)
+        self.organization = BatchLoader(load_by_id(Organization))
+        self.project = BatchLoader(load_by_id(Project))
+        self.task = BatchLoader(load_by_id(Task))
+        self.user = BatchLoader(load_by_id(User))
+        self.sources = {Project: [(self.project_tasks, 'pk'), (self.organization, 'organization_id'), (self.user, 'created_by_id')], Task: [(self.task_comments, 'pk'), (self.project, 'project_id'), (self.user, 'created_by_id')], TaskComment: [(self.task, 'task_id'), (self.user, 'created_by_id')]}
+
+    def enqueue_siblings(self, objects):
+        for obj in objects:
+            for loader, attname in self.sources.get(type(obj), ()):
+                loader.enqueue(getattr(obj, attname))
+
+def get_loaders(info):
+    request = info.context
+    loaders = getattr(request, '_loaders', None)
+    if loaders is None:
+        loaders = request._loaders = Loaders()
+    return loaders
+
+def load_related(info, instance, field_name, loader_name):
+    """Return a forward FK through the request loader unless it is already cached."""
+    field = instance._meta.get_field(field_name)
+    if field.is_cached(instance):
+        return getattr(instance, field_name)
+    value = getattr(get_loaders(info), loader_name).load(getattr(instance, field.attname))
+    if value is not None:
+        field.set_cached_value(instance, value)
+    return value
+
+def prefetch_attr(response_key):
+    """Attribute holding the list the query optimizer prefetched for a connection selected under ``response_key``."""
+    return f'_selected_{response_key}'
+
+def load_reverse(info, instance, related_name, loader_name, args):
+    """Return a reverse relation as the optimizer's prefetched list, else as a batched list when no filters are applied."""
+    selected = getattr(instance, prefetch_attr(info.path.key), None)
+    if selected is not None:
+        return selected
+    if has_filter_args(args):
+        return getattr(instance, related_name).all()
+    prefetched = getattr(instance, '_prefetched_objects_cache', {})
+    if related_name in prefetched:
+        return list(prefetched[related_name])
+    return getattr(get_loaders(info), loader_name).load(instance.pk)
+
+def has_filter_args(args):
+    return any((value is not None for name, value in args.items() if name not in PAGINATION_ARGS))
+
+class BatchedFilterConnectionField(DjangoFilterConnectionField):
+    """Filter connection that accepts loader-provided lists for unfiltered reads."""
+
+    @classmethod
+    def resolve_queryset(cls, connection, iterable, info, args, filtering_args, filterset_class):
+        if isinstance(iterable, list):
+            return iterable
+        return super().resolve_queryset(connection, iterable, info, args, filtering_args, filterset_class)
+
+class LoaderMiddleware:
+    """Queue loader keys for every list of model instances a resolver returns.
+
+    QuerySets count only once fetched; evaluating one here would load rows
+    the field may never use.
+    """
+
+    def resolve(self, next, root, info, **args):
+        if info.path.prev is None and info.operation.operation == OperationType.MUTATION:
+            info.context._loaders = Loaders()
+            forget_accessible_organizations(info.context.user)
+        result = next(root, info, **args)
+        if inspect.isawaitable(result):
+            return self.enqueue_awaited(result, info)
+        return enqueue_result(info, result)
+
+    async def enqueue_awaited(self, result, info):
+        return enqueue_result(info, await result)
+
+def enqueue_result(info, result):
+    objects = None
+    if isinstance(result, (list, tuple)):
+        objects = result
+    elif isinstance(result, QuerySet):
+        objects = result._result_cache
+    elif hasattr(result, 'edges'):
+        objects = [edge.node for edge in result.edges]
+    if objects:
+        get_loaders(info).enqueue_siblings(objects)
+    return result
@@ -0,0 +1,235 @@
+import hmac
+import inspect
+import logging
+import threading
+import time
+from contextlib import ExitStack
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+from graphql import get_named_type, is_leaf_type
+from cache import comment_cache, org_cache, project_cache, response_cache, task_cache
+from .documents import document_cache
+from .throttling import rate_limiter
+logger = logging.getLogger(__name__)
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+MAX_OPERATION_NAMES = 500
+OTHER_OPERATION = '__other__'
+SQL_SAMPLE_SIZE = 10
+SQL_SAMPLE_LENGTH = 300
+
+class Histogram:
+    """Prometheus-style histogram with fixed buckets, so memory is bounded per label set."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            cumulative += count
+            yield (f'{name}_bucket', dict(labels, le=str(bound)), cumulative)
+        yield (f'{name}_sum', labels, self.sum)
+        yield (f'{name}_count', labels, self.count)
+
+class MetricsRegistry:
+    """Process-local histograms keyed by metric name and label values."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._help = {}
+        self._operation_names = set()
+
+    def describe(self, name, help_text, buckets):
+        self._help[name] = (help_text, buckets)
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self._help[name][1])
+            histogram.observe(value)
+
+    def operation_label(self, operation_name):
+        """Bound label cardinality: operation names beyond ``MAX_OPERATION_NAMES`` share one label."""
+        operation_name = operation_name or 'anonymous'
+        with self._lock:
+            if operation_name in self._operation_names:
+                return operation_name
+            if len(self._operation_names) < MAX_OPERATION_NAMES:
+                self._operation_names.add(operation_name)
+                return operation_name
+        return OTHER_OPERATION
+
+    def render(self):
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+        for name, (help_text, _) in sorted(self._help.items()):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+            for (metric, labels), histogram in histograms:
+                if metric == name:
+                    lines += [format_sample(*sample) for sample in histogram.samples(name, dict(labels))]
+        return lines
+registry = MetricsRegistry()
+registry.describe('pm_graphql_operation_seconds', 'Wall time of GraphQL operations.', DURATION_BUCKETS)
+registry.describe('pm_graphql_operation_db_queries', 'SQL queries issued per GraphQL operation.', QUERY_COUNT_BUCKETS)
+registry.describe('pm_graphql_operation_db_seconds', 'Time spent in SQL per GraphQL operation.', DURATION_BUCKETS)
+registry.describe('pm_graphql_field_seconds', 'Wall time of GraphQL resolvers by parent type and field.', DURATION_BUCKETS)
+registry.describe('pm_graphql_field_db_queries', 'SQL queries issued by GraphQL resolvers by parent type and field.', QUERY_COUNT_BUCKETS)
+registry.describe('pm_graphql_field_db_seconds', 'Time spent in SQL by GraphQL resolvers by parent type and field.', DURATION_BUCKETS)
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_sample(name, labels, value):
+    if labels:
+        name += '{' + ','.join((f'{key}="{escape_label(labels[key])}"' for key in labels)) + '}'
+    return f'{name} {value}'
+
+class QueryRecorder:
+    """``connection.execute_wrapper`` that counts and times SQL, keeping a small sample of statements."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.sample = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            if len(self.sample) < SQL_SAMPLE_SIZE:
+                self.sample.append(sql[:SQL_SAMPLE_LENGTH])
+
+    def install(self):
+        """Wrap every database connection of the calling thread; closing the returned ``ExitStack`` in that thread unwraps them."""
+        stack = ExitStack()
+        for alias in settings.DATABASES:
+            stack.enter_context(connections[alias].execute_wrapper(self))
+        return stack
+
+def record_operation(request, operation_name, execute):
+    """Run ``execute()`` while recording operation metrics and logging it if slow."""
+    recorder = request._query_recorder = QueryRecorder()
+    start = time.perf_counter()
+    try:
+        with recorder.install():
+            return execute()
+    finally:
+        observe_operation(operation_name, recorder, start)
+
+async def arecord_operation(request, operation_name, execute):
+    """``record_operation`` for an async ``execute``.
+
+    Resolvers run their SQL on the connections of the request's worker thread
+    (see ``SyncResolverMiddleware``), never on the event loop's, so the
+    recorder is installed and removed there.
+    """
+    recorder = request._query_recorder = QueryRecorder()
+    start = time.perf_counter()
+    stack = await sync_to_async(recorder.install)()
+    try:
+        return await execute()
+    finally:
+        await sync_to_async(stack.close)()
+        observe_operation(operation_name, recorder, start)
+
+def observe_operation(operation_name, recorder, start):
+    duration = time.perf_counter() - start
+    labels = {'operation': registry.operation_label(operation_name)}
+    registry.observe('pm_graphql_operation_seconds', labels, duration)
+    registry.observe('pm_graphql_operation_db_queries', labels, recorder.count)
+    registry.observe('pm_graphql_operation_db_seconds', labels, recorder.duration)
+    if duration * 1000 >= settings.GRAPHQL_SLOW_OPERATION_MS:
+        logger.warning('Slow GraphQL operation %s: %.1fms, %d queries (%.1fms); first queries: %s', operation_name or 'anonymous', duration * 1000, recorder.count, recorder.duration * 1000, recorder.sample)
+
+class MetricsMiddleware:
+    """Record wall time, SQL query count and SQL time for every resolved field.
+
+    Fields are labelled ``Type.field`` rather than by full path so the number of
+    series is bounded by the schema. Scalar and enum fields are only recorded
+    when they hit the database, which keeps plain attribute reads cheap while
+    still surfacing computed fields that cause N+1 queries. SQL counts need the
+    per-operation ``QueryRecorder`` installed by the GraphQL view; for async
+    fields they cover the whole await, so siblings resolved concurrently on the
+    event loop can share queries.
+    """
+
+    def resolve(self, next, root, info, **args):
+        recorder = getattr(info.context, '_query_recorder', None)
+        queries, db_time = (recorder.count, recorder.duration) if recorder else (0, 0.0)
+        start = time.perf_counter()
+        try:
+            result = next(root, info, **args)
+        except Exception:
+            observe_field(info, recorder, queries, db_time, start)
+            raise
+        if inspect.isawaitable(result):
+            return self.observe_awaited(result, info, recorder, queries, db_time, start)
+        observe_field(info, recorder, queries, db_time, start)
+        return result
+
+    async def observe_awaited(self, result, info, recorder, queries, db_time, start):
+        try:
+            return await result
+        finally:
+            observe_field(info, recorder, queries, db_time, start)
+
+def observe_field(info, recorder, queries, db_time, start):
+    duration = time.perf_counter() - start
+    issued = recorder.count - queries if recorder else 0
+    if issued or not is_leaf_type(get_named_type(info.return_type)):
+        labels = {'field': f'{info.parent_type.name}.{info.field_name}'}
+        registry.observe('pm_graphql_field_seconds', labels, duration)
+        if recorder:
+            registry.observe('pm_graphql_field_db_queries', labels, issued)
+            registry.observe('pm_graphql_field_db_seconds', labels, recorder.duration - db_time)
+
+def cache_lines():
+    lines = ['# HELP pm_cache_events_total SmartCache hits, misses and housekeeping events by cache and tier.', '# TYPE pm_cache_events_total counter']
+    for cache_instance in (org_cache, project_cache, task_cache, comment_cache, response_cache):
+        for tier, stats in cache_instance.get_stats().items():
+            for event in ('hits', 'misses', 'errors', 'evictions', 'expirations', 'invalidations'):
+                if event in stats:
+                    lines.append(format_sample('pm_cache_events_total', {'cache': cache_instance.prefix, 'tier': tier, 'event': event}, stats[event]))
+    lines += ['# HELP pm_graphql_document_cache_events_total Parsed GraphQL document cache events.', '# TYPE pm_graphql_document_cache_events_total counter']
+    for event, value in document_cache.stats.items():
+        lines.append(format_sample('pm_graphql_document_cache_events_total', {'event': event}, value))
+    return lines
+
+def throttle_lines():
+    lines = ['# HELP pm_graphql_rate_limit_total Token-bucket checks by outcome, bucket scope and budget.', '# TYPE pm_graphql_rate_limit_total counter']
+    for (outcome, scope, budget), value in sorted(dict(rate_limiter.stats).items()):
+        lines.append(format_sample('pm_graphql_rate_limit_total', {'outcome': outcome, 'scope': scope, 'budget': budget}, value))
+    lines += ['# HELP pm_graphql_rate_limit_redis_errors_total Rate limit checks that fell back to process-local buckets.', '# TYPE pm_graphql_rate_limit_redis_errors_total counter', format_sample('pm_graphql_rate_limit_redis_errors_total', {}, rate_limiter.redis_errors)]
+    return lines
+
+@require_GET
+def metrics(request):
+    """Prometheus metrics for scrapers sending ``METRICS_TOKEN`` as a bearer token; refused to everyone while it is unset."""
+    token = settings.METRICS_TOKEN
+    if not token or not hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return HttpResponseForbidden()
+    return HttpResponse('\n'.join(registry.render() + cache_lines() + throttle_lines()) + '\n', content_type='text/plain; version=0.0.4')
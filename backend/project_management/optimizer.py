@@ -0,0 +1,163 @@
+import functools
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Manager, Prefetch, QuerySet
+from graphene import Dynamic
+from graphene.utils.str_converters import to_camel_case
+from graphene_django.filter.fields import convert_enum
+from graphene_django.settings import graphene_settings
+from graphql import GraphQLObjectType, get_named_type
+from graphql.execution.collect_fields import collect_sub_fields
+from graphql.execution.values import get_argument_values
+from .cost import is_connection
+from .loaders import BatchedFilterConnectionField, prefetch_attr
+CURSOR_ARGS = ('last', 'before', 'after', 'offset')
+
+def optimize_queryset(queryset, info, graphene_type=None, keep=()):
+    """Narrow ``queryset`` to what the selection set of ``info`` reads.
+
+    Columns no selected field needs are deferred, selected forward relations are
+    joined with ``select_related`` and selected ``tasks``/``comments``
+    connections are fetched with a ``Prefetch`` whose queryset is optimized the same way, filtered by the
+    connection's arguments and cut to the requested page. Connections are looked
+    through to their ``node`` selection; ``graphene_type`` names the node type
+    when the field returns an interface, as ``node(id:)`` does. ``keep`` lists
+    extra columns the caller reads, such as cursor ordering. Querysets that are
+    already evaluated, ``values()`` or combined querysets are returned unchanged.
+    """
+    if isinstance(queryset, Manager):
+        queryset = queryset.all()
+    if not isinstance(queryset, QuerySet) or queryset._result_cache is not None or queryset._fields is not None or queryset.query.combinator:
+        return queryset
+    object_type, selections = node_selections(info, info.return_type, info.field_nodes, graphene_type)
+    if object_type is None:
+        return queryset
+    keep = [*keep, *ordering_names(queryset)]
+    return apply_plan(queryset.select_related(None).prefetch_related(None), plan_selection(info, queryset.model, object_type, selections, keep=keep))
+
+def node_selections(info, graphql_type, field_nodes, graphene_type=None):
+    """The object type and sub-fields (by response key) selected on ``field_nodes``, looking through connection ``edges { node }``."""
+    named = get_named_type(graphql_type)
+    if not isinstance(named, GraphQLObjectType):
+        if graphene_type is None:
+            return (None, {})
+        named = info.schema.get_type(graphene_type._meta.name)
+    selections = collect_sub_fields(info.schema, info.fragments, info.variable_values, named, field_nodes)
+    if not is_connection(named):
+        return (named, selections)
+    edge_type = get_named_type(named.fields['edges'].type)
+    edges = selected_nodes(selections, 'edges')
+    nodes = selected_nodes(collect_sub_fields(info.schema, info.fragments, info.variable_values, edge_type, edges), 'node') if edges else []
+    if not nodes:
+        return (None, {})
+    return node_selections(info, edge_type.fields['node'].type, nodes, graphene_type)
+
+def selected_nodes(selections, name):
+    return [node for nodes in selections.values() if nodes[0].name.value == name for node in nodes]
+
+@functools.lru_cache(maxsize=None)
+def graphene_fields(graphene_type):
+    """``{graphql name: (python name, graphene field)}`` for an object type, with relation fields resolved."""
+    fields = {}
+    for name, field in graphene_type._meta.fields.items():
+        if isinstance(field, Dynamic):
+            field = field.get_type()
+        if field is not None:
+            fields[getattr(field, 'name', None) or to_camel_case(name)] = (name, field)
+    return fields
+
+def ordering_names(queryset):
+    names = []
+    for item in queryset.query.order_by or queryset.model._meta.ordering:
+        if isinstance(item, str):
+            try:
+                names.append(queryset.model._meta.get_field(item.lstrip('-')).name)
+            except FieldDoesNotExist:
+                pass
+    return names
+
+def plan_selection(info, model, object_type, selections, prefix='', keep=()):
+    """``(deferred, select_related, prefetches)`` needed to resolve ``selections`` on instances of ``model``.
+
+    Primary and foreign keys are always loaded: loaders and cursors read them.
+    A selected field that maps to neither a model field nor an entry of the
+    node type's ``optimizer_columns`` may read anything, so nothing is deferred
+    on that model.
+    """
+    graphene_type = object_type.graphene_type
+    hints = getattr(graphene_type, 'optimizer_columns', {})
+    fields = graphene_fields(graphene_type)
+    needed = {model._meta.get_field(name).name for name in keep}
+    complete = True
+    deferred = []
+    select_related = []
+    prefetches = []
+    for key, nodes in selections.items():
+        name = nodes[0].name.value
+        if name not in fields:
+            continue
+        attr, graphene_field = fields[name]
+        if attr in hints:
+            needed.update(hints[attr])
+            continue
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            complete = False
+            continue
+        if not model_field.is_relation:
+            needed.add(model_field.name)
+            continue
+        sub_type, sub_selections = node_selections(info, object_type.fields[name].type, nodes)
+        if model_field.concrete and (not model_field.many_to_many):
+            select_related.append(prefix + attr)
+            if sub_type is not None:
+                sub_deferred, sub_select_related, sub_prefetches = plan_selection(info, model_field.related_model, sub_type, sub_selections, f'{prefix}{attr}__')
+                deferred += sub_deferred
+                select_related += sub_select_related
+                prefetches += sub_prefetches
+            continue
+        prefetch = plan_prefetch(info, key, nodes, model_field, graphene_field, object_type.fields[name], sub_type, sub_selections, prefix + attr)
+        if prefetch is not None:
+            prefetches.append(prefetch)
+    if complete:
+        deferred += [prefix + field.name for field in model._meta.concrete_fields if not (field.primary_key or field.is_relation or field.name in needed)]
+    return (deferred, select_related, prefetches)
+
+def plan_prefetch(info, key, nodes, model_field, graphene_field, field_definition, sub_type, sub_selections, lookup):
+    """A ``Prefetch`` for a selected reverse connection, or ``None`` if its resolver would not read one.
+
+    Only ``BatchedFilterConnectionField`` resolvers (``load_reverse``) look for
+    the prefetched list, under the attribute named after the response key, so
+    aliased selections of one relation with different filters each get their
+    own. The connection's filter arguments are applied here; other connections
+    re-query through their filterset and are left to do so.
+    """
+    if not isinstance(graphene_field, BatchedFilterConnectionField):
+        return None
+    related_model = model_field.related_model
+    queryset = related_model._default_manager.all()
+    if sub_type is not None:
+        queryset = apply_plan(queryset, plan_selection(info, related_model, sub_type, sub_selections, keep=ordering_names(queryset)))
+    args = get_argument_values(field_definition, nodes[0], info.variable_values)
+    filterset = graphene_field.filterset_class(data={name: convert_enum(value) for name, value in args.items() if name in graphene_field.filtering_args}, queryset=queryset, request=info.context)
+    if not filterset.is_valid():
+        return None
+    queryset = filterset.qs
+    if all((args.get(name) is None for name in CURSOR_ARGS)):
+        limit = args.get('first')
+        if limit is None:
+            limit = graphene_settings.RELAY_CONNECTION_MAX_LIMIT
+        if limit is not None:
+            # One row past the page lets the connection report hasNextPage.
+            queryset = queryset[:limit + 1]
+    return Prefetch(lookup, queryset=queryset, to_attr=prefetch_attr(key))
+
+def apply_plan(queryset, plan):
+    deferred, select_related, prefetches = plan
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if deferred:
+        queryset = queryset.defer(*deferred)
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+    return queryset
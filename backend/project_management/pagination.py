@@ -0,0 +1,147 @@
+import base64
+import inspect
+import json
+import graphene
+from graphene.relay import PageInfo
+from django.db.models import F, Q, QuerySet
+from graphene_django.settings import graphene_settings
+
+class Page(list):
+    """One keyset page of model instances plus what is needed to build cursors."""
+
+    def __init__(self, objects, ordering, has_next_page, has_previous_page):
+        super().__init__(objects)
+        self.ordering = ordering
+        self.has_next_page = has_next_page
+        self.has_previous_page = has_previous_page
+
+    def cursor_for(self, obj):
+        return encode_cursor([getattr(obj, name) for name, _ in self.ordering])
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise Exception('Invalid cursor!')
+
+def keyset_field(queryset, name):
+    """The model field, or the annotation's output field, that ``name`` orders by."""
+    opts = queryset.model._meta
+    if name in queryset.query.annotations:
+        return queryset.query.annotations[name].output_field
+    return opts.pk if name in ('pk', opts.pk.attname) else opts.get_field(name)
+
+def keyset_ordering(queryset):
+    """``(attname, descending)`` pairs for the queryset's ordering plus a pk tiebreaker.
+
+    Annotations can be ordered by as well, as search ranks are.
+    """
+    opts = queryset.model._meta
+    ordering = []
+    for item in queryset.query.order_by or opts.ordering:
+        if not isinstance(item, str):
+            raise ValueError(f'Keyset pagination needs plain field orderings, got {item!r}')
+        name = item.lstrip('-')
+        ordering.append((name if name in queryset.query.annotations else keyset_field(queryset, name).attname, item.startswith('-')))
+    if opts.pk.attname not in [name for name, _ in ordering]:
+        ordering.append((opts.pk.attname, ordering[-1][1] if ordering else False))
+    return ordering
+
+def keyset_filter(queryset, ordering, values):
+    """Rows strictly after ``values`` in ``ordering``, with NULLs sorted last."""
+    condition = Q(pk__in=[])
+    equal = Q()
+    for (name, descending), raw in zip(ordering, values):
+        field = keyset_field(queryset, name)
+        value = None if raw is None else field.to_python(raw)
+        if value is not None:
+            after = Q(**{f'{name}__lt' if descending else f'{name}__gt': value})
+            if field.null:
+                after |= Q(**{f'{name}__isnull': True})
+            condition |= equal & after
+            equal &= Q(**{name: value})
+        else:
+            equal &= Q(**{f'{name}__isnull': True})
+    return queryset.filter(condition)
+
+def paginate(queryset, first=None, after=None):
+    """Slice ``queryset`` into a ``Page`` of at most ``first`` rows after the ``after`` cursor."""
+    window, ordering, first = page_window(queryset, first, after)
+    return make_page(list(window), ordering, first, after)
+
+async def apaginate(queryset, first=None, after=None):
+    """``paginate`` for async resolvers, fetching the page with async iteration."""
+    window, ordering, first = page_window(queryset, first, after)
+    return make_page([obj async for obj in window], ordering, first, after)
+
+def page_size(first):
+    """``first`` checked against graphene-django's ``RELAY_CONNECTION_MAX_LIMIT``, which is also the default."""
+    max_limit = graphene_settings.RELAY_CONNECTION_MAX_LIMIT
+    if first is None:
+        first = max_limit
+    if first < 0:
+        raise Exception('Argument "first" must be a non-negative integer')
+    if max_limit and first > max_limit:
+        raise Exception(f'Requesting {first} records exceeds the `first` limit of {max_limit} records.')
+    return first
+
+def page_window(queryset, first, after):
+    first = page_size(first)
+    ordering = keyset_ordering(queryset)
+    if after:
+        queryset = keyset_filter(queryset, ordering, decode_cursor(after))
+    queryset = queryset.order_by(*[F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_last=True) for name, descending in ordering])
+    return (queryset[:first + 1], ordering, first)
+
+def make_page(objects, ordering, first, after):
+    return Page(objects[:first], ordering, has_next_page=len(objects) > first, has_previous_page=bool(after))
+
+class KeysetConnectionField(graphene.Field):
+    """Relay connection over a resolver's queryset, paginated by keyset cursors.
+
+    The resolver returns a queryset (or an already-built ``Page``), or an
+    awaitable of either for async resolvers. Querysets go through the node
+    type's ``get_queryset`` like graphene-django connections do, and their
+    ordering plus a pk tiebreaker
+    defines the cursor, so every page costs one indexed range scan regardless of
+    depth. Page size is bounded by graphene-django's ``RELAY_CONNECTION_MAX_LIMIT``.
+    Node types without a connection of their own (no relay ``Node`` interface
+    or ``use_connection``) pass one as ``connection_type``.
+    """
+
+    def __init__(self, node_type, *args, connection_type=None, **kwargs):
+        kwargs.setdefault('first', graphene.Int())
+        kwargs.setdefault('after', graphene.String())
+        self.node_type = node_type
+        self._connection_type = connection_type
+        super().__init__(lambda: self.connection_type, *args, **kwargs)
+
+    @property
+    def connection_type(self):
+        return self._connection_type or self.node_type._meta.connection
+
+    def wrap_resolve(self, parent_resolver):
+        resolver = super().wrap_resolve(parent_resolver)
+
+        def connection_resolver(root, info, **args):
+            result = resolver(root, info, **args)
+            if inspect.isawaitable(result):
+                return self.resolve_connection_async(result, info, args)
+            if isinstance(result, QuerySet):
+                result = paginate(self.node_type.get_queryset(result, info), args.get('first'), args.get('after'))
+            return build_connection(self.connection_type, result)
+        return connection_resolver
+
+    async def resolve_connection_async(self, result, info, args):
+        result = await result
+        if isinstance(result, QuerySet):
+            result = await apaginate(self.node_type.get_queryset(result, info), args.get('first'), args.get('after'))
+        return build_connection(self.connection_type, result)
+
+def build_connection(connection_type, page):
+    edges = [connection_type.Edge(node=obj, cursor=page.cursor_for(obj)) for obj in page]
+    page_info = PageInfo(start_cursor=edges[0].cursor if edges else None, end_cursor=edges[-1].cursor if edges else None, has_previous_page=page.has_previous_page, has_next_page=page.has_next_page)
+    return connection_type(edges=edges, page_info=page_info)
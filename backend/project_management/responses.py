@@ -0,0 +1,68 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from django.utils.http import parse_etags
+from graphql import OperationType, print_ast
+from cache import response_cache
+from organizations.access import aaccessible_organization_ids
+from .documents import query_hash
+from .resolver_cache import cache_scopes
+_normalized_hashes = OrderedDict()
+_normalized_hashes_lock = threading.Lock()
+
+def normalized_hash(document):
+    """sha256 of ``document`` printed back canonically, so whitespace, comments and commas do not split entries.
+
+    Memoised per parsed document; ``document_cache`` hands out the same
+    object for every request with the same query text.
+    """
+    with _normalized_hashes_lock:
+        entry = _normalized_hashes.get(id(document))
+        if entry is not None and entry[0] is document:
+            _normalized_hashes.move_to_end(id(document))
+            return entry[1]
+    digest = query_hash(print_ast(document))
+    with _normalized_hashes_lock:
+        _normalized_hashes[id(document)] = (document, digest)
+        while len(_normalized_hashes) > max(settings.GRAPHQL_DOCUMENT_CACHE_SIZE, 1):
+            _normalized_hashes.popitem(last=False)
+    return digest
+
+def cacheable(request, operation_ast):
+    """Whether the operation's response may be served from ``response_cache``: queries by signed-in, non-superuser callers."""
+    user = request.user
+    return bool(settings.GRAPHQL_RESPONSE_CACHE_SECONDS) and operation_ast is not None and operation_ast.operation == OperationType.QUERY and user.is_authenticated and (not user.is_superuser)
+
+async def aresponse_key(request, document, operation_name, variables):
+    """The cache key for a response, or ``None`` when the caller's access-scope version cannot be read.
+
+    The version is the generation of the user and of every organization they
+    can see, read before the operation runs: a write committed meanwhile
+    bumps it, so the response is stored under a version no one asks for.
+    """
+    user = request.user
+    versions = await response_cache.agenerations(cache_scopes(user, await aaccessible_organization_ids(user)))
+    if versions is None:
+        return None
+    organization = getattr(request, 'organization', None)
+    variables = json.dumps(variables or {}, sort_keys=True, separators=(',', ':'), default=str)
+    digest = query_hash('\n'.join((normalized_hash(document), operation_name or '', variables, getattr(organization, 'slug', ''))))
+    return f"response:{digest}:user:{user.pk}:g{'.'.join(versions)}"
+
+async def aget_response(key):
+    """``{'body', 'etag'}`` cached under ``key``, or ``None``."""
+    entry = await response_cache.aget(key, scopes=[])
+    return entry if isinstance(entry, dict) else None
+
+async def astore_response(key, body):
+    """Cache ``body`` under ``key`` and return its ETag."""
+    etag = f'"{hashlib.sha256(body.encode()).hexdigest()}"'
+    await response_cache.aset(key, {'body': body, 'etag': etag}, settings.GRAPHQL_RESPONSE_CACHE_SECONDS, scopes=[])
+    return etag
+
+def etag_matches(request, etag):
+    """Whether ``If-None-Match`` already names ``etag``, compared weakly as RFC 9110 requires."""
+    etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+    return '*' in etags or etag in etags or f'W/{etag}' in etags
@@ -0,0 +1,145 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from cache import org_cache
+STICKY_COOKIE = 'pm_primary_until'
+PRIMARY_ONLY_APPS = {'sessions'}
+_routing_state = ContextVar('pm_routing_state', default=None)
+
+class RoutingState:
+    """Per-request routing flags; mutated in place so worker threads and the event loop share them.
+
+    ``replica`` is chosen on the first replica read and kept for the rest of
+    the scope, so one request never mixes replicas that lag by different
+    amounts. ``request``, when given, has its user checked for a recent write
+    once the user is known.
+    """
+
+    def __init__(self, pinned=False, request=None):
+        self.pinned = pinned
+        self.wrote = False
+        self.replica = None
+        self.request = request
+
+def sticky_key(user_id):
+    return f'primary_until:user:{user_id}'
+
+def mark_user_wrote(user_id):
+    """Keep ``user_id`` on the primary for ``DATABASE_REPLICA_STICKY_SECONDS``, from any client."""
+    org_cache.set(sticky_key(user_id), True, settings.DATABASE_REPLICA_STICKY_SECONDS, scopes=[])
+
+def check_user_stickiness(state):
+    """Pin ``state`` if its request's user wrote within the sticky window; the check is final once the user is authenticated."""
+    sticky = False
+    # The reads that resolve the user go to the primary.
+    state.pinned = True
+    try:
+        user = getattr(state.request, 'user', None)
+        if user is not None and user.is_authenticated:
+            state.request = None
+            sticky = org_cache.get(sticky_key(user.pk), scopes=[]) is not None
+    finally:
+        state.pinned = sticky
+
+@contextmanager
+def routing_scope(pinned=False, request=None):
+    """Let reads inside the block go to a replica unless ``pinned``, the block writes or ``request``'s user wrote recently."""
+    state = RoutingState(pinned, None if pinned else request)
+    token = _routing_state.set(state)
+    try:
+        yield state
+    finally:
+        _routing_state.reset(token)
+
+def pin_to_primary():
+    """Send every remaining read of the current scope to the primary."""
+    state = _routing_state.get()
+    if state is not None:
+        state.pinned = True
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside the block only."""
+    state = _routing_state.get()
+    if state is None or state.pinned:
+        yield
+        return
+    state.pinned = True
+    try:
+        yield
+    finally:
+        state.pinned = False
+
+def read_database():
+    """The alias a read in the current scope goes to, for querysets consumed after the scope has ended."""
+    replicas = settings.DATABASE_REPLICAS
+    state = _routing_state.get()
+    if not replicas or state is None or state.pinned or state.wrote or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+    if state.request is not None:
+        check_user_stickiness(state)
+        if state.pinned:
+            return DEFAULT_DB_ALIAS
+    if state.replica is None:
+        state.replica = random.choice(replicas)
+    return state.replica
+
+class ReplicaRouter:
+    """Route reads to ``DATABASE_REPLICAS`` and writes to the primary.
+
+    Only reads inside a ``routing_scope`` (opened per request by
+    ``ReplicaRoutingMiddleware``) use a replica; management commands, the shell
+    and WebSocket subscriptions keep reading the primary. A scope reads the
+    primary once it is pinned, once it has written, and inside any atomic block
+    on the primary, so a request always sees its own writes. Sessions are always
+    read from the primary so logins and logouts take effect immediately.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return read_database()
+
+    def db_for_write(self, model, **hints):
+        state = _routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+class ReplicaRoutingMiddleware:
+    """Open a routing scope per request and keep a user on the primary for a while after they write.
+
+    A write marks the user in ``org_cache`` and sets the ``pm_primary_until``
+    cookie; until they expire, after ``DATABASE_REPLICA_STICKY_SECONDS``, the
+    user's requests from any tab, device or API client, and the client's
+    requests before it authenticates, are pinned to the primary so replication
+    lag never hides their own writes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            sticky = float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            sticky = False
+        with routing_scope(pinned=sticky, request=request) as state:
+            response = self.get_response(request)
+        if state.wrote and settings.DATABASE_REPLICAS:
+            window = settings.DATABASE_REPLICA_STICKY_SECONDS
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                mark_user_wrote(user.pk)
+            response.set_cookie(STICKY_COOKIE, str(int(time.time() + window)), max_age=window, httponly=True, samesite='Lax')
+        return response
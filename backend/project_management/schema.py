@@ -1,18 +1,47 @@
 import graphene
+from collections import defaultdict
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
 from graphene_django import DjangoObjectType
 from graphene_django.filter import DjangoFilterConnectionField
 from django.contrib.auth.models import User
 from organizations.models import Organization
 from projects.models import Project
 from tasks.models import Task, TaskComment
+from cache import comment_cache, invalidate_scopes, org_cache, project_cache, task_cache
+from organizations.access import aaccessible_organization_ids, accessible_organization_ids, forget_accessible_organizations
+from .resolver_cache import cached_resolver
+from .pagination import KeysetConnectionField, build_connection
+from .loaders import BatchedFilterConnectionField, load_related, load_reverse
+from .optimizer import optimize_queryset
+from .autocomplete import autocomplete
+from .search import ranked_search
+from .subscriptions import comment_channel, comment_events, get_channel_layer, project_stats_channel, publish_on_commit, task_channel, task_events
+
+class OptimizedDjangoObjectType(DjangoObjectType):
+    """Object type whose connection and node querysets are narrowed to the selected fields."""
 
-class UserType(DjangoObjectType):
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def get_queryset(cls, queryset, info):
+        return optimize_queryset(queryset, info, cls)
+
+class UserType(OptimizedDjangoObjectType):
 
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 'date_joined')
 
-class OrganizationType(DjangoObjectType):
+class UserTypeConnection(graphene.relay.Connection):
+    """Connection for the root ``users`` field only; ``Organization.members`` stays a plain list."""
+
+    class Meta:
+        node = UserType
+
+class OrganizationType(OptimizedDjangoObjectType):
 
     class Meta:
         model = Organization
@@ -20,10 +49,14 @@ class OrganizationType(DjangoObjectType):
         filter_fields = {'name': ['exact', 'icontains', 'istartswith'], 'slug': ['exact'], 'contact_email': ['exact', 'icontains']}
         interfaces = (graphene.relay.Node,)
 
-class ProjectType(DjangoObjectType):
+class ProjectType(OptimizedDjangoObjectType):
+    organization = graphene.Field(OrganizationType, required=True)
+    created_by = graphene.Field(UserType)
+    tasks = BatchedFilterConnectionField(lambda: TaskType)
     task_count = graphene.Int()
     completed_tasks_count = graphene.Int()
     completion_rate = graphene.Float()
+    optimizer_columns = {'task_count': ('total_tasks_count',), 'completed_tasks_count': ('done_tasks_count',), 'completion_rate': ('total_tasks_count', 'done_tasks_count')}
 
     class Meta:
         model = Project
@@ -40,15 +73,38 @@ class ProjectType(DjangoObjectType):
     def resolve_completion_rate(self, info):
         return self.completion_rate
 
-class TaskType(DjangoObjectType):
+    def resolve_tasks(self, info, **kwargs):
+        return load_reverse(info, self, 'tasks', 'project_tasks', kwargs)
+
+    def resolve_organization(self, info):
+        return load_related(info, self, 'organization', 'organization')
+
+    def resolve_created_by(self, info):
+        return load_related(info, self, 'created_by', 'user')
+
+class TaskType(OptimizedDjangoObjectType):
+    project = graphene.Field(ProjectType, required=True)
+    created_by = graphene.Field(UserType)
+    comments = BatchedFilterConnectionField(lambda: TaskCommentType)
 
     class Meta:
         model = Task
         fields = '__all__'
-        filter_fields = {'title': ['exact', 'icontains', 'istartswith'], 'status': ['exact'], 'priority': ['exact'], 'project': ['exact'], 'project__organization': ['exact'], 'assignee_email': ['exact', 'icontains']}
+        filter_fields = {'title': ['exact', 'icontains', 'istartswith'], 'status': ['exact'], 'priority': ['exact'], 'project': ['exact'], 'project__organization': ['exact'], 'organization': ['exact'], 'assignee_email': ['exact', 'icontains']}
         interfaces = (graphene.relay.Node,)
 
-class TaskCommentType(DjangoObjectType):
+    def resolve_comments(self, info, **kwargs):
+        return load_reverse(info, self, 'comments', 'task_comments', kwargs)
+
+    def resolve_project(self, info):
+        return load_related(info, self, 'project', 'project')
+
+    def resolve_created_by(self, info):
+        return load_related(info, self, 'created_by', 'user')
+
+class TaskCommentType(OptimizedDjangoObjectType):
+    task = graphene.Field(TaskType, required=True)
+    created_by = graphene.Field(UserType)
 
     class Meta:
         model = TaskComment
@@ -56,41 +112,84 @@ class TaskCommentType(DjangoObjectType):
         filter_fields = {'task': ['exact'], 'author_email': ['exact', 'icontains']}
         interfaces = (graphene.relay.Node,)
 
+    def resolve_task(self, info):
+        return load_related(info, self, 'task', 'task')
+
+    def resolve_created_by(self, info):
+        return load_related(info, self, 'created_by', 'user')
+
+class SearchEntity(graphene.Enum):
+    ORGANIZATION = 'organization'
+    PROJECT = 'project'
+    TASK = 'task'
+    COMMENT = 'comment'
+SEARCH_TYPES = {'organization': OrganizationType, 'project': ProjectType, 'task': TaskType, 'comment': TaskCommentType}
+
+class SearchResult(graphene.Union):
+
+    class Meta:
+        types = tuple(SEARCH_TYPES.values())
+
+class SearchResultConnection(graphene.relay.Connection):
+
+    class Meta:
+        node = SearchResult
+
+    class Edge:
+        rank = graphene.Float()
+
+        def resolve_rank(self, info):
+            return self.node.search_rank
+
+class AutocompleteEntity(graphene.Enum):
+    ORGANIZATION = 'organization'
+    PROJECT = 'project'
+    TASK = 'task'
+    ASSIGNEE = 'assignee'
+AUTOCOMPLETE_TYPES = {'organization': OrganizationType, 'project': ProjectType, 'task': TaskType}
+
+class AutocompleteSuggestion(graphene.ObjectType):
+    id = graphene.ID()
+    value = graphene.String(required=True)
+    updated_at = graphene.DateTime(required=True)
+
 class Query(graphene.ObjectType):
     node = graphene.relay.Node.Field()
     me = graphene.Field(UserType)
-    users = graphene.List(UserType)
+    users = KeysetConnectionField(UserType, connection_type=UserTypeConnection)
     organization = graphene.Field(OrganizationType, slug=graphene.String())
-    organizations = graphene.List(OrganizationType)
-    my_organizations = graphene.List(OrganizationType)
-    organizations_with_stats = graphene.List(OrganizationType)
-    search_organizations = graphene.List(OrganizationType, query=graphene.String())
+    organizations = KeysetConnectionField(OrganizationType)
+    my_organizations = KeysetConnectionField(OrganizationType)
+    organizations_with_stats = KeysetConnectionField(OrganizationType)
+    search_organizations = KeysetConnectionField(OrganizationType, query=graphene.String())
     project = graphene.relay.Node.Field(ProjectType)
     projects = DjangoFilterConnectionField(ProjectType)
-    projects_by_organization = graphene.List(ProjectType, organization_slug=graphene.String())
-    my_projects = graphene.List(ProjectType)
-    projects_with_stats = graphene.List(ProjectType)
-    search_projects = graphene.List(ProjectType, query=graphene.String())
-    projects_by_status = graphene.List(ProjectType, status=graphene.String())
-    projects_due_soon = graphene.List(ProjectType, days=graphene.Int())
+    projects_by_organization = KeysetConnectionField(ProjectType, organization_slug=graphene.String())
+    my_projects = KeysetConnectionField(ProjectType)
+    projects_with_stats = KeysetConnectionField(ProjectType)
+    search_projects = KeysetConnectionField(ProjectType, query=graphene.String())
+    projects_by_status = KeysetConnectionField(ProjectType, status=graphene.String())
+    projects_due_soon = KeysetConnectionField(ProjectType, days=graphene.Int())
     task = graphene.relay.Node.Field(TaskType)
     tasks = DjangoFilterConnectionField(TaskType)
-    tasks_by_project = graphene.List(TaskType, project_id=graphene.ID())
-    my_tasks = graphene.List(TaskType)
-    tasks_by_status = graphene.List(TaskType, status=graphene.String())
-    tasks_by_priority = graphene.List(TaskType, priority=graphene.String())
-    tasks_by_assignee = graphene.List(TaskType, email=graphene.String())
-    overdue_tasks = graphene.List(TaskType)
-    tasks_due_soon = graphene.List(TaskType, days=graphene.Int())
-    high_priority_tasks = graphene.List(TaskType)
-    search_tasks = graphene.List(TaskType, query=graphene.String())
-    tasks_with_comment_count = graphene.List(TaskType)
+    tasks_by_project = KeysetConnectionField(TaskType, project_id=graphene.ID())
+    my_tasks = KeysetConnectionField(TaskType)
+    tasks_by_status = KeysetConnectionField(TaskType, status=graphene.String())
+    tasks_by_priority = KeysetConnectionField(TaskType, priority=graphene.String())
+    tasks_by_assignee = KeysetConnectionField(TaskType, email=graphene.String())
+    overdue_tasks = KeysetConnectionField(TaskType)
+    tasks_due_soon = KeysetConnectionField(TaskType, days=graphene.Int())
+    high_priority_tasks = KeysetConnectionField(TaskType)
+    search_tasks = KeysetConnectionField(TaskType, query=graphene.String())
+    tasks_with_comment_count = KeysetConnectionField(TaskType)
     task_comment = graphene.relay.Node.Field(TaskCommentType)
     task_comments = DjangoFilterConnectionField(TaskCommentType)
-    comments_by_task = graphene.List(TaskCommentType, task_id=graphene.ID())
-    recent_comments = graphene.List(TaskCommentType, days=graphene.Int())
-    comments_by_author = graphene.List(TaskCommentType, email=graphene.String())
-    search_comments = graphene.List(TaskCommentType, query=graphene.String())
+    comments_by_task = KeysetConnectionField(TaskCommentType, task_id=graphene.ID())
+    recent_comments = KeysetConnectionField(TaskCommentType, days=graphene.Int())
+    comments_by_author = KeysetConnectionField(TaskCommentType, email=graphene.String())
+    search_comments = KeysetConnectionField(TaskCommentType, query=graphene.String())
+    search = graphene.Field(SearchResultConnection, query=graphene.String(required=True), entities=graphene.List(graphene.NonNull(SearchEntity)), first=graphene.Int(), after=graphene.String())
+    autocomplete = graphene.List(graphene.NonNull(AutocompleteSuggestion), required=True, entity=AutocompleteEntity(required=True), prefix=graphene.String(required=True), limit=graphene.Int(default_value=10), organization_id=graphene.ID())
 
     def resolve_me(self, info):
         user = info.context.user
@@ -98,7 +197,7 @@ class Query(graphene.ObjectType):
             raise Exception('Not logged in!')
         return user
 
-    def resolve_users(self, info):
+    def resolve_users(self, info, **kwargs):
         user = info.context.user
         if user.is_anonymous or not user.is_superuser:
             raise Exception('Permission denied!')
@@ -116,7 +215,7 @@ class Query(graphene.ObjectType):
         except Organization.DoesNotExist:
             return None
 
-    def resolve_organizations(self, info):
+    def resolve_organizations(self, info, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
@@ -124,13 +223,14 @@ class Query(graphene.ObjectType):
             return Organization.objects.all()
         return Organization.objects.for_user(user)
 
-    def resolve_my_organizations(self, info):
+    @cached_resolver(org_cache, Organization)
+    def resolve_my_organizations(self, info, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
         return Organization.objects.for_user(user)
 
-    def resolve_projects_by_organization(self, info, organization_slug):
+    def resolve_projects_by_organization(self, info, organization_slug, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
@@ -140,15 +240,19 @@ class Query(graphene.ObjectType):
                 raise Exception('Permission denied!')
             return Project.objects.for_organization(organization)
         except Organization.DoesNotExist:
-            return []
+            return Project.objects.none()
 
-    def resolve_my_projects(self, info):
+    @cached_resolver(project_cache, Project)
+    async def resolve_my_projects(self, info, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
+        # Resolve the access set with the async ORM so the manager's scoping filter
+        # reads the per-request memo instead of querying on the event loop.
+        await aaccessible_organization_ids(user)
         return Project.objects.for_user(user)
 
-    def resolve_tasks_by_project(self, info, project_id):
+    def resolve_tasks_by_project(self, info, project_id, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
@@ -158,15 +262,17 @@ class Query(graphene.ObjectType):
                 raise Exception('Permission denied!')
             return Task.objects.for_project(project)
         except Project.DoesNotExist:
-            return []
+            return Task.objects.none()
 
-    def resolve_my_tasks(self, info):
+    @cached_resolver(task_cache, Task)
+    async def resolve_my_tasks(self, info, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
+        await aaccessible_organization_ids(user)
         return Task.objects.for_user(user)
 
-    def resolve_comments_by_task(self, info, task_id):
+    def resolve_comments_by_task(self, info, task_id, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
@@ -176,110 +282,147 @@ class Query(graphene.ObjectType):
                 raise Exception('Permission denied!')
             return TaskComment.objects.for_task(task)
         except Task.DoesNotExist:
-            return []
+            return TaskComment.objects.none()
 
-    def resolve_organizations_with_stats(self, info):
+    @cached_resolver(org_cache, Organization)
+    async def resolve_organizations_with_stats(self, info, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
+        await aaccessible_organization_ids(user)
         return Organization.objects.with_stats(user)
 
-    def resolve_search_organizations(self, info, query):
+    async def resolve_search_organizations(self, info, query, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
+        await aaccessible_organization_ids(user)
         return Organization.objects.search(query, user)
 
-    def resolve_projects_with_stats(self, info):
+    @cached_resolver(project_cache, Project, annotations=('overdue_tasks_count',))
+    def resolve_projects_with_stats(self, info, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
         return Project.objects.with_task_stats(user)
 
-    def resolve_search_projects(self, info, query):
+    async def resolve_search_projects(self, info, query, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
+        await aaccessible_organization_ids(user)
         return Project.objects.search(query, user)
 
-    def resolve_projects_by_status(self, info, status):
+    @cached_resolver(project_cache, Project)
+    def resolve_projects_by_status(self, info, status, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
         return Project.objects.by_status(status, user)
 
-    def resolve_projects_due_soon(self, info, days=7):
+    @cached_resolver(project_cache, Project)
+    def resolve_projects_due_soon(self, info, days=7, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
         return Project.objects.due_soon(days, user)
 
-    def resolve_tasks_by_status(self, info, status):
+    @cached_resolver(task_cache, Task)
+    def resolve_tasks_by_status(self, info, status, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
         return Task.objects.by_status(status, user)
 
-    def resolve_tasks_by_priority(self, info, priority):
+    @cached_resolver(task_cache, Task)
+    def resolve_tasks_by_priority(self, info, priority, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
         return Task.objects.by_priority(priority, user)
 
-    def resolve_tasks_by_assignee(self, info, email):
+    @cached_resolver(task_cache, Task)
+    def resolve_tasks_by_assignee(self, info, email, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
         return Task.objects.by_assignee(email, user)
 
-    def resolve_overdue_tasks(self, info):
+    @cached_resolver(task_cache, Task)
+    def resolve_overdue_tasks(self, info, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
         return Task.objects.overdue(user)
 
-    def resolve_tasks_due_soon(self, info, days=3):
+    @cached_resolver(task_cache, Task)
+    def resolve_tasks_due_soon(self, info, days=3, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
         return Task.objects.due_soon(days, user)
 
-    def resolve_high_priority_tasks(self, info):
+    @cached_resolver(task_cache, Task)
+    def resolve_high_priority_tasks(self, info, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
         return Task.objects.high_priority(user)
 
-    def resolve_search_tasks(self, info, query):
+    async def resolve_search_tasks(self, info, query, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
+        await aaccessible_organization_ids(user)
         return Task.objects.search(query, user)
 
-    def resolve_tasks_with_comment_count(self, info):
+    @cached_resolver(task_cache, Task, annotations=('comment_count',))
+    def resolve_tasks_with_comment_count(self, info, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
         return Task.objects.with_comment_count(user)
 
-    def resolve_recent_comments(self, info, days=7):
+    @cached_resolver(comment_cache, TaskComment)
+    def resolve_recent_comments(self, info, days=7, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
         return TaskComment.objects.recent(days, user)
 
-    def resolve_comments_by_author(self, info, email):
+    @cached_resolver(comment_cache, TaskComment)
+    def resolve_comments_by_author(self, info, email, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
         return TaskComment.objects.by_author(email, user)
 
-    def resolve_search_comments(self, info, query):
+    async def resolve_search_comments(self, info, query, **kwargs):
         user = info.context.user
         if user.is_anonymous:
             raise Exception('Not logged in!')
+        await aaccessible_organization_ids(user)
         return TaskComment.objects.search(query, user)
 
+    def resolve_search(self, info, query, entities=None, first=None, after=None):
+        user = info.context.user
+        if user.is_anonymous:
+            raise Exception('Not logged in!')
+        organization_ids = None if user.is_superuser else accessible_organization_ids(user)
+        querysets = {entity: graphene_type.get_queryset(graphene_type._meta.model.objects.all(), info) for entity, graphene_type in SEARCH_TYPES.items()}
+        return build_connection(SearchResultConnection, ranked_search(query, organization_ids, [entity.value for entity in entities or ()], first, after, querysets))
+
+    def resolve_autocomplete(self, info, entity, prefix, limit, organization_id=None):
+        user = info.context.user
+        if user.is_anonymous:
+            raise Exception('Not logged in!')
+        organization_ids = None if user.is_superuser else accessible_organization_ids(user)
+        if organization_id is not None:
+            organization_id = parse_pk(organization_id)
+            organization_ids = [organization_id] if organization_ids is None or organization_id in organization_ids else []
+        graphene_type = AUTOCOMPLETE_TYPES.get(entity.value)
+        return [AutocompleteSuggestion(id=None if graphene_type is None else graphene.relay.Node.to_global_id(graphene_type._meta.name, pk), value=value, updated_at=updated_at) for pk, value, updated_at in autocomplete(entity.value, prefix, organization_ids, limit)]
+
 class OrganizationInput(graphene.InputObjectType):
     name = graphene.String(required=True)
     slug = graphene.String()
@@ -306,6 +449,43 @@ class TaskCommentInput(graphene.InputObjectType):
     author_email = graphene.String(required=True)
     task_id = graphene.ID(required=True)
 
+class BulkTaskUpdateInput(graphene.InputObjectType):
+    id = graphene.ID(required=True)
+    status = graphene.String()
+    priority = graphene.String()
+    assignee_email = graphene.String()
+    due_date = graphene.types.datetime.DateTime()
+
+class BulkItemError(graphene.ObjectType):
+    index = graphene.Int(required=True)
+    message = graphene.String(required=True)
+BULK_MUTATION_MAX_ITEMS = 500
+BULK_UPDATE_FIELDS = ('status', 'priority', 'assignee_email', 'due_date')
+
+def check_bulk_size(items):
+    if len(items) > BULK_MUTATION_MAX_ITEMS:
+        raise Exception(f'Bulk mutations accept at most {BULK_MUTATION_MAX_ITEMS} items!')
+
+def parse_pk(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def can_write(user, organization_id):
+    return user.is_superuser or organization_id in accessible_organization_ids(user)
+
+def validation_message(error):
+    return '; '.join((f'{field}: {message}' for field, messages in error.message_dict.items() for message in messages))
+
+def apply_task_counter_deltas(projects, deltas_by_project):
+    for project_id, deltas in deltas_by_project.items():
+        Project.objects.adjust_task_counters(project_id, projects[project_id].organization_id, deltas)
+
+def add_counter_deltas(deltas, old_counters, new_counters):
+    for field in set(old_counters) | set(new_counters):
+        deltas[field] += new_counters.get(field, 0) - old_counters.get(field, 0)
+
 class CreateOrganization(graphene.Mutation):
 
     class Arguments:
@@ -404,6 +584,7 @@ class CreateTask(graphene.Mutation):
         except Project.DoesNotExist:
             raise Exception('Project not found!')
         task = Task.objects.create(title=input.title, description=input.description or '', status=input.status or 'TODO', priority=input.priority or 'MEDIUM', assignee_email=input.assignee_email or '', due_date=input.due_date, project=project, created_by=user)
+        publish_on_commit(task_events([task], 'CREATED'))
         return CreateTask(task=task)
 
 class UpdateTask(graphene.Mutation):
@@ -430,6 +611,7 @@ class UpdateTask(graphene.Mutation):
         task.assignee_email = input.assignee_email or task.assignee_email
         task.due_date = input.due_date or task.due_date
         task.save()
+        publish_on_commit(task_events([task], 'UPDATED'))
         return UpdateTask(task=task)
 
 class AddTaskComment(graphene.Mutation):
@@ -449,8 +631,140 @@ class AddTaskComment(graphene.Mutation):
         except Task.DoesNotExist:
             raise Exception('Task not found!')
         comment = TaskComment.objects.create(content=input.content, author_email=input.author_email, task=task, created_by=user)
+        publish_on_commit(comment_events([comment]))
         return AddTaskComment(comment=comment)
 
+class BulkCreateTasks(graphene.Mutation):
+
+    class Arguments:
+        input = graphene.List(graphene.NonNull(TaskInput), required=True)
+    tasks = graphene.List(TaskType)
+    errors = graphene.List(BulkItemError)
+
+    def mutate(self, info, input):
+        user = info.context.user
+        if user.is_anonymous:
+            raise Exception('Not logged in!')
+        check_bulk_size(input)
+        projects = Project._base_manager.in_bulk({pk for pk in (parse_pk(item.project_id) for item in input) if pk is not None})
+        errors = []
+        tasks = []
+        for index, item in enumerate(input):
+            project = projects.get(parse_pk(item.project_id))
+            if project is None:
+                errors.append(BulkItemError(index=index, message='Project not found!'))
+                continue
+            if not can_write(user, project.organization_id):
+                errors.append(BulkItemError(index=index, message='Permission denied!'))
+                continue
+            task = Task(title=item.title, description=item.description or '', status=item.status or 'TODO', priority=item.priority or 'MEDIUM', assignee_email=item.assignee_email or '', due_date=item.due_date, project=project, organization_id=project.organization_id, created_by=user)
+            try:
+                task.clean_fields(exclude=['project', 'organization', 'created_by'])
+            except ValidationError as e:
+                errors.append(BulkItemError(index=index, message=validation_message(e)))
+                continue
+            tasks.append(task)
+        deltas_by_project = defaultdict(lambda: defaultdict(int))
+        for task in tasks:
+            add_counter_deltas(deltas_by_project[task.project_id], {}, Task.counter_values(task.status, task.due_date))
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks)
+            apply_task_counter_deltas(projects, deltas_by_project)
+            invalidate_scopes(organization_ids={projects[pk].organization_id for pk in deltas_by_project}, project_ids=list(deltas_by_project), task_ids=[task.pk for task in tasks if task.pk])
+            publish_on_commit(task_events([task for task in tasks if task.pk], 'CREATED'))
+        return BulkCreateTasks(tasks=tasks, errors=errors)
+
+class BulkUpdateTasks(graphene.Mutation):
+
+    class Arguments:
+        input = graphene.List(graphene.NonNull(BulkTaskUpdateInput), required=True)
+    tasks = graphene.List(TaskType)
+    errors = graphene.List(BulkItemError)
+
+    def mutate(self, info, input):
+        user = info.context.user
+        if user.is_anonymous:
+            raise Exception('Not logged in!')
+        check_bulk_size(input)
+        errors = []
+        with transaction.atomic():
+            existing = Task._base_manager.select_for_update().select_related('project').in_bulk({pk for pk in (parse_pk(item.id) for item in input) if pk is not None})
+            projects = {task.project_id: task.project for task in existing.values()}
+            updated = {}
+            original_counters = {}
+            fields = set()
+            for index, item in enumerate(input):
+                task = existing.get(parse_pk(item.id))
+                if task is None:
+                    errors.append(BulkItemError(index=index, message='Task not found!'))
+                    continue
+                if not can_write(user, task.organization_id):
+                    errors.append(BulkItemError(index=index, message='Permission denied!'))
+                    continue
+                previous = {field: getattr(task, field) for field in BULK_UPDATE_FIELDS}
+                changes = {field: item[field] for field in BULK_UPDATE_FIELDS if item.get(field) is not None}
+                for field, value in changes.items():
+                    setattr(task, field, value)
+                try:
+                    task.clean_fields(exclude=['project', 'organization', 'created_by'])
+                except ValidationError as e:
+                    for field, value in previous.items():
+                        setattr(task, field, value)
+                    errors.append(BulkItemError(index=index, message=validation_message(e)))
+                    continue
+                original_counters.setdefault(task.pk, Task.counter_values(previous['status'], previous['due_date']))
+                task.updated_at = timezone.now()
+                fields.update(changes)
+                updated[task.pk] = task
+            if fields:
+                Task.objects.bulk_update(updated.values(), [*sorted(fields), 'updated_at'])
+            deltas_by_project = defaultdict(lambda: defaultdict(int))
+            for task in updated.values():
+                add_counter_deltas(deltas_by_project[task.project_id], original_counters[task.pk], Task.counter_values(task.status, task.due_date))
+                task._original_counters = Task.counter_values(task.status, task.due_date)
+            apply_task_counter_deltas(projects, deltas_by_project)
+            touched_projects = {task.project_id for task in updated.values()}
+            invalidate_scopes(organization_ids={task.organization_id for task in updated.values()}, project_ids=touched_projects, task_ids=list(updated))
+            publish_on_commit(task_events(updated.values(), 'UPDATED'))
+        return BulkUpdateTasks(tasks=list(updated.values()), errors=errors)
+
+class BulkAddTaskComments(graphene.Mutation):
+
+    class Arguments:
+        input = graphene.List(graphene.NonNull(TaskCommentInput), required=True)
+    comments = graphene.List(TaskCommentType)
+    errors = graphene.List(BulkItemError)
+
+    def mutate(self, info, input):
+        user = info.context.user
+        if user.is_anonymous:
+            raise Exception('Not logged in!')
+        check_bulk_size(input)
+        tasks = Task._base_manager.in_bulk({pk for pk in (parse_pk(item.task_id) for item in input) if pk is not None})
+        errors = []
+        comments = []
+        for index, item in enumerate(input):
+            task = tasks.get(parse_pk(item.task_id))
+            if task is None:
+                errors.append(BulkItemError(index=index, message='Task not found!'))
+                continue
+            if not can_write(user, task.organization_id):
+                errors.append(BulkItemError(index=index, message='Permission denied!'))
+                continue
+            comment = TaskComment(content=item.content, author_email=item.author_email, task=task, organization_id=task.organization_id, created_by=user)
+            try:
+                comment.clean_fields(exclude=['task', 'organization', 'created_by'])
+            except ValidationError as e:
+                errors.append(BulkItemError(index=index, message=validation_message(e)))
+                continue
+            comments.append(comment)
+        with transaction.atomic():
+            TaskComment.objects.bulk_create(comments)
+            commented = {comment.task_id: comment.task for comment in comments}
+            invalidate_scopes(organization_ids={task.organization_id for task in commented.values()}, project_ids={task.project_id for task in commented.values()}, task_ids=list(commented))
+            publish_on_commit(comment_events([comment for comment in comments if comment.pk]))
+        return BulkAddTaskComments(comments=comments, errors=errors)
+
 class Mutation(graphene.ObjectType):
     create_organization = CreateOrganization.Field()
     update_organization = UpdateOrganization.Field()
@@ -459,4 +773,57 @@ class Mutation(graphene.ObjectType):
     create_task = CreateTask.Field()
     update_task = UpdateTask.Field()
     add_task_comment = AddTaskComment.Field()
-schema = graphene.Schema(query=Query, mutation=Mutation)
\ No newline at end of file
+    bulk_create_tasks = BulkCreateTasks.Field()
+    bulk_update_tasks = BulkUpdateTasks.Field()
+    bulk_add_task_comments = BulkAddTaskComments.Field()
+
+class TaskChangedEvent(graphene.ObjectType):
+    action = graphene.String()
+    task = graphene.Field(TaskType)
+
+async def can_subscribe(user, organization_id, recheck=False):
+    """Whether ``user`` may follow ``organization_id``; ``recheck`` drops the ids memoised on the connection's user, which outlives membership changes."""
+    if user.is_anonymous:
+        raise Exception('Not logged in!')
+    if recheck:
+        forget_accessible_organizations(user)
+    return user.is_superuser or organization_id in await aaccessible_organization_ids(user)
+
+class Subscription(graphene.ObjectType):
+    task_changed = graphene.Field(TaskChangedEvent, project_id=graphene.ID(required=True))
+    comment_added = graphene.Field(TaskCommentType, task_id=graphene.ID(required=True))
+    project_stats_changed = graphene.Field(ProjectType, organization_id=graphene.ID(required=True))
+
+    async def subscribe_task_changed(root, info, project_id):
+        project = await Project._base_manager.filter(pk=parse_pk(project_id)).afirst()
+        if project is None or not await can_subscribe(info.context.user, project.organization_id):
+            raise Exception('Permission denied!')
+        async for event in get_channel_layer().subscribe(task_channel(project.organization_id, project.pk)):
+            if not await can_subscribe(info.context.user, project.organization_id, recheck=True):
+                raise Exception('Permission denied!')
+            task = await Task._base_manager.filter(pk=event['id']).afirst()
+            if task is not None:
+                yield TaskChangedEvent(action=event['action'], task=task)
+
+    async def subscribe_comment_added(root, info, task_id):
+        task = await Task._base_manager.filter(pk=parse_pk(task_id)).afirst()
+        if task is None or not await can_subscribe(info.context.user, task.organization_id):
+            raise Exception('Permission denied!')
+        async for event in get_channel_layer().subscribe(comment_channel(task.organization_id, task.pk)):
+            if not await can_subscribe(info.context.user, task.organization_id, recheck=True):
+                raise Exception('Permission denied!')
+            comment = await TaskComment._base_manager.filter(pk=event['id']).afirst()
+            if comment is not None:
+                yield comment
+
+    async def subscribe_project_stats_changed(root, info, organization_id):
+        organization_id = parse_pk(organization_id)
+        if organization_id is None or not await can_subscribe(info.context.user, organization_id):
+            raise Exception('Permission denied!')
+        async for event in get_channel_layer().subscribe(project_stats_channel(organization_id)):
+            if not await can_subscribe(info.context.user, organization_id, recheck=True):
+                raise Exception('Permission denied!')
+            project = await Project._base_manager.filter(pk=event['id']).afirst()
+            if project is not None:
+                yield project
+schema = graphene.Schema(query=Query, mutation=Mutation, subscription=Subscription)
\ No newline at end of file
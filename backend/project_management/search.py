@@ -0,0 +1,216 @@
+import re
+from django.apps import apps
+from django.db import connections
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+from .pagination import Page, decode_cursor, page_size
+from .routers import read_database
+SEARCH_TABLE = 'search_index'
+# A row's key is ``object_id * 4 + entity code``: FTS5 tables only index their
+# rowid, so one integer has to identify the row on both backends.
+KEY_SPACE = 4
+WEIGHTS = ('A', 'B', 'C')
+SEARCH_ORDERING = [('search_rank', True), ('search_key', True)]
+
+class SearchDocument:
+    """How rows of one model are indexed: which columns go into which weight class, and which organization they belong to.
+
+    ``identifiers`` are columns such as emails that are split on ``@`` and
+    ``.`` before indexing, so a search for ``alice`` finds ``alice@example.com``.
+    """
+
+    def __init__(self, code, model, organization, weights, identifiers=()):
+        self.code = code
+        self.label = model
+        self.organization = organization
+        self.weights = weights
+        self.identifiers = identifiers
+
+    @property
+    def model(self):
+        return apps.get_model(self.label)
+
+    @property
+    def table(self):
+        return self.model._meta.db_table
+
+    @property
+    def columns(self):
+        return [column for weight in WEIGHTS for column in self.weights.get(weight, ())]
+SEARCH_DOCUMENTS = {'organization': SearchDocument(0, 'organizations.Organization', 'id', {'A': ('name', 'slug'), 'B': ('contact_email',)}, identifiers=('contact_email',)), 'project': SearchDocument(1, 'projects.Project', 'organization_id', {'A': ('name',), 'B': ('description',)}), 'task': SearchDocument(2, 'tasks.Task', 'organization_id', {'A': ('title',), 'B': ('assignee_email',), 'C': ('description',)}, identifiers=('assignee_email',)), 'comment': SearchDocument(3, 'tasks.TaskComment', 'organization_id', {'B': ('content',), 'C': ('author_email',)}, identifiers=('author_email',))}
+
+class PostgresSearchBackend:
+    """``tsvector`` documents with per-class weights in a GIN-indexed table, ranked with ``ts_rank``."""
+    config = 'english'
+
+    def install(self, cursor):
+        cursor.execute(f'CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} (key bigint PRIMARY KEY, organization_id bigint NOT NULL, document tsvector NOT NULL)')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document ON {SEARCH_TABLE} USING gin (document)')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_organization ON {SEARCH_TABLE} (organization_id)')
+        for document in SEARCH_DOCUMENTS.values():
+            function = f'{SEARCH_TABLE}_{document.table}'
+            cursor.execute(f"CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$\nBEGIN\n    IF TG_OP = 'DELETE' THEN\n        DELETE FROM {SEARCH_TABLE} WHERE key = OLD.id * {KEY_SPACE} + {document.code};\n        RETURN OLD;\n    END IF;\n    INSERT INTO {SEARCH_TABLE} (key, organization_id, document) VALUES (NEW.id * {KEY_SPACE} + {document.code}, NEW.{document.organization}, {self.document_sql(document, 'NEW')})\n    ON CONFLICT (key) DO UPDATE SET organization_id = EXCLUDED.organization_id, document = EXCLUDED.document;\n    RETURN NEW;\nEND\n$$ LANGUAGE plpgsql")
+            cursor.execute(f'DROP TRIGGER IF EXISTS {function} ON {document.table}')
+            cursor.execute(f"CREATE TRIGGER {function} AFTER INSERT OR DELETE OR UPDATE OF {', '.join(dict.fromkeys([*document.columns, document.organization]))} ON {document.table} FOR EACH ROW EXECUTE FUNCTION {function}()")
+
+    def uninstall(self, cursor):
+        for document in SEARCH_DOCUMENTS.values():
+            cursor.execute(f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_{document.table} ON {document.table}')
+            cursor.execute(f'DROP FUNCTION IF EXISTS {SEARCH_TABLE}_{document.table}()')
+        cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+    def rebuild(self, cursor):
+        cursor.execute(f'TRUNCATE {SEARCH_TABLE}')
+        for document in SEARCH_DOCUMENTS.values():
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE} (key, organization_id, document) SELECT source.id * {KEY_SPACE} + {document.code}, source.{document.organization}, {self.document_sql(document, 'source')} FROM {document.table} source")
+
+    def document_sql(self, document, row):
+        parts = []
+        for weight in WEIGHTS:
+            columns = [f"translate({row}.{column}, '@.', '  ')" if column in document.identifiers else f'{row}.{column}' for column in document.weights.get(weight, ())]
+            if columns:
+                parts.append(f"setweight(to_tsvector('{self.config}', concat_ws(' ', {', '.join(columns)})), '{weight}')")
+        return ' || '.join(parts)
+
+    def search_terms(self, query):
+        return query if query.strip() else None
+
+    def match_sql(self, terms):
+        """``(sql, params)`` selecting ``key``, ``organization_id`` and ``rank`` of every indexed row matching ``terms``."""
+        return (f"SELECT key, organization_id, ts_rank(document, query)::float8 AS rank FROM {SEARCH_TABLE}, websearch_to_tsquery('{self.config}', %s) query WHERE document @@ query", [terms])
+
+    def rank_sql(self, terms, key):
+        """``(sql, params)`` for the rank of the row with ``key`` (an SQL expression)."""
+        return (f"SELECT ts_rank(document, websearch_to_tsquery('{self.config}', %s))::float8 FROM {SEARCH_TABLE} WHERE key = {key}", [terms])
+
+class SQLiteSearchBackend:
+    """An FTS5 table with one column per weight class, ranked with ``bm25`` weighted like ``ts_rank``'s defaults."""
+    rank = f"-bm25({SEARCH_TABLE}, 0, 1.0, 0.4, 0.2)"
+
+    def install(self, cursor):
+        cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(organization_id UNINDEXED, {', '.join((weight.lower() for weight in WEIGHTS))}, tokenize='porter unicode61')")
+        for document in SEARCH_DOCUMENTS.values():
+            trigger = f'{SEARCH_TABLE}_{document.table}'
+            delete = f'DELETE FROM {SEARCH_TABLE} WHERE rowid = OLD.id * {KEY_SPACE} + {document.code};'
+            insert = f"INSERT INTO {SEARCH_TABLE} (rowid, organization_id, {', '.join((weight.lower() for weight in WEIGHTS))}) VALUES (NEW.id * {KEY_SPACE} + {document.code}, NEW.{document.organization}, {self.document_sql(document, 'NEW')});"
+            for name in ('insert', 'update', 'delete'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}_{name}')
+            cursor.execute(f'CREATE TRIGGER {trigger}_insert AFTER INSERT ON {document.table} BEGIN {insert} END')
+            cursor.execute(f"CREATE TRIGGER {trigger}_update AFTER UPDATE OF {', '.join(dict.fromkeys([*document.columns, document.organization]))} ON {document.table} BEGIN {delete} {insert} END")
+            cursor.execute(f'CREATE TRIGGER {trigger}_delete AFTER DELETE ON {document.table} BEGIN {delete} END')
+
+    def uninstall(self, cursor):
+        for document in SEARCH_DOCUMENTS.values():
+            for name in ('insert', 'update', 'delete'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_{document.table}_{name}')
+        cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+    def rebuild(self, cursor):
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        for document in SEARCH_DOCUMENTS.values():
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE} (rowid, organization_id, {', '.join((weight.lower() for weight in WEIGHTS))}) SELECT source.id * {KEY_SPACE} + {document.code}, source.{document.organization}, {self.document_sql(document, 'source')} FROM {document.table} source")
+
+    def document_sql(self, document, row):
+        # unicode61 already splits identifiers on punctuation.
+        return ', '.join((" || ' ' || ".join((f"coalesce({row}.{column}, '')" for column in document.weights.get(weight, ()))) or "''" for weight in WEIGHTS))
+
+    def search_terms(self, query):
+        """An FTS5 query requiring every word of ``query``, with its syntax characters stripped."""
+        words = re.findall('\\w+', query)
+        return ' '.join((f'"{word}"' for word in words)) if words else None
+
+    def match_sql(self, terms):
+        return (f'SELECT rowid AS key, organization_id, {self.rank} AS rank FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s', [terms])
+
+    def rank_sql(self, terms, key):
+        return (f'SELECT {self.rank} FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s AND rowid = {key}', [terms])
+BACKENDS = {'postgresql': PostgresSearchBackend(), 'sqlite': SQLiteSearchBackend()}
+
+def get_search_backend(connection):
+    try:
+        return BACKENDS[connection.vendor]
+    except KeyError:
+        raise Exception(f'Full-text search is not supported on {connection.vendor}')
+
+def install_search_index(apps, schema_editor):
+    """Create (or recreate) the search table and its triggers, then index every existing row."""
+    backend = get_search_backend(schema_editor.connection)
+    with schema_editor.connection.cursor() as cursor:
+        backend.install(cursor)
+        backend.rebuild(cursor)
+
+def uninstall_search_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        get_search_backend(schema_editor.connection).uninstall(cursor)
+
+def matching_sql(backend, terms, codes, organization_ids):
+    sql, params = backend.match_sql(terms)
+    sql = f"SELECT key, rank FROM ({sql}) matches WHERE key %% {KEY_SPACE} IN ({', '.join(map(str, codes))})"
+    if organization_ids is not None:
+        # An empty IN list is a syntax error, and -1 is never an id.
+        ids = list(organization_ids) or [-1]
+        sql += f" AND organization_id IN ({', '.join(['%s'] * len(ids))})"
+        params = [*params, *ids]
+    return (sql, params)
+
+def search_queryset(queryset, query, organization_ids=None):
+    """``queryset`` narrowed to rows matching ``query`` and ordered by rank, best first.
+
+    The rank is annotated as ``search_rank``, which keyset pagination accepts
+    as an ordering column. ``organization_ids`` limits the index scan to those
+    tenants; the caller's queryset is still what decides access.
+    """
+    model = queryset.model
+    document = next((document for document in SEARCH_DOCUMENTS.values() if document.label == model._meta.label))
+    backend = get_search_backend(connections[queryset.db])
+    terms = backend.search_terms(query)
+    if terms is None:
+        return queryset.none()
+    sql, params = matching_sql(backend, terms, [document.code], organization_ids)
+    key = f'{connections[queryset.db].ops.quote_name(model._meta.db_table)}.{connections[queryset.db].ops.quote_name(model._meta.pk.column)} * {KEY_SPACE} + {document.code}'
+    rank_sql, rank_params = backend.rank_sql(terms, key)
+    queryset = queryset.filter(pk__in=RawSQL(f'SELECT key / {KEY_SPACE} FROM ({sql}) hits', params))
+    return queryset.annotate(search_rank=RawSQL(rank_sql, rank_params, output_field=FloatField())).order_by('-search_rank')
+
+def ranked_search(query, organization_ids=None, entities=None, first=None, after=None, querysets=None, using=None):
+    """A ``Page`` of the best matches for ``query`` across organizations, projects, tasks and comments.
+
+    Hits are ranked in the index, so one query orders all entity types
+    together; the page is then loaded with one ``in_bulk`` per entity type,
+    through ``querysets[entity]`` when given (to apply the caller's access
+    rules and selection). ``organization_ids=None`` searches every tenant.
+    Each returned instance carries its ``search_rank`` and ``search_key``,
+    which form the keyset cursor.
+    """
+    first = page_size(first)
+    entities = entities or list(SEARCH_DOCUMENTS)
+    querysets = querysets or {}
+    using = using or read_database()
+    connection = connections[using]
+    backend = get_search_backend(connection)
+    terms = backend.search_terms(query)
+    if terms is None:
+        return Page([], SEARCH_ORDERING, has_next_page=False, has_previous_page=bool(after))
+    sql, params = matching_sql(backend, terms, [SEARCH_DOCUMENTS[entity].code for entity in entities], organization_ids)
+    sql = f'SELECT key, rank FROM ({sql}) hits'
+    if after:
+        rank, key = decode_cursor(after)
+        sql += ' WHERE rank < %s OR (rank = %s AND key < %s)'
+        params = [*params, rank, rank, key]
+    with connection.cursor() as cursor:
+        cursor.execute(f'{sql} ORDER BY rank DESC, key DESC LIMIT %s', [*params, first + 1])
+        hits = cursor.fetchall()
+    objects = {}
+    for entity, document in SEARCH_DOCUMENTS.items():
+        ids = [key // KEY_SPACE for key, _ in hits if key % KEY_SPACE == document.code]
+        if ids:
+            queryset = querysets.get(entity, document.model._default_manager.all())
+            objects.update({pk * KEY_SPACE + document.code: obj for pk, obj in queryset.using(using).in_bulk(ids).items()})
+    page = []
+    for key, rank in hits[:first]:
+        obj = objects.get(key)
+        if obj is not None:
+            obj.search_rank = rank
+            obj.search_key = key
+            page.append(obj)
+    return Page(page, SEARCH_ORDERING, has_next_page=len(hits) > first, has_previous_page=bool(after))
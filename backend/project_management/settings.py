@@ -6,11 +6,17 @@ SECRET_KEY = config('SECRET_KEY', default='django-insecure-your-secret-key-here'
 DEBUG = config('DEBUG', default=True, cast=bool)
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1', cast=lambda v: [s.strip() for s in v.split(',')])
 INSTALLED_APPS = ['django.contrib.admin', 'django.contrib.auth', 'django.contrib.contenttypes', 'django.contrib.sessions', 'django.contrib.messages', 'django.contrib.staticfiles', 'rest_framework', 'graphene_django', 'django_filters', 'corsheaders', 'organizations', 'projects', 'tasks']
-MIDDLEWARE = ['corsheaders.middleware.CorsMiddleware', 'organizations.middleware.OrganizationMiddleware', 'django.middleware.security.SecurityMiddleware', 'django.contrib.sessions.middleware.SessionMiddleware', 'django.middleware.common.CommonMiddleware', 'django.middleware.csrf.CsrfViewMiddleware', 'django.contrib.auth.middleware.AuthenticationMiddleware', 'django.contrib.messages.middleware.MessageMiddleware', 'django.middleware.clickjacking.XFrameOptionsMiddleware']
+MIDDLEWARE = ['corsheaders.middleware.CorsMiddleware', 'project_management.routers.ReplicaRoutingMiddleware', 'organizations.middleware.OrganizationMiddleware', 'django.middleware.security.SecurityMiddleware', 'django.contrib.sessions.middleware.SessionMiddleware', 'django.middleware.common.CommonMiddleware', 'django.middleware.csrf.CsrfViewMiddleware', 'django.contrib.auth.middleware.AuthenticationMiddleware', 'django.contrib.messages.middleware.MessageMiddleware', 'django.middleware.clickjacking.XFrameOptionsMiddleware']
 ROOT_URLCONF = 'project_management.urls'
 TEMPLATES = [{'BACKEND': 'django.template.backends.django.DjangoTemplates', 'DIRS': [], 'APP_DIRS': True, 'OPTIONS': {'context_processors': ['django.template.context_processors.debug', 'django.template.context_processors.request', 'django.contrib.auth.context_processors.auth', 'django.contrib.messages.context_processors.messages']}}]
 WSGI_APPLICATION = 'project_management.wsgi.application'
+ASGI_APPLICATION = 'project_management.asgi.application'
 DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'db.sqlite3'}}
+DATABASE_REPLICA_NAMES = config('DATABASE_REPLICA_NAMES', default='', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
+DATABASES.update({f'replica_{i}': {**DATABASES['default'], 'NAME': name, 'TEST': {'MIRROR': 'default'}} for i, name in enumerate(DATABASE_REPLICA_NAMES)})
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_REPLICA_STICKY_SECONDS = config('DATABASE_REPLICA_STICKY_SECONDS', default=10, cast=int)
+DATABASE_ROUTERS = ['project_management.routers.ReplicaRouter']
 AUTH_PASSWORD_VALIDATORS = [{'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'}, {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'}, {'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator'}, {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'}]
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -19,7 +25,37 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-GRAPHENE = {'SCHEMA': 'project_management.schema.schema', 'MIDDLEWARE': ['graphene_django.middleware.GrapheneDebugMiddleware']}
+GRAPHENE = {'SCHEMA': 'project_management.schema.schema', 'MIDDLEWARE': ['project_management.metrics.MetricsMiddleware', 'project_management.execution.SyncResolverMiddleware', 'project_management.loaders.LoaderMiddleware']}
+# Redis socket timeouts in seconds, and how long caches skip Redis after a failed call.
+REDIS_CONNECT_TIMEOUT = config('REDIS_CONNECT_TIMEOUT', default=0.25, cast=float)
+REDIS_SOCKET_TIMEOUT = config('REDIS_SOCKET_TIMEOUT', default=0.5, cast=float)
+REDIS_BREAKER_SECONDS = config('REDIS_BREAKER_SECONDS', default=10, cast=float)
+SMART_CACHE_LOCAL_MAX_BYTES = config('SMART_CACHE_LOCAL_MAX_BYTES', default=0, cast=int)
+SMART_CACHE_LOCAL_TIMEOUT = config('SMART_CACHE_LOCAL_TIMEOUT', default=30, cast=int)
+AUTOCOMPLETE_MEMORY_MAX_ROWS = config('AUTOCOMPLETE_MEMORY_MAX_ROWS', default=5000, cast=int)
+AUTOCOMPLETE_MEMORY_TENANTS = config('AUTOCOMPLETE_MEMORY_TENANTS', default=256, cast=int)
+GRAPHQL_MAX_DEPTH = config('GRAPHQL_MAX_DEPTH', default=12, cast=int)
+GRAPHQL_MAX_COST = config('GRAPHQL_MAX_COST', default=5000, cast=int)
+GRAPHQL_DEFAULT_LIST_SIZE = config('GRAPHQL_DEFAULT_LIST_SIZE', default=20, cast=int)
+# Per-organization overrides keyed by slug: max_depth, max_cost,
+# statement_timeout_ms and rate_limits (shaped like GRAPHQL_RATE_LIMITS).
+GRAPHQL_TENANT_LIMITS = {}
+# (tokens per second, burst) for each bucket scope and budget; leave a budget
+# out to stop limiting it.
+GRAPHQL_RATE_LIMITS = {'organization': {'read': (50, 500), 'mutation': (10, 100), 'expensive': (5, 60)}, 'user': {'read': (20, 200), 'mutation': (5, 50), 'expensive': (2, 20)}, 'client': {'read': (5, 50), 'mutation': (1, 10), 'expensive': (0.2, 5)}}
+GRAPHQL_EXPENSIVE_FIELDS = ('organizationsWithStats', 'projectsWithStats', 'tasksWithCommentCount', 'search', 'searchOrganizations', 'searchProjects', 'searchTasks', 'searchComments', 'bulkCreateTasks', 'bulkUpdateTasks', 'bulkAddTaskComments')
+GRAPHQL_STATEMENT_TIMEOUT_MS = config('GRAPHQL_STATEMENT_TIMEOUT_MS', default=0, cast=int)
+# Seconds whole query responses are cached per user; 0 disables the cache and its ETags.
+GRAPHQL_RESPONSE_CACHE_SECONDS = config('GRAPHQL_RESPONSE_CACHE_SECONDS', default=0, cast=int)
+GRAPHQL_CHANNEL_LAYER = config('GRAPHQL_CHANNEL_LAYER', default='project_management.subscriptions.RedisChannelLayer')
+GRAPHQL_DOCUMENT_CACHE_SIZE = config('GRAPHQL_DOCUMENT_CACHE_SIZE', default=1000, cast=int)
+GRAPHQL_PERSISTED_QUERIES_ONLY = config('GRAPHQL_PERSISTED_QUERIES_ONLY', default=False, cast=bool)
+GRAPHQL_PERSISTED_QUERIES_MANIFEST = config('GRAPHQL_PERSISTED_QUERIES_MANIFEST', default='')
+# Seconds an APQ registration outlives its last use; manifest entries never expire.
+GRAPHQL_PERSISTED_QUERY_TIMEOUT = config('GRAPHQL_PERSISTED_QUERY_TIMEOUT', default=604800, cast=int)
+GRAPHQL_SLOW_OPERATION_MS = config('GRAPHQL_SLOW_OPERATION_MS', default=500, cast=int)
+# Bearer token /metrics/ requires; while it is empty the endpoint refuses every request.
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
 CORS_ALLOWED_ORIGINS = ['http://localhost:3000', 'http://127.0.0.1:3000']
 CORS_ALLOW_CREDENTIALS = True
 REST_FRAMEWORK = {'DEFAULT_AUTHENTICATION_CLASSES': ['rest_framework.authentication.SessionAuthentication', 'rest_framework.authentication.TokenAuthentication'], 'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'], 'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination', 'PAGE_SIZE': 20, 'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend', 'rest_framework.filters.SearchFilter', 'rest_framework.filters.OrderingFilter']}
\ No newline at end of file
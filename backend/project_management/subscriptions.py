@@ -0,0 +1,130 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+from cache import org_cache
+logger = logging.getLogger(__name__)
+EVENT_CHANNEL_PREFIX = 'pm_events'
+SUBSCRIBER_QUEUE_SIZE = 100
+_channel_layer = None
+
+def task_channel(organization_id, project_id):
+    return f'org:{organization_id}:project:{project_id}:tasks'
+
+def comment_channel(organization_id, task_id):
+    return f'org:{organization_id}:task:{task_id}:comments'
+
+def project_stats_channel(organization_id):
+    return f'org:{organization_id}:project_stats'
+
+class InMemoryChannelLayer:
+    """Process-local channel layer, for tests and single-process servers.
+
+    ``publish`` may be called from any thread (mutations run in worker threads);
+    messages are handed to each subscriber's event loop. A subscriber that falls
+    more than ``SUBSCRIBER_QUEUE_SIZE`` messages behind loses the oldest ones.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        self.deliver(channel, message)
+
+    def deliver(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(enqueue, queue, message)
+
+    async def subscribe(self, channel):
+        """Yield every message published to ``channel`` until the generator is closed."""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue(SUBSCRIBER_QUEUE_SIZE))
+        with self._lock:
+            self._subscribers[channel].add(subscriber)
+        try:
+            while True:
+                yield await subscriber[1].get()
+        finally:
+            with self._lock:
+                self._subscribers[channel].discard(subscriber)
+                if not self._subscribers[channel]:
+                    del self._subscribers[channel]
+
+class RedisChannelLayer(InMemoryChannelLayer):
+    """Channel layer that fans events out to every worker process through Redis pub/sub.
+
+    Each process holds a single pattern subscription on ``pm_events:*`` and
+    delivers messages to its local subscribers, so the number of Redis
+    connections does not grow with the number of open subscriptions.
+    """
+
+    def __init__(self, redis_client=None):
+        super().__init__()
+        self.redis_client = redis_client or org_cache.redis_client
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def publish(self, channel, message):
+        try:
+            self.redis_client.publish(f'{EVENT_CHANNEL_PREFIX}:{channel}', json.dumps(message))
+        except Exception as e:
+            logger.error(f'Event publish error for {channel}: {e}')
+
+    def handle_message(self, message):
+        try:
+            channel = message['channel'][len(EVENT_CHANNEL_PREFIX) + 1:]
+            payload = json.loads(message['data'])
+        except (KeyError, TypeError, ValueError):
+            return
+        self.deliver(channel, payload)
+
+    def _start_listener(self):
+        if self._listener is not None:
+            return
+        with self._listener_lock:
+            if self._listener is not None:
+                return
+            try:
+                pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(**{f'{EVENT_CHANNEL_PREFIX}:*': self.handle_message})
+                self._listener = pubsub.run_in_thread(sleep_time=1, daemon=True)
+            except Exception as e:
+                logger.error(f'Event listener error: {e}')
+
+    async def subscribe(self, channel):
+        self._start_listener()
+        async for message in super().subscribe(channel):
+            yield message
+
+def enqueue(queue, message):
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(message)
+
+def get_channel_layer():
+    global _channel_layer
+    if _channel_layer is None:
+        _channel_layer = import_string(settings.GRAPHQL_CHANNEL_LAYER)()
+    return _channel_layer
+
+def publish_on_commit(events):
+    """Publish ``(channel, message)`` pairs once the current transaction commits."""
+    events = list(events)
+    if events:
+        transaction.on_commit(lambda: [get_channel_layer().publish(channel, message) for channel, message in events])
+
+def task_events(tasks, action):
+    """``taskChanged`` and ``projectStatsChanged`` events for ``tasks``."""
+    events = [(task_channel(task.organization_id, task.project_id), {'id': task.pk, 'action': action}) for task in tasks]
+    projects = {task.project_id: task.organization_id for task in tasks}
+    return events + [(project_stats_channel(organization_id), {'id': project_id}) for project_id, organization_id in projects.items()]
+
+def comment_events(comments):
+    """``commentAdded`` events for ``comments``."""
+    return [(comment_channel(comment.organization_id, comment.task_id), {'id': comment.pk}) for comment in comments]
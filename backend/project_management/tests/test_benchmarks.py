@@ -0,0 +1,30 @@
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase
+from cache import org_cache
+from project_management import benchmarks
+from project_management.benchmarks import benchmark
+from .utils import FakeRedisMixin, create_tenant
+
+class BenchmarkTests(FakeRedisMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.organization = create_tenant()
+
+    def test_superuser_operations_are_skipped_for_other_users(self):
+        results = benchmark(self.user, self.organization, iterations=1, names=['me', 'users'])
+        self.assertEqual(list(results), ['me'])
+        self.assertEqual(results['me']['errors'], [])
+        output = StringIO()
+        call_command('benchmark_graphql', organization='acme', iterations=1, operations=['users'], baseline='/nonexistent/baseline.json', stdout=output)
+        self.assertIn('Skipping users', output.getvalue())
+
+    def test_cold_cache_flushes_before_every_execution(self):
+        org_cache.set('projects:org:1', ['cached'])
+        with mock.patch.object(benchmarks, 'flush_caches', wraps=benchmarks.flush_caches) as flush_caches:
+            results = benchmark(self.user, self.organization, iterations=3, names=['myOrganizations'], cold_cache=True)
+        self.assertEqual(flush_caches.call_count, 3)
+        self.assertIsNone(org_cache.get('projects:org:1'))
+        self.assertEqual(results['myOrganizations']['errors'], [])
@@ -0,0 +1,227 @@
+import json
+import time
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.test import TestCase
+import cache
+import redis
+from cache import INVALIDATION_CHANNEL, PROCESS_ID, CircuitBreaker, LocalLRU, SmartCache, invalidate_scopes, invalidation_message, redis_breaker
+from .utils import FakeRedisMixin
+
+class LocalLRUTests(TestCase):
+
+    def test_hit_and_miss(self):
+        lru = LocalLRU(max_bytes=100, timeout=30)
+        self.assertIsNone(lru.get('a'))
+        lru.set('a', 'value')
+        self.assertEqual(lru.get('a'), 'value')
+        self.assertEqual((lru.stats['hits'], lru.stats['misses']), (1, 1))
+
+    def test_evicts_least_recently_used_by_encoded_size(self):
+        lru = LocalLRU(max_bytes=10, timeout=30)
+        lru.set('a', 'ééé')
+        lru.set('b', 'éé')
+        lru.get('a')
+        lru.set('c', 'é')
+        self.assertEqual(lru._size, 8)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('a'), 'ééé')
+        self.assertEqual(lru.stats['evictions'], 1)
+
+    def test_skips_values_over_the_budget(self):
+        lru = LocalLRU(max_bytes=4, timeout=30)
+        lru.set('a', 'ééé')
+        self.assertEqual(len(lru), 0)
+
+    def test_entries_expire(self):
+        lru = LocalLRU(max_bytes=100, timeout=30)
+        with mock.patch.object(cache.time, 'monotonic', return_value=1000.0):
+            lru.set('short', 'value', timeout=5)
+            lru.set('long', 'value', timeout=60)
+        with mock.patch.object(cache.time, 'monotonic', return_value=1010.0):
+            self.assertIsNone(lru.get('short'))
+            self.assertEqual(lru.get('long'), 'value')
+        with mock.patch.object(cache.time, 'monotonic', return_value=1031.0):
+            self.assertIsNone(lru.get('long'))
+        self.assertEqual(lru.stats['expirations'], 2)
+        self.assertEqual(lru._size, 0)
+
+    def test_delete_counts_invalidations(self):
+        lru = LocalLRU(max_bytes=100, timeout=30)
+        lru.set('a', 'value')
+        lru.delete('a', 'missing')
+        self.assertEqual(lru.stats['invalidations'], 1)
+        self.assertEqual(lru._size, 0)
+
+class SmartCacheTests(FakeRedisMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = self.smart_cache()
+
+    def smart_cache(self, **kwargs):
+        smart_cache = SmartCache(prefix='pm_test', redis_client=self.redis, async_redis_factory=self.fake_async_redis, **kwargs)
+        self.addCleanup(self.forget, smart_cache)
+        return smart_cache
+
+    def forget(self, smart_cache):
+        if smart_cache in cache._local_tiers:
+            cache._local_tiers.remove(smart_cache)
+
+    def test_round_trip(self):
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.set('key', {'a': [1, 2]}))
+        self.assertEqual(self.cache.get('key'), {'a': [1, 2]})
+        self.assertEqual(self.cache.stats, {'hits': 1, 'misses': 1, 'errors': 0})
+
+    def test_async_round_trip(self):
+        async_to_sync(self.cache.aset)('key', [1, 2], scopes=[('org', 1)])
+        self.assertEqual(self.cache.get('key', scopes=[('org', 1)]), [1, 2])
+        self.assertEqual(async_to_sync(self.cache.aget)('key', scopes=[('org', 1)]), [1, 2])
+
+    def test_redis_errors_are_misses(self):
+        self.cache.redis_client = mock.Mock(**{'get.side_effect': ConnectionError, 'mget.side_effect': ConnectionError})
+        self.assertIsNone(self.cache.get('key:org:1'))
+        self.assertEqual(self.cache.stats['errors'], 1)
+
+    def test_generation_bump_waits_for_commit(self):
+        self.cache.set('projects:org:1', ['cached'])
+        with self.captureOnCommitCallbacks() as callbacks:
+            invalidate_scopes(organization_ids=[1])
+            self.assertEqual(self.cache.get('projects:org:1'), ['cached'])
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(self.cache.get('projects:org:1'))
+
+    def test_generation_bump_leaves_other_scopes(self):
+        self.cache.set('projects:org:1', ['one'])
+        self.cache.set('projects:org:2', ['two'])
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_scopes(organization_ids=[1])
+        self.assertIsNone(self.cache.get('projects:org:1'))
+        self.assertEqual(self.cache.get('projects:org:2'), ['two'])
+
+    def test_explicit_scopes_fold_in_every_generation(self):
+        scopes = [('user', 7), ('org', 1), ('org', 2)]
+        self.cache.set('page', ['cached'], scopes=scopes)
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_scopes(organization_ids=[2])
+        self.assertIsNone(self.cache.get('page', scopes=scopes))
+        self.assertEqual(self.cache.generations(scopes), ['0', '0', '1'])
+
+    def test_local_tier_serves_repeat_reads(self):
+        tiered = self.smart_cache(local_max_bytes=10000)
+        tiered.set('key', 'value')
+        self.assertEqual(tiered.get('key'), 'value')
+        self.assertEqual(tiered.stats['hits'], 0)
+        self.assertEqual(tiered.local.stats['hits'], 1)
+
+    def test_local_tier_sees_generation_bumps(self):
+        tiered = self.smart_cache(local_max_bytes=10000)
+        tiered.set('projects:org:1', ['cached'])
+        self.assertEqual(tiered.get('projects:org:1'), ['cached'])
+        tiered.bump_generation('org', 1)
+        self.assertIsNone(tiered.get('projects:org:1'))
+
+    def test_writes_publish_invalidations(self):
+        tiered = self.smart_cache(local_max_bytes=10000)
+        pubsub = self.fake_redis().pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(INVALIDATION_CHANNEL)
+        pubsub.get_message(timeout=1)
+        tiered.set('key', 'value')
+        message = pubsub.get_message(timeout=1)
+        self.assertEqual(json.loads(message['data']), {'sender': PROCESS_ID, 'keys': ['pm_test:key']})
+        pubsub.close()
+
+    def test_invalidations_from_other_workers_drop_local_entries(self):
+        tiered = self.smart_cache(local_max_bytes=10000)
+        tiered.set('a', 'one')
+        tiered.set('b', 'two')
+        tiered.handle_invalidation({'data': json.dumps({'sender': 'other', 'keys': ['pm_test:a']})})
+        self.assertIsNone(tiered.local.get('pm_test:a'))
+        self.assertEqual(tiered.local.get('pm_test:b'), '"two"')
+        tiered.handle_invalidation({'data': json.dumps({'sender': 'other', 'keys': None})})
+        self.assertEqual(len(tiered.local), 0)
+
+    def test_own_invalidations_are_ignored(self):
+        tiered = self.smart_cache(local_max_bytes=10000)
+        tiered.set('a', 'one')
+        tiered.handle_invalidation({'data': invalidation_message(['pm_test:a'])})
+        self.assertEqual(tiered.local.get('pm_test:a'), '"one"')
+
+    def test_unreadable_invalidations_clear_the_local_tier(self):
+        tiered = self.smart_cache(local_max_bytes=10000)
+        tiered.set('a', 'one')
+        tiered.handle_invalidation({'data': 'not json'})
+        self.assertEqual(len(tiered.local), 0)
+
+    def test_local_tiers_share_one_listener(self):
+        first = self.smart_cache(local_max_bytes=10000)
+        second = self.smart_cache(local_max_bytes=10000)
+        first.set('a:org:1', 'one')
+        second.set('b:org:1', 'two')
+        listener = cache._listener
+        self.assertIsNotNone(listener)
+        self.assertEqual(self.redis.pubsub_numsub(INVALIDATION_CHANNEL), [(INVALIDATION_CHANNEL, 1)])
+        self.redis.publish(INVALIDATION_CHANNEL, json.dumps({'sender': 'other', 'keys': None}))
+        deadline = time.monotonic() + 5
+        while (len(first.local) or len(second.local)) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual((len(first.local), len(second.local)), (0, 0))
+        self.assertIs(cache._listener, listener)
+
+class CircuitBreakerTests(FakeRedisMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = mock.Mock(wraps=self.redis)
+        self.cache = SmartCache(prefix='pm_test', redis_client=self.client, async_redis_factory=self.fake_async_redis)
+
+    def test_opens_after_a_connection_failure(self):
+        self.client.get.side_effect = redis.ConnectionError('down')
+        with self.assertLogs('cache', 'WARNING') as logs:
+            self.assertIsNone(self.cache.get('key'))
+            self.assertIsNone(self.cache.get('key'))
+            self.assertFalse(self.cache.set('key', 'value'))
+            self.assertIsNone(self.cache.generations([('org', 1)]))
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(self.client.get.call_count, 1)
+        self.assertEqual(self.cache.stats['errors'], 1)
+
+    def test_probes_again_after_the_window(self):
+        breaker = CircuitBreaker(10)
+        with mock.patch.object(cache.time, 'monotonic', return_value=100.0), self.assertLogs('cache', 'WARNING'):
+            breaker.failure(redis.TimeoutError('slow'))
+            self.assertFalse(breaker.allow())
+        with mock.patch.object(cache.time, 'monotonic', return_value=111.0):
+            self.assertTrue(breaker.allow())
+            self.assertFalse(breaker.allow())
+        breaker.success()
+        self.assertTrue(breaker.allow())
+
+    def test_recovers_on_the_next_successful_call(self):
+        redis_breaker.failure(redis.ConnectionError('down'))
+        redis_breaker._open_until = 0.0
+        self.cache.set('key', 'value')
+        self.assertFalse(redis_breaker.failing)
+        self.assertEqual(self.cache.get('key'), 'value')
+
+    def test_bumps_still_drop_local_generations(self):
+        tiered = SmartCache(prefix='pm_test', redis_client=self.client, local_max_bytes=10000)
+        self.addCleanup(cache._local_tiers.remove, tiered)
+        tiered.local.set('pm_gen:org:1', '3')
+        redis_breaker.failure(redis.ConnectionError('down'))
+        self.assertEqual(tiered.bump_generations([('org', 1)]), [])
+        self.assertIsNone(tiered.local.get('pm_gen:org:1'))
+        self.client.pipeline.assert_not_called()
+
+    def test_other_errors_do_not_open_it(self):
+        self.client.pipeline.side_effect = ValueError('bad value')
+        with self.assertLogs('cache', 'ERROR'):
+            self.assertFalse(self.cache.set('key', 'value'))
+        self.assertFalse(redis_breaker.failing)
+
+    def test_connections_time_out_quickly(self):
+        kwargs = cache.redis_connection_kwargs()
+        self.assertLessEqual(kwargs['socket_connect_timeout'], 1)
+        self.assertLessEqual(kwargs['socket_timeout'], 1)
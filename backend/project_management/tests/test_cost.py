@@ -0,0 +1,60 @@
+import json
+from django.test import TestCase, override_settings
+from graphql import parse, validate
+from project_management.cost import query_cost_validator
+from project_management.schema import schema
+from .utils import FakeRedisMixin, create_tenant, graphql
+NESTED_QUERY = 'query Nested($tasks: Int) { myProjects(first: 10) { edges { node { name tasks(first: $tasks) { edges { node { title } } } } } } }'
+
+class QueryCostValidatorTests(TestCase):
+
+    def costs(self, query, max_cost=1000, variables=None):
+        costs = {}
+        errors = validate(schema.graphql_schema, parse(query), [query_cost_validator(max_cost, variables, 20, costs.update)])
+        return (costs, [error.message for error in errors])
+
+    def test_connections_multiply_by_first(self):
+        self.assertEqual(self.costs(NESTED_QUERY, variables={'tasks': 3}), ({'Nested': 40}, []))
+
+    def test_first_defaults_to_the_max_limit(self):
+        costs, _ = self.costs('query Mine { myProjects { edges { node { name } } } }')
+        self.assertEqual(costs, {'Mine': 100})
+
+    def test_plain_lists_use_the_default_list_size(self):
+        costs, _ = self.costs('query Members { myOrganizations(first: 2) { edges { node { members { username } } } } }')
+        self.assertEqual(costs, {'Members': 42})
+
+    def test_fragments_are_counted(self):
+        costs, _ = self.costs('query Mine { myProjects(first: 5) { ...Edges } } fragment Edges on ProjectTypeConnection { edges { node { tasks(first: 2) { edges { node { title } } } } } }')
+        self.assertEqual(costs, {'Mine': 15})
+
+    def test_over_the_maximum(self):
+        costs, errors = self.costs(NESTED_QUERY, max_cost=109, variables={'tasks': 10})
+        self.assertEqual(costs, {'Nested': 110})
+        self.assertEqual(errors, ["'Nested' has an estimated cost of 110, which exceeds the maximum of 109."])
+
+    def test_at_the_maximum(self):
+        self.assertEqual(self.costs(NESTED_QUERY, max_cost=110, variables={'tasks': 10})[1], [])
+
+class CostLimitedViewTests(FakeRedisMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.organization = create_tenant()
+
+    def test_reports_cost_in_extensions(self):
+        response = graphql(self.user, NESTED_QUERY, {'tasks': 3})
+        self.assertEqual(json.loads(response.content)['extensions']['cost'], {'estimated': 40, 'maximum': 5000, 'maxDepth': 12})
+
+    @override_settings(GRAPHQL_MAX_COST=50)
+    def test_rejects_expensive_operations_before_resolving(self):
+        response = graphql(self.user, NESTED_QUERY, {'tasks': 10})
+        content = json.loads(response.content)
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('data', content)
+        self.assertIn('exceeds the maximum of 50', content['errors'][0]['message'])
+
+    @override_settings(GRAPHQL_TENANT_LIMITS={'acme': {'max_cost': 20}})
+    def test_tenant_limits_override_the_maximum(self):
+        response = graphql(self.user, NESTED_QUERY, {'tasks': 3}, organization=self.organization)
+        self.assertIn('exceeds the maximum of 20', json.loads(response.content)['errors'][0]['message'])
@@ -0,0 +1,93 @@
+import json
+import tempfile
+from django.test import SimpleTestCase, TestCase, override_settings
+from project_management.documents import PERSISTED_QUERY_PREFIX, LRUCache, PersistedQueryStore, persisted_queries, query_hash
+from .utils import FakeRedisMixin, create_tenant, graphql
+PROJECTS_QUERY = 'query Projects { projects(first: 5) { edges { node { name } } } }'
+
+def apq(digest):
+    return {'persistedQuery': {'version': 1, 'sha256Hash': digest}}
+
+class LRUCacheTests(SimpleTestCase):
+
+    def test_evicts_least_recently_used(self):
+        lru = LRUCache(2)
+        lru.remember('a', 1)
+        lru.remember('b', 2)
+        lru.lookup('a')
+        lru.remember('c', 3)
+        self.assertEqual((lru.lookup('a'), lru.lookup('b'), lru.lookup('c')), (1, None, 3))
+        self.assertEqual(lru.stats, {'hits': 3, 'misses': 1, 'evictions': 1})
+
+    def test_zero_size_keeps_nothing(self):
+        lru = LRUCache(0)
+        lru.remember('a', 1)
+        self.assertEqual(len(lru), 0)
+
+class PersistedQueryTests(FakeRedisMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.organization = create_tenant()
+        self.digest = query_hash(PROJECTS_QUERY)
+
+    def errors(self, response):
+        return [error['extensions']['code'] for error in json.loads(response.content).get('errors', [])]
+
+    def test_unknown_hash_is_not_found(self):
+        self.assertEqual(self.errors(graphql(self.user, None, extensions=apq(self.digest))), ['PERSISTED_QUERY_NOT_FOUND'])
+
+    def test_registers_with_full_text_then_serves_the_hash(self):
+        self.assertEqual(graphql(self.user, PROJECTS_QUERY, extensions=apq(self.digest)).status_code, 200)
+        self.assertGreater(self.redis.ttl(f'{PERSISTED_QUERY_PREFIX}:{self.digest}'), 0)
+        self.patch(persisted_queries, _queries=LRUCache(100))
+        response = graphql(self.user, None, extensions=apq(self.digest))
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertIn('projects', json.loads(response.content)['data'])
+
+    def test_hash_mismatch(self):
+        response = graphql(self.user, PROJECTS_QUERY, extensions=apq(query_hash('query Other { me { id } }')))
+        self.assertEqual(self.errors(response), ['PERSISTED_QUERY_HASH_MISMATCH'])
+
+    def test_invalid_documents_are_not_registered(self):
+        for query in ('query Broken {', 'query Unknown { noSuchField }'):
+            graphql(self.user, query, extensions=apq(query_hash(query)))
+            self.assertIsNone(persisted_queries.get(query_hash(query)))
+        self.assertEqual(self.redis.keys(f'{PERSISTED_QUERY_PREFIX}:*'), [])
+
+    @override_settings(GRAPHQL_MAX_COST=1)
+    def test_over_budget_documents_are_not_registered(self):
+        graphql(self.user, PROJECTS_QUERY, extensions=apq(self.digest))
+        self.assertIsNone(persisted_queries.get(self.digest))
+
+    def test_registrations_are_bounded_in_process(self):
+        self.patch(persisted_queries, _queries=LRUCache(2))
+        for first in range(1, 4):
+            query = f'query Projects {{ projects(first: {first}) {{ edges {{ node {{ name }} }} }} }}'
+            graphql(self.user, query, extensions=apq(query_hash(query)))
+        self.assertEqual(len(persisted_queries._queries), 2)
+        self.assertEqual(len(self.redis.keys(f'{PERSISTED_QUERY_PREFIX}:*')), 3)
+
+    @override_settings(GRAPHQL_PERSISTED_QUERIES_ONLY=True)
+    def test_allow_list_refuses_unregistered_operations(self):
+        self.assertEqual(self.errors(graphql(self.user, PROJECTS_QUERY)), ['PERSISTED_QUERY_NOT_ALLOWED'])
+        self.assertEqual(self.errors(graphql(self.user, PROJECTS_QUERY, extensions=apq(self.digest))), ['PERSISTED_QUERY_NOT_ALLOWED'])
+        self.assertIsNone(persisted_queries.get(self.digest))
+
+    @override_settings(GRAPHQL_PERSISTED_QUERIES_ONLY=True)
+    def test_allow_list_serves_manifest_operations(self):
+        self.patch(persisted_queries, _manifest={self.digest: PROJECTS_QUERY})
+        self.assertEqual(graphql(self.user, PROJECTS_QUERY).status_code, 200)
+        self.assertEqual(graphql(self.user, None, extensions=apq(self.digest)).status_code, 200)
+
+class ManifestTests(SimpleTestCase):
+
+    def test_manifest_entries_stay_out_of_the_lru(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as manifest:
+            json.dump({'operations': [{'id': 'abc', 'body': PROJECTS_QUERY}]}, manifest)
+            manifest.flush()
+            store = PersistedQueryStore(None, manifest.name, max_entries=1)
+        store._queries.remember('def', 'query Other { me { id } }')
+        store._queries.remember('ghi', 'query Third { me { id } }')
+        self.assertEqual(store.get('abc'), PROJECTS_QUERY)
+        self.assertEqual(len(store._queries), 1)
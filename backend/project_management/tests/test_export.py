@@ -0,0 +1,82 @@
+import csv
+import gzip
+import io
+import json
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient, SimpleTestCase, TestCase
+from tasks.models import TaskComment
+from tasks.views import CSV_HEADER, accepts_gzip
+from .utils import FakeRedisMixin, create_tenant
+
+class AcceptsGzipTests(SimpleTestCase):
+
+    def test_quality_values(self):
+        for header, expected in [('', False), ('gzip', True), ('deflate, gzip;q=0.5', True), ('gzip;q=0', False), ('GZIP; Q=0.0', False), ('br, *', True), ('*;q=0', False), ('gzip;q=0, *', False), ('x-gzip', True), ('identity', False), ('gzip;q=oops', False)]:
+            with self.subTest(header=header):
+                self.assertEqual(accepts_gzip(header), expected)
+
+class ExportTests(FakeRedisMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.organization = create_tenant(projects=2, tasks=3)
+        self.other_user, _ = create_tenant('other', 'globex')
+        task = self.organization.projects.order_by('pk').first().tasks.order_by('pk').first()
+        TaskComment.objects.create(task=task, content='First', author_email='owner@example.com', created_by=self.user)
+        TaskComment.objects.create(task=task, content='Second', author_email='owner@example.com')
+
+    def export(self, user, slug='acme', headers=None, **params):
+        client = AsyncClient()
+        client.force_login(user)
+
+        async def fetch():
+            response = await client.get(f'/{slug}/export/tasks/', params, headers=headers or {})
+            chunks = [chunk async for chunk in response.streaming_content] if response.streaming else [response.content]
+            return (response, chunks)
+        return async_to_sync(fetch)()
+
+    def test_streams_ndjson(self):
+        with mock.patch('tasks.views.EXPORT_BUFFER_SIZE', 1):
+            response, chunks = self.export(self.user)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="acme-tasks.ndjson"')
+        records = [json.loads(line) for line in b''.join(chunks).decode().splitlines()]
+        self.assertEqual(len(chunks), len(records))
+        self.assertEqual(len(records), 6)
+        self.assertEqual([record['id'] for record in records], sorted((record['id'] for record in records)))
+        self.assertEqual([(comment['content'], comment['created_by']) for comment in records[0]['comments']], [('First', 'owner'), ('Second', None)])
+        self.assertEqual(records[0]['project']['name'], 'Project 0')
+
+    def test_streams_csv(self):
+        response, chunks = self.export(self.user, format='csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(b''.join(chunks).decode())))
+        self.assertEqual(rows[0], CSV_HEADER)
+        self.assertEqual(len(rows), 1 + 6 + 1)
+
+    def test_gzips_when_accepted(self):
+        response, chunks = self.export(self.user, headers={'Accept-Encoding': 'br, gzip;q=0.8'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(len(gzip.decompress(b''.join(chunks)).decode().splitlines()), 6)
+
+    def test_plain_when_gzip_is_refused(self):
+        for headers in ({}, {'Accept-Encoding': 'gzip;q=0, identity'}):
+            with self.subTest(headers=headers):
+                response, chunks = self.export(self.user, headers=headers)
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertIn('Accept-Encoding', response['Vary'])
+                self.assertEqual(len(b''.join(chunks).decode().splitlines()), 6)
+
+    def test_other_organizations_are_not_found(self):
+        response, _ = self.export(self.other_user)
+        self.assertEqual(response.status_code, 404)
+        response, _ = self.export(self.user, slug='missing')
+        self.assertEqual(response.status_code, 404)
+
+    def test_rejects_unknown_formats(self):
+        response, _ = self.export(self.user, format='xml')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,89 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase
+from projects.management.commands import import_org
+from projects.models import ImportCheckpoint, Project
+from tasks.models import Task, TaskComment
+from .utils import FakeRedisMixin, create_tenant
+
+class ImportOrgTests(FakeRedisMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.organization = create_tenant(tasks=0)
+        self.project = self.organization.projects.get()
+
+    def write(self, records, suffix='.ndjson'):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        self.addCleanup(os.remove, path)
+        with os.fdopen(handle, 'w') as f:
+            f.write(records if isinstance(records, str) else ''.join((json.dumps(record) + '\n' for record in records)))
+        return path
+
+    def run_import(self, path, **options):
+        stdout, stderr = (StringIO(), StringIO())
+        call_command('import_org', 'acme', path, stdout=stdout, stderr=stderr, **options)
+        return (stdout.getvalue(), stderr.getvalue())
+
+    def records(self, count, project='Project 0', **fields):
+        return [dict({'title': f'Imported {i}', 'project': {'name': project}, 'created_by': 'owner', 'comments': [{'content': f'Note {i}', 'author_email': 'OWNER@example.com'}]}, **fields) for i in range(count)]
+
+    def test_imports_tasks_and_comments(self):
+        self.run_import(self.write(self.records(3)))
+        tasks = Task.objects.filter(project=self.project)
+        self.assertEqual(tasks.count(), 3)
+        self.assertEqual(set(tasks.values_list('created_by', 'organization')), {(self.user.pk, self.organization.pk)})
+        self.assertEqual(list(TaskComment.objects.filter(organization=self.organization).values_list('author_email', flat=True).distinct()), ['owner@example.com'])
+
+    def test_counters_use_per_batch_deltas(self):
+        records = self.records(3) + self.records(2, status='DONE', due_date='2030-01-01')
+        with mock.patch.object(Project.objects, 'reconcile_task_counters') as reconcile:
+            self.run_import(self.write(records), batch_size=2)
+        reconcile.assert_not_called()
+        self.project.refresh_from_db()
+        self.organization.refresh_from_db()
+        self.assertEqual((self.project.total_tasks_count, self.project.todo_tasks_count, self.project.done_tasks_count), (5, 3, 2))
+        self.assertEqual((self.organization.total_tasks, self.organization.completed_tasks), (5, 2))
+        self.assertEqual(Project.objects.reconcile_task_counters(), 0)
+
+    def test_rejected_records_are_reported(self):
+        path = self.write(json.dumps(self.records(1)[0]) + '\nnot json\n' + json.dumps(self.records(1, project='Missing')[0]) + '\n')
+        _, errors = self.run_import(path)
+        self.assertIn('record 2: line 2: invalid JSON', errors)
+        self.assertIn("record 3: unknown project 'Missing'", errors)
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_creates_projects_on_request(self):
+        self.run_import(self.write(self.records(2, project='New')), create_projects=True)
+        project = Project.objects.get(organization=self.organization, name='New')
+        self.assertEqual(project.total_tasks_count, 2)
+        self.organization.refresh_from_db()
+        self.assertEqual(self.organization.project_count, 2)
+
+    def test_checkpoint_commits_with_each_batch(self):
+        path = self.write(self.records(5))
+        insert = import_org.Command.insert
+        calls = []
+
+        def fail_on_third_batch(command, tasks, comments):
+            calls.append(len(tasks))
+            if len(calls) == 3:
+                raise RuntimeError('crash')
+            insert(command, tasks, comments)
+        with mock.patch.object(import_org.Command, 'insert', fail_on_third_batch), self.assertRaises(RuntimeError):
+            self.run_import(path, batch_size=2)
+        checkpoint = ImportCheckpoint.objects.get(organization=self.organization, source=path)
+        self.assertEqual((checkpoint.records, Task.objects.count()), (4, 4))
+        output, _ = self.run_import(path, batch_size=2)
+        self.assertIn('Resuming after 4 records', output)
+        self.assertEqual(sorted(Task.objects.values_list('title', flat=True)), [f'Imported {i}' for i in range(5)])
+
+    def test_csv_export_format(self):
+        rows = 'task_id,task_title,task_status,project_name,comment_content,comment_author_email\n1,First,DONE,Project 0,One,a@example.com\n1,First,DONE,Project 0,Two,b@example.com\n2,Second,TODO,Project 0,,\n'
+        self.run_import(self.write(rows, suffix='.csv'))
+        self.assertEqual(dict(Task.objects.values_list('title', 'status')), {'First': 'DONE', 'Second': 'TODO'})
+        self.assertEqual(TaskComment.objects.filter(task__title='First').count(), 2)
@@ -0,0 +1,24 @@
+from unittest import mock
+from django.db import connection
+from django.db.models import F
+from django.db.models.functions import Lower
+from django.test import SimpleTestCase
+from tasks.models import Task
+from project_management.indexes import buildable_index
+
+class BuildableIndexTests(SimpleTestCase):
+
+    def index(self, name):
+        return next((index for index in Task._meta.indexes if index.name == name))
+
+    def test_operator_classes_are_dropped_elsewhere(self):
+        index = buildable_index(self.index('idx_task_org_title_lower'), connection)
+        self.assertEqual((index.name, index.expressions), ('idx_task_org_title_lower', (F('organization'), Lower('title'))))
+
+    def test_postgresql_index_types_are_skipped_elsewhere(self):
+        self.assertIsNone(buildable_index(self.index('idx_task_org_title_trgm'), connection))
+
+    def test_postgresql_builds_the_declared_index(self):
+        index = self.index('idx_task_org_title_trgm')
+        with mock.patch.object(connection, 'vendor', 'postgresql'):
+            self.assertIs(buildable_index(index, connection), index)
@@ -0,0 +1,33 @@
+from types import SimpleNamespace
+from django.test import RequestFactory, TestCase
+from projects.models import Project
+from project_management.loaders import enqueue_result
+from .utils import FakeRedisMixin, create_tenant
+
+class EnqueueResultTests(FakeRedisMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.organization = create_tenant(projects=2)
+        self.info = SimpleNamespace(context=RequestFactory().get('/graphql/'))
+
+    def pending_projects(self):
+        return self.info.context._loaders.project_tasks._pending
+
+    def test_lazy_queryset_is_not_evaluated(self):
+        queryset = Project.objects.all()
+        with self.assertNumQueries(0):
+            self.assertIs(enqueue_result(self.info, queryset), queryset)
+        self.assertIsNone(queryset._result_cache)
+        self.assertFalse(hasattr(self.info.context, '_loaders'))
+
+    def test_fetched_queryset_queues_siblings(self):
+        queryset = Project.objects.all()
+        list(queryset)
+        enqueue_result(self.info, queryset)
+        self.assertEqual(self.pending_projects(), {project.pk for project in queryset})
+
+    def test_list_queues_siblings(self):
+        projects = list(Project.objects.all())
+        enqueue_result(self.info, projects)
+        self.assertEqual(self.pending_projects(), {project.pk for project in projects})
@@ -0,0 +1,56 @@
+from unittest import mock
+from django.test import TestCase, override_settings
+from project_management import metrics
+from .utils import FakeRedisMixin, create_tenant, graphql
+
+class OperationRecordingTests(FakeRedisMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.organization = create_tenant()
+
+    def recorded(self, query, variables=None):
+        with mock.patch.object(metrics, 'observe_operation', wraps=metrics.observe_operation) as observe:
+            response = graphql(self.user, query, variables)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertNotIn(b'"errors"', response.content)
+        return observe.call_args.args[1]
+
+    def test_query_records_resolver_sql(self):
+        recorder = self.recorded('query Projects { projects(first: 5) { edges { node { name tasks(first: 2) { edges { node { title } } } } } } }')
+        self.assertGreater(recorder.count, 0)
+        self.assertGreater(recorder.duration, 0)
+        self.assertTrue(any(('projects_project' in sql for sql in recorder.sample)))
+
+    def test_query_records_field_sql(self):
+        before = self.field_queries('Query.projects')
+        self.recorded('query Projects { projects(first: 5) { edges { node { name } } } }')
+        self.assertGreater(self.field_queries('Query.projects'), before)
+
+    def test_mutation_records_sql(self):
+        project = self.organization.projects.get()
+        recorder = self.recorded('mutation Create($project: ID!) { createTask(input: {title: "New", projectId: $project}) { task { title } } }', {'project': str(project.pk)})
+        self.assertTrue(any((sql.startswith('INSERT INTO "tasks_task"') for sql in recorder.sample)))
+
+    def test_wrappers_are_removed(self):
+        from django.db import connections
+        self.recorded('query Projects { projects(first: 5) { edges { node { name } } } }')
+        self.assertFalse(any((isinstance(wrapper, metrics.QueryRecorder) for wrapper in connections['default'].execute_wrappers)))
+
+    def field_queries(self, field):
+        histogram = metrics.registry._histograms.get(('pm_graphql_field_db_queries', (('field', field),)))
+        return histogram.sum if histogram else 0
+
+class EndpointTests(FakeRedisMixin, TestCase):
+
+    @override_settings(METRICS_TOKEN='')
+    def test_closed_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_requires_the_token(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        self.assertEqual(self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        response = self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'pm_graphql_rate_limit_redis_errors_total', response.content)
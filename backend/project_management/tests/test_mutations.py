@@ -0,0 +1,100 @@
+import json
+from django.test import TestCase
+from cache import org_cache
+from projects.models import Project
+from tasks.models import Task, TaskComment
+from project_management.schema import BULK_MUTATION_MAX_ITEMS
+from .utils import FakeRedisMixin, create_tenant, graphql
+BULK_CREATE = 'mutation Create($input: [TaskInput!]!) { bulkCreateTasks(input: $input) { tasks { title } errors { index message } } }'
+BULK_UPDATE = 'mutation Update($input: [BulkTaskUpdateInput!]!) { bulkUpdateTasks(input: $input) { tasks { status } errors { index message } } }'
+BULK_COMMENT = 'mutation Comment($input: [TaskCommentInput!]!) { bulkAddTaskComments(input: $input) { comments { content } errors { index message } } }'
+
+class BulkMutationTests(FakeRedisMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.organization = create_tenant()
+        self.project = self.organization.projects.get()
+        self.other_user, self.other_organization = create_tenant('other', 'globex')
+
+    def mutate(self, query, items, queries=None):
+        if queries is None:
+            response = graphql(self.user, query, {'input': items})
+        else:
+            with self.assertNumQueries(queries):
+                response = graphql(self.user, query, {'input': items})
+        self.assertEqual(response.status_code, 200, response.content)
+        content = json.loads(response.content)
+        self.assertNotIn('errors', content)
+        return next(iter(content['data'].values()))
+
+    def new_tasks(self, count, **fields):
+        return [dict({'title': f'Bulk {i}', 'projectId': str(self.project.pk)}, **fields) for i in range(count)]
+
+    def test_create_runs_a_fixed_number_of_queries(self):
+        result = self.mutate(BULK_CREATE, self.new_tasks(50), queries=8)
+        self.assertEqual(len(result['tasks']), 50)
+        self.assertEqual(self.project.tasks.count(), 53)
+
+    def test_create_reports_item_errors(self):
+        other_project = self.other_organization.projects.get()
+        items = [*self.new_tasks(1), {'title': 'Missing', 'projectId': '0'}, {'title': 'Foreign', 'projectId': str(other_project.pk)}, *self.new_tasks(1, status='BOGUS')]
+        result = self.mutate(BULK_CREATE, items)
+        self.assertEqual([task['title'] for task in result['tasks']], ['Bulk 0'])
+        self.assertEqual([error['index'] for error in result['errors']], [1, 2, 3])
+        self.assertEqual([error['message'] for error in result['errors'][:2]], ['Project not found!', 'Permission denied!'])
+        self.assertIn('status:', result['errors'][2]['message'])
+        self.assertFalse(other_project.tasks.filter(title='Foreign').exists())
+
+    def test_create_applies_counter_deltas(self):
+        self.mutate(BULK_CREATE, [*self.new_tasks(2), *self.new_tasks(1, status='DONE')])
+        self.project.refresh_from_db()
+        self.organization.refresh_from_db()
+        self.assertEqual((self.project.total_tasks_count, self.project.todo_tasks_count, self.project.done_tasks_count), (6, 5, 1))
+        self.assertEqual(self.organization.total_tasks, 6)
+        self.assertEqual(Project.objects.reconcile_task_counters(), 0)
+
+    def test_create_invalidates_cached_entries(self):
+        key = f'projects:org:{self.organization.pk}'
+        org_cache.set(key, ['cached'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mutate(BULK_CREATE, self.new_tasks(1))
+        self.assertIsNone(org_cache.get(key))
+
+    def test_rejects_more_than_the_maximum(self):
+        response = graphql(self.user, BULK_CREATE, {'input': self.new_tasks(BULK_MUTATION_MAX_ITEMS + 1)})
+        self.assertIn(f'at most {BULK_MUTATION_MAX_ITEMS} items', json.loads(response.content)['errors'][0]['message'])
+        self.assertEqual(self.project.tasks.count(), 3)
+
+    def test_update_runs_a_fixed_number_of_queries(self):
+        Task.objects.bulk_create([Task(project=self.project, organization=self.organization, title=f'Extra {i}', created_by=self.user) for i in range(47)])
+        Project.objects.reconcile_task_counters()
+        items = [{'id': str(pk), 'status': 'DONE'} for pk in self.project.tasks.values_list('pk', flat=True)]
+        result = self.mutate(BULK_UPDATE, items, queries=8)
+        self.assertEqual(len(result['tasks']), 50)
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.todo_tasks_count, self.project.done_tasks_count), (0, 50))
+
+    def test_update_reports_item_errors_and_keeps_values(self):
+        task = self.project.tasks.first()
+        foreign = Task.objects.filter(organization=self.other_organization).first()
+        result = self.mutate(BULK_UPDATE, [{'id': '0', 'status': 'DONE'}, {'id': str(foreign.pk), 'status': 'DONE'}, {'id': str(task.pk), 'priority': 'BOGUS'}])
+        self.assertEqual(result['tasks'], [])
+        self.assertEqual([error['message'] for error in result['errors'][:2]], ['Task not found!', 'Permission denied!'])
+        foreign.refresh_from_db()
+        task.refresh_from_db()
+        self.assertEqual((foreign.status, task.priority), ('TODO', 'MEDIUM'))
+
+    def test_comments_run_a_fixed_number_of_queries(self):
+        task = self.project.tasks.first()
+        items = [{'content': f'Note {i}', 'authorEmail': 'owner@example.com', 'taskId': str(task.pk)} for i in range(50)]
+        result = self.mutate(BULK_COMMENT, items, queries=6)
+        self.assertEqual(len(result['comments']), 50)
+        self.assertEqual(TaskComment.objects.filter(task=task, organization=self.organization).count(), 50)
+
+    def test_comments_report_item_errors(self):
+        task = self.project.tasks.first()
+        result = self.mutate(BULK_COMMENT, [{'content': 'Missing', 'authorEmail': 'owner@example.com', 'taskId': '0'}, {'content': 'Bad', 'authorEmail': 'not an address', 'taskId': str(task.pk)}])
+        self.assertEqual(result['comments'], [])
+        self.assertEqual(result['errors'][0]['message'], 'Task not found!')
+        self.assertIn('author_email:', result['errors'][1]['message'])
@@ -0,0 +1,73 @@
+import json
+from unittest import mock
+from django.db.models import Prefetch
+from django.test import TestCase
+from project_management import schema
+from projects.models import Project
+from tasks.models import Task
+from .utils import FakeRedisMixin, create_tenant, graphql
+NESTED_QUERY = '{ projects(first: 10) { edges { node { name completionRate organization { name } createdBy { username } tasks(first: 2) { edges { node { title comments(first: 1) { edges { node { content } } } } } } } } } }'
+
+class OptimizerTests(FakeRedisMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.organization = create_tenant(projects=1, tasks=3)
+
+    def run_query(self, query=NESTED_QUERY, queries=None):
+        """Run ``query`` and return its data with the querysets ``optimize_queryset`` built."""
+        built = []
+        optimize_queryset = schema.optimize_queryset
+
+        def record(*args, **kwargs):
+            built.append(optimize_queryset(*args, **kwargs))
+            return built[-1]
+        with mock.patch.object(schema, 'optimize_queryset', record):
+            if queries is None:
+                response = graphql(self.user, query)
+            else:
+                with self.assertNumQueries(queries):
+                    response = graphql(self.user, query)
+        body = json.loads(response.content)
+        self.assertNotIn('errors', body)
+        return (body['data'], built)
+
+    def add_projects(self, count):
+        for p in range(count):
+            project = Project.objects.create(organization=self.organization, name=f'Extra {p}', created_by=self.user)
+            for t in range(3):
+                task = Task.objects.create(project=project, title=f'Extra {p}.{t}', created_by=self.user)
+                task.comments.create(content=f'Note {p}.{t}', author_email='owner@example.com')
+
+    def test_nested_selection_runs_a_fixed_number_of_queries(self):
+        self.run_query()
+        # Count, projects joined to organization and creator, one tasks prefetch, one comments prefetch.
+        data, _ = self.run_query(queries=4)
+        self.assertEqual(len(data['projects']['edges']), 1)
+        self.add_projects(5)
+        data, _ = self.run_query(queries=4)
+        edges = data['projects']['edges']
+        self.assertEqual(len(edges), 6)
+        self.assertTrue(all((len(edge['node']['tasks']['edges']) == 2 for edge in edges)))
+        self.assertEqual(edges[0]['node']['tasks']['edges'][0]['node']['comments']['edges'][0]['node']['content'], 'Note 4.2')
+
+    def test_forward_relations_are_joined_and_unselected_columns_deferred(self):
+        _, built = self.run_query()
+        projects = built[0]
+        self.assertEqual(projects.model, Project)
+        self.assertEqual(set(projects.query.select_related), {'organization', 'created_by'})
+        deferred, defer = projects.query.deferred_loading
+        self.assertTrue(defer)
+        self.assertTrue({'description', 'status', 'organization__slug', 'created_by__email'} <= deferred)
+        self.assertFalse({'name', 'total_tasks_count', 'done_tasks_count', 'organization__name', 'created_by__username'} & deferred)
+
+    def test_connections_are_prefetched_page_by_page(self):
+        _, built = self.run_query()
+        prefetch, = built[0]._prefetch_related_lookups
+        self.assertIsInstance(prefetch, Prefetch)
+        self.assertEqual(prefetch.prefetch_through, 'tasks')
+        tasks = prefetch.queryset
+        self.assertEqual((tasks.query.low_mark, tasks.query.high_mark), (0, 3))
+        self.assertIn('description', tasks.query.deferred_loading[0])
+        comments, = tasks._prefetch_related_lookups
+        self.assertEqual((comments.prefetch_through, comments.queryset.query.high_mark), ('comments', 2))
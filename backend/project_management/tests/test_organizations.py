@@ -0,0 +1,46 @@
+from unittest import mock
+from django.test import TestCase
+from organizations.middleware import get_organization_by_slug
+from projects.models import Project
+from tasks.models import Task
+from .utils import FakeRedisMixin, create_tenant
+
+class SlugCacheTests(FakeRedisMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.organization = create_tenant(tasks=2)
+
+    def test_cached_organization_identifies_the_tenant(self):
+        get_organization_by_slug('acme')
+        with self.assertNumQueries(0):
+            organization = get_organization_by_slug('acme')
+            self.assertEqual((organization.pk, organization.slug, organization.owner_id), (self.organization.pk, 'acme', self.user.pk))
+
+    def test_counters_are_not_served_from_the_cache(self):
+        get_organization_by_slug('acme')
+        Task.objects.create(project=Project.objects.get(), title='Another', created_by=self.user)
+        organization = get_organization_by_slug('acme')
+        self.assertEqual(organization.total_tasks, 3)
+
+    def test_cached_organization_uses_the_read_alias(self):
+        get_organization_by_slug('acme')
+        with mock.patch('organizations.middleware.router.db_for_read', return_value='replica_0') as db_for_read:
+            organization = get_organization_by_slug('acme')
+        db_for_read.assert_called_once_with(organization.__class__)
+        self.assertEqual(organization._state.db, 'replica_0')
+
+    def test_missing_slug(self):
+        self.assertIsNone(get_organization_by_slug('nope'))
+
+class ProjectAccessTests(FakeRedisMixin, TestCase):
+
+    def test_uses_the_memoised_organization_ids(self):
+        user, organization = create_tenant()
+        other_user, _ = create_tenant('other', 'globex')
+        project = Project.objects.get(organization=organization)
+        self.assertTrue(project.user_has_access(user))
+        with self.assertNumQueries(0):
+            self.assertTrue(project.user_has_access(user))
+            self.assertTrue(Project(organization_id=organization.pk).user_has_access(user))
+        self.assertFalse(project.user_has_access(other_user))
@@ -0,0 +1,86 @@
+from datetime import timedelta
+from asgiref.sync import async_to_sync
+from django.test import TestCase
+from django.utils import timezone
+from graphene_django.settings import graphene_settings
+from tasks.models import Task
+from project_management.pagination import apaginate, decode_cursor, encode_cursor, paginate
+from .utils import create_tenant
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        self.user, self.organization = create_tenant(tasks=5)
+        self.tasks = Task.objects.filter(organization=self.organization)
+
+    def walk(self, queryset, first):
+        """Every row of ``queryset`` in page order, following end cursors until ``has_next_page`` is false."""
+        rows, after = ([], None)
+        while True:
+            page = paginate(queryset, first, after)
+            self.assertEqual(page.has_previous_page, after is not None)
+            rows.extend(page)
+            if not page.has_next_page:
+                return rows
+            self.assertEqual(len(page), first)
+            after = page.cursor_for(page[-1])
+
+    def test_pages_cover_every_row_once(self):
+        queryset = self.tasks.order_by('title')
+        self.assertEqual(self.walk(queryset, 2), list(queryset))
+
+    def test_exact_last_page_has_no_next_page(self):
+        page = paginate(self.tasks.order_by('title'), 5)
+        self.assertEqual(len(page), 5)
+        self.assertFalse(page.has_next_page)
+
+    def test_after_last_row_is_empty(self):
+        queryset = self.tasks.order_by('title')
+        page = paginate(queryset, 5)
+        page = paginate(queryset, 5, page.cursor_for(page[-1]))
+        self.assertEqual(list(page), [])
+        self.assertFalse(page.has_next_page)
+        self.assertTrue(page.has_previous_page)
+
+    def test_first_zero_reports_more_rows(self):
+        page = paginate(self.tasks.order_by('title'), 0)
+        self.assertEqual(list(page), [])
+        self.assertTrue(page.has_next_page)
+
+    def test_ties_are_broken_by_pk(self):
+        queryset = self.tasks.order_by('-priority')
+        self.assertEqual(paginate(queryset, 1).ordering, [('priority', True), ('id', True)])
+        self.assertEqual(self.walk(queryset, 2), list(self.tasks.order_by('-priority', '-id')))
+
+    def test_nulls_sort_last_in_both_directions(self):
+        now = timezone.now()
+        tasks = list(self.tasks.order_by('pk'))
+        for days, task in zip([3, None, 1, None, 2], tasks):
+            task.due_date = None if days is None else now + timedelta(days=days)
+            task.save(update_fields=['due_date'])
+        ascending = self.walk(self.tasks.order_by('due_date'), 2)
+        self.assertEqual([task.pk for task in ascending], [tasks[2].pk, tasks[4].pk, tasks[0].pk, tasks[1].pk, tasks[3].pk])
+        descending = self.walk(self.tasks.order_by('-due_date'), 2)
+        self.assertEqual([task.pk for task in descending], [tasks[0].pk, tasks[4].pk, tasks[2].pk, tasks[3].pk, tasks[1].pk])
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(['Task 0.1', 7])), ['Task 0.1', 7])
+
+    def test_invalid_cursor(self):
+        with self.assertRaisesMessage(Exception, 'Invalid cursor!'):
+            paginate(self.tasks.order_by('title'), 2, 'not a cursor')
+
+    def test_negative_first(self):
+        with self.assertRaisesMessage(Exception, 'must be a non-negative integer'):
+            paginate(self.tasks, -1)
+
+    def test_first_over_max_limit(self):
+        with self.assertRaisesMessage(Exception, 'exceeds the `first` limit'):
+            paginate(self.tasks, graphene_settings.RELAY_CONNECTION_MAX_LIMIT + 1)
+
+    def test_async_pages_match(self):
+        queryset = self.tasks.order_by('title')
+        first = paginate(queryset, 2)
+        second = async_to_sync(apaginate)(queryset, 2, first.cursor_for(first[-1]))
+        self.assertEqual(list(second), list(queryset)[2:4])
+        self.assertTrue(second.has_next_page)
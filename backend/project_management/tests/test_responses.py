@@ -0,0 +1,76 @@
+import json
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from project_management.views import CostLimitedGraphQLView
+from .utils import FakeRedisMixin, create_tenant, graphql
+PROJECTS_QUERY = 'query Projects { projects(first: 5) { edges { node { name } } } }'
+
+@override_settings(GRAPHQL_RESPONSE_CACHE_SECONDS=60)
+class ResponseCacheTests(FakeRedisMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.organization = create_tenant()
+        execute = CostLimitedGraphQLView.execute_operation_async
+        patcher = mock.patch.object(CostLimitedGraphQLView, 'execute_operation_async', autospec=True, side_effect=execute)
+        self.execute = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def names(self, response):
+        return [edge['node']['name'] for edge in json.loads(response.content)['data']['projects']['edges']]
+
+    def test_hits_skip_execution(self):
+        first = graphql(self.user, PROJECTS_QUERY)
+        second = graphql(self.user, PROJECTS_QUERY)
+        self.assertEqual(self.execute.call_count, 1)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(second['Cache-Control'], 'private, no-cache')
+
+    def test_formatting_does_not_split_entries(self):
+        graphql(self.user, PROJECTS_QUERY)
+        graphql(self.user, '# same operation\nquery Projects {\n  projects(first: 5) { edges { node { name } } }\n}')
+        self.assertEqual(self.execute.call_count, 1)
+
+    def test_variables_and_users_split_entries(self):
+        other, _ = create_tenant('other', 'globex')
+        query = 'query Projects($first: Int) { projects(first: $first) { edges { node { name } } } }'
+        graphql(self.user, query, {'first': 1})
+        graphql(self.user, query, {'first': 2})
+        graphql(other, query, {'first': 1})
+        self.assertEqual(self.execute.call_count, 3)
+
+    def test_if_none_match_gets_304(self):
+        etag = graphql(self.user, PROJECTS_QUERY)['ETag']
+        for header in (etag, f'W/{etag}', f'"stale", {etag}'):
+            response = graphql(self.user, PROJECTS_QUERY, headers={'If-None-Match': header})
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.content, b'')
+            self.assertEqual(response['ETag'], etag)
+        self.assertEqual(graphql(self.user, PROJECTS_QUERY, headers={'If-None-Match': '"stale"'}).status_code, 200)
+
+    def test_writes_invalidate_responses(self):
+        before = graphql(self.user, PROJECTS_QUERY)
+        project = self.organization.projects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            project.name = 'Renamed'
+            project.save()
+        after = graphql(self.user, PROJECTS_QUERY)
+        self.assertEqual(self.names(after), ['Renamed'])
+        self.assertNotEqual(after['ETag'], before['ETag'])
+        self.assertEqual(self.execute.call_count, 2)
+
+    def test_superusers_and_mutations_are_not_cached(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.assertFalse(graphql(admin, PROJECTS_QUERY).has_header('ETag'))
+        project = self.organization.projects.get()
+        mutation = 'mutation Create($project: ID!) { createTask(input: {title: "New", projectId: $project}) { task { title } } }'
+        self.assertFalse(graphql(self.user, mutation, {'project': str(project.pk)}).has_header('ETag'))
+
+    @override_settings(GRAPHQL_RESPONSE_CACHE_SECONDS=0)
+    def test_disabled_without_a_lifetime(self):
+        graphql(self.user, PROJECTS_QUERY)
+        response = graphql(self.user, PROJECTS_QUERY)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertEqual(self.execute.call_count, 2)
@@ -0,0 +1,80 @@
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from project_management.routers import STICKY_COOKIE, ReplicaRoutingMiddleware, mark_user_wrote, primary_reads, read_database, routing_scope
+from .utils import FakeRedisMixin
+
+@override_settings(DATABASE_REPLICAS=['replica_0', 'replica_1', 'replica_2'], DATABASE_REPLICA_STICKY_SECONDS=10)
+class ReplicaRouterTests(FakeRedisMixin, SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User(pk=1, username='owner')
+        self.other_user = User(pk=2, username='other')
+
+    def request(self, user=None, cookies=None):
+        request = RequestFactory().get('/graphql/')
+        request.user = user or AnonymousUser()
+        request.COOKIES.update(cookies or {})
+        return request
+
+    def test_reads_outside_a_scope_use_the_primary(self):
+        self.assertEqual(read_database(), 'default')
+
+    def test_a_scope_keeps_one_replica(self):
+        with routing_scope():
+            replica = read_database()
+            self.assertIn(replica, ['replica_0', 'replica_1', 'replica_2'])
+            self.assertEqual({router.db_for_read(User) for _ in range(20)}, {replica})
+            with primary_reads():
+                self.assertEqual(read_database(), 'default')
+            self.assertEqual(read_database(), replica)
+
+    def test_a_scope_reads_the_primary_after_writing(self):
+        with routing_scope():
+            read_database()
+            router.db_for_write(User)
+            self.assertEqual(read_database(), 'default')
+
+    def test_a_user_who_wrote_recently_reads_the_primary(self):
+        mark_user_wrote(self.user.pk)
+        with routing_scope(request=self.request(self.user)):
+            self.assertEqual(read_database(), 'default')
+        with routing_scope(request=self.request(self.other_user)):
+            self.assertNotEqual(read_database(), 'default')
+
+    def test_the_user_is_checked_once_authenticated(self):
+        request = self.request()
+        with routing_scope(request=request):
+            replica = read_database()
+            self.assertNotEqual(replica, 'default')
+            mark_user_wrote(self.user.pk)
+            request.user = self.user
+            self.assertEqual(read_database(), 'default')
+
+    def test_the_sticky_window_expires(self):
+        mark_user_wrote(self.user.pk)
+        self.assertGreater(self.redis.ttl(f'pm_org:primary_until:user:{self.user.pk}'), 0)
+        self.redis.flushall()
+        with routing_scope(request=self.request(self.user)):
+            self.assertNotEqual(read_database(), 'default')
+
+    def test_middleware_marks_writers_for_every_client(self):
+        reads = []
+
+        def write(request):
+            router.db_for_write(User)
+            return HttpResponse()
+
+        def read(request):
+            reads.append(read_database())
+            return HttpResponse()
+        response = ReplicaRoutingMiddleware(write)(self.request(self.user))
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        ReplicaRoutingMiddleware(read)(self.request(self.user))
+        ReplicaRoutingMiddleware(read)(self.request(self.other_user))
+        ReplicaRoutingMiddleware(read)(self.request(cookies={STICKY_COOKIE: response.cookies[STICKY_COOKIE].value}))
+        self.assertEqual(reads[0], 'default')
+        self.assertNotEqual(reads[1], 'default')
+        self.assertEqual(reads[2], 'default')
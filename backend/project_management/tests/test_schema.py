@@ -0,0 +1,32 @@
+import json
+from django.contrib.auth.models import User
+from django.test import TestCase
+from .utils import FakeRedisMixin, create_tenant, graphql
+
+class UserListTests(FakeRedisMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.organization = create_tenant()
+        self.member = User.objects.create_user('member', 'member@example.com', 'password')
+        self.organization.members.add(self.member)
+
+    def data(self, user, query, variables=None):
+        response = graphql(user, query, variables)
+        body = json.loads(response.content)
+        self.assertNotIn('errors', body)
+        return body['data']
+
+    def test_members_stay_a_plain_list(self):
+        data = self.data(self.user, 'query GetOrganization($slug: String!) { organization(slug: $slug) { members { id username email } } }', {'slug': 'acme'})
+        self.assertEqual(data['organization']['members'], [{'id': str(self.member.pk), 'username': 'member', 'email': 'member@example.com'}])
+
+    def test_root_users_field_is_a_keyset_connection(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        query = 'query Users($after: String) { users(first: 2, after: $after) { edges { node { username } } pageInfo { hasNextPage endCursor } } }'
+        first = self.data(admin, query)['users']
+        second = self.data(admin, query, {'after': first['pageInfo']['endCursor']})['users']
+        usernames = [edge['node']['username'] for page in (first, second) for edge in page['edges']]
+        self.assertTrue(first['pageInfo']['hasNextPage'])
+        self.assertFalse(second['pageInfo']['hasNextPage'])
+        self.assertCountEqual(usernames, ['owner', 'member', 'admin'])
@@ -0,0 +1,82 @@
+from django.db import connection
+from django.test import TestCase
+from project_management.search import KEY_SPACE, SEARCH_DOCUMENTS, SEARCH_TABLE, get_search_backend, ranked_search, search_queryset
+from tasks.models import Task, TaskComment
+from .utils import FakeRedisMixin, create_tenant
+
+class SearchIndexTests(FakeRedisMixin, TestCase):
+    """The triggers keep ``search_index`` in step with the indexed tables."""
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.organization = create_tenant(tasks=0)
+        self.other_user, self.other_organization = create_tenant('other', 'globex', tasks=0)
+        self.project = self.organization.projects.get()
+
+    def indexed(self, entity, pk):
+        key = pk * KEY_SPACE + SEARCH_DOCUMENTS[entity].code
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT organization_id FROM {SEARCH_TABLE} WHERE rowid = %s', [key])
+            row = cursor.fetchone()
+        return None if row is None else row[0]
+
+    def titles(self, query, organization_ids=None):
+        return [task.title for task in search_queryset(Task.objects.all(), query, organization_ids)]
+
+    def test_inserts_are_indexed(self):
+        task = Task.objects.create(project=self.project, title='Quarterly report', assignee_email='alice@example.com', created_by=self.user)
+        self.assertEqual(self.indexed('task', task.pk), self.organization.pk)
+        self.assertEqual(self.titles('quarterly'), ['Quarterly report'])
+        self.assertEqual(self.titles('alice'), ['Quarterly report'])
+
+    def test_updates_replace_the_document(self):
+        task = Task.objects.create(project=self.project, title='Quarterly report', created_by=self.user)
+        task.title = 'Annual budget'
+        task.save()
+        self.assertEqual(self.titles('quarterly'), [])
+        self.assertEqual(self.titles('budget'), ['Annual budget'])
+
+    def test_moves_follow_the_organization(self):
+        task = Task.objects.create(project=self.project, title='Quarterly report', created_by=self.user)
+        comment = task.comments.create(content='Looks good', author_email='owner@example.com')
+        self.project.organization = self.other_organization
+        self.project.save()
+        self.assertEqual((self.indexed('project', self.project.pk), self.indexed('task', task.pk), self.indexed('comment', comment.pk)), (self.other_organization.pk,) * 3)
+        self.assertEqual(self.titles('quarterly', [self.organization.pk]), [])
+        self.assertEqual(self.titles('quarterly', [self.other_organization.pk]), ['Quarterly report'])
+
+    def test_deletes_are_removed(self):
+        task = Task.objects.create(project=self.project, title='Quarterly report', created_by=self.user)
+        comment = task.comments.create(content='Looks good', author_email='owner@example.com')
+        task_pk, comment_pk, project_pk = (task.pk, comment.pk, self.project.pk)
+        task.delete()
+        self.assertIsNone(self.indexed('task', task_pk))
+        self.assertIsNone(self.indexed('comment', comment_pk))
+        self.assertEqual(self.indexed('project', self.project.pk), self.organization.pk)
+        self.project.delete()
+        self.assertIsNone(self.indexed('project', project_pk))
+
+    def test_bulk_writes_are_indexed(self):
+        Task.objects.bulk_create([Task(project=self.project, organization=self.organization, title=f'Imported {i}', created_by=self.user) for i in range(3)])
+        Task.objects.filter(title='Imported 0').update(title='Renamed')
+        self.assertEqual(sorted(self.titles('imported')), ['Imported 1', 'Imported 2'])
+        self.assertEqual(self.titles('renamed'), ['Renamed'])
+
+    def test_rebuild_matches_the_triggers(self):
+        task = Task.objects.create(project=self.project, title='Quarterly report', created_by=self.user)
+        TaskComment.objects.create(task=task, content='Looks good', author_email='owner@example.com')
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT rowid, organization_id, a, b, c FROM {SEARCH_TABLE} ORDER BY rowid')
+            before = cursor.fetchall()
+            get_search_backend(connection).rebuild(cursor)
+            cursor.execute(f'SELECT rowid, organization_id, a, b, c FROM {SEARCH_TABLE} ORDER BY rowid')
+            self.assertEqual(cursor.fetchall(), before)
+
+    def test_ranked_search_spans_entities(self):
+        task = Task.objects.create(project=self.project, title='Launch', created_by=self.user)
+        task.comments.create(content='Launch went well', author_email='owner@example.com')
+        self.project.name = 'Launch plan'
+        self.project.save()
+        page = ranked_search('launch', organization_ids=[self.organization.pk], using='default')
+        self.assertEqual(sorted((type(obj).__name__ for obj in page)), ['Project', 'Task', 'TaskComment'])
+        self.assertEqual(ranked_search('launch', organization_ids=[self.other_organization.pk], using='default'), [])
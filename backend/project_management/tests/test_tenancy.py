@@ -0,0 +1,50 @@
+from django.test import TestCase
+from projects.models import Project
+from tasks.models import Task, TaskComment
+from .utils import FakeRedisMixin, create_tenant
+
+class TenantKeyTests(FakeRedisMixin, TestCase):
+    """``organization_id`` on tasks and comments follows their project."""
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.organization = create_tenant(tasks=2)
+        self.other_user, self.other_organization = create_tenant('other', 'globex', tasks=0)
+        self.project = self.organization.projects.get()
+        for task in self.project.tasks.all():
+            task.comments.create(content='Note', author_email='owner@example.com')
+
+    def organization_ids(self, model, **filters):
+        return set(model._base_manager.filter(**filters).values_list('organization_id', flat=True))
+
+    def test_new_rows_copy_the_organization(self):
+        self.assertEqual(self.organization_ids(Task, project=self.project), {self.organization.pk})
+        self.assertEqual(self.organization_ids(TaskComment, task__project=self.project), {self.organization.pk})
+
+    def test_moving_a_project_moves_its_tasks_and_comments(self):
+        self.project.organization = self.other_organization
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.save()
+        self.assertEqual(self.organization_ids(Task, project=self.project), {self.other_organization.pk})
+        self.assertEqual(self.organization_ids(TaskComment, task__project=self.project), {self.other_organization.pk})
+        self.assertFalse(Task.objects.for_organization(self.organization).exists())
+        self.assertEqual(Task.objects.for_organization(self.other_organization).count(), 2)
+        self.organization.refresh_from_db()
+        self.other_organization.refresh_from_db()
+        self.assertEqual((self.organization.project_count, self.organization.total_tasks), (0, 0))
+        self.assertEqual((self.other_organization.project_count, self.other_organization.total_tasks), (2, 2))
+
+    def test_moving_a_project_with_update_fields(self):
+        project = Project.objects.get(pk=self.project.pk)
+        project.organization_id = self.other_organization.pk
+        project.save(update_fields=['organization'])
+        self.assertEqual(self.organization_ids(Task, project=self.project), {self.other_organization.pk})
+
+    def test_moving_a_task_moves_its_comments(self):
+        task = self.project.tasks.first()
+        task.project = self.other_organization.projects.get()
+        task.save(update_fields=['project'])
+        task.refresh_from_db()
+        self.assertEqual(task.organization_id, self.other_organization.pk)
+        self.assertEqual(self.organization_ids(TaskComment, task=task), {self.other_organization.pk})
+        self.assertEqual(self.organization_ids(Task, project=self.project), {self.organization.pk})
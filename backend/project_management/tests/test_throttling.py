@@ -0,0 +1,141 @@
+import importlib.util
+import json
+from unittest import mock, skipUnless
+import redis
+from django.db import connections
+from django.db.backends.sqlite3.base import SQLiteCursorWrapper
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from cache import redis_breaker
+from project_management import throttling
+from project_management.throttling import Bucket, LocalBuckets, Throttled, rate_limiter
+from .utils import FakeRedisMixin, create_tenant, graphql
+PROJECTS_QUERY = 'query Projects { projects(first: 5) { edges { node { name } } } }'
+READ_LIMITS = {'user': {'read': (1, 2)}}
+
+class LocalBucketsTests(SimpleTestCase):
+
+    def take(self, buckets, *items, now):
+        with mock.patch.object(throttling.time, 'monotonic', return_value=now):
+            return buckets.take(list(items))
+
+    def test_spends_capacity_then_waits_for_refill(self):
+        buckets = LocalBuckets()
+        bucket = Bucket('b', 'user', 'read', rate=2, capacity=3, cost=1)
+        self.assertEqual([self.take(buckets, bucket, now=100.0) for _ in range(3)], [(None, 0.0)] * 3)
+        self.assertEqual(self.take(buckets, bucket, now=100.0), (bucket, 0.5))
+        self.assertEqual(self.take(buckets, bucket, now=100.25), (bucket, 0.25))
+        self.assertEqual(self.take(buckets, bucket, now=100.5), (None, 0.0))
+
+    def test_refill_is_capped_at_capacity(self):
+        buckets = LocalBuckets()
+        bucket = Bucket('b', 'user', 'read', rate=1, capacity=2, cost=2)
+        self.assertEqual(self.take(buckets, bucket, now=100.0), (None, 0.0))
+        self.assertEqual(self.take(buckets, bucket, now=200.0), (None, 0.0))
+        self.assertEqual(self.take(buckets, bucket, now=200.0), (bucket, 2.0))
+
+    def test_charges_every_bucket_or_none(self):
+        buckets = LocalBuckets()
+        roomy = Bucket('roomy', 'organization', 'read', rate=1, capacity=10, cost=1)
+        tight = Bucket('tight', 'user', 'read', rate=1, capacity=1, cost=1)
+        self.assertEqual(self.take(buckets, roomy, tight, now=100.0), (None, 0.0))
+        self.assertEqual(self.take(buckets, roomy, tight, now=100.0), (tight, 1.0))
+        self.assertEqual(buckets._buckets['roomy'], (9, 100.0))
+
+    def test_reports_the_bucket_that_refills_last(self):
+        buckets = LocalBuckets()
+        slow = Bucket('slow', 'user', 'expensive', rate=0.5, capacity=1, cost=2)
+        fast = Bucket('fast', 'user', 'read', rate=1, capacity=1, cost=2)
+        self.assertEqual(self.take(buckets, fast, slow, now=100.0), (slow, 2.0))
+
+    def test_forgets_least_recently_used_buckets(self):
+        buckets = LocalBuckets(max_buckets=2)
+        for key in ('a', 'b', 'c'):
+            self.take(buckets, Bucket(key, 'user', 'read', rate=1, capacity=1, cost=1), now=100.0)
+        self.assertEqual(list(buckets._buckets), ['b', 'c'])
+
+class RateLimiterTests(FakeRedisMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.organization = create_tenant()
+        self.request = RequestFactory().post('/graphql/')
+        self.request.user = self.user
+        self.request.organization = self.organization
+
+    def test_buckets_per_organization_and_user(self):
+        buckets = rate_limiter.buckets(self.request, {'read': 1, 'expensive': 2})
+        self.assertEqual([(bucket.key, bucket.cost) for bucket in buckets], [(f'pm_rl:org:{self.organization.pk}:read', 1), (f'pm_rl:org:{self.organization.pk}:expensive', 2), (f'pm_rl:user:{self.user.pk}:read', 1), (f'pm_rl:user:{self.user.pk}:expensive', 2)])
+
+    @override_settings(GRAPHQL_TENANT_LIMITS={'acme': {'rate_limits': {'user': {'read': (3, 30)}}}})
+    def test_tenant_rates_override_the_defaults(self):
+        buckets = rate_limiter.buckets(self.request, {'read': 1})
+        self.assertEqual([(bucket.scope, bucket.rate, bucket.capacity) for bucket in buckets], [('organization', 50, 500), ('user', 3, 30)])
+
+    @override_settings(GRAPHQL_RATE_LIMITS=READ_LIMITS)
+    def test_check_raises_once_the_bucket_is_empty(self):
+        rate_limiter.check(self.request, {'read': 2})
+        with self.assertRaises(Throttled) as raised:
+            rate_limiter.check(self.request, {'read': 1})
+        self.assertEqual((raised.exception.budget, raised.exception.scope), ('read', 'user'))
+        self.assertGreater(raised.exception.retry_after, 0)
+        self.assertEqual(rate_limiter.stats, {('allowed', 'user', 'read'): 1, ('throttled', 'user', 'read'): 1})
+
+    @skipUnless(importlib.util.find_spec('lupa'), 'fakeredis needs lupa to run Lua scripts')
+    @override_settings(GRAPHQL_RATE_LIMITS=READ_LIMITS)
+    def test_buckets_live_in_redis(self):
+        rate_limiter.check(self.request, {'read': 1})
+        self.assertEqual(rate_limiter.redis_errors, 0)
+        self.assertEqual(float(self.redis.hget(f'pm_rl:user:{self.user.pk}:read', 'tokens')), 1)
+        self.assertEqual(rate_limiter.local._buckets, {})
+
+    @override_settings(GRAPHQL_RATE_LIMITS=READ_LIMITS)
+    def test_falls_back_to_local_buckets(self):
+        script = mock.Mock(side_effect=redis.ConnectionError('down'))
+        self.patch(rate_limiter, _script=script)
+        with self.assertLogs('cache', 'WARNING') as logs:
+            rate_limiter.check(self.request, {'read': 2})
+            self.assertRaises(Throttled, rate_limiter.check, self.request, {'read': 1})
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual((script.call_count, rate_limiter.redis_errors), (1, 1))
+        self.assertIn(f'pm_rl:user:{self.user.pk}:read', rate_limiter.local._buckets)
+
+    @override_settings(GRAPHQL_RATE_LIMITS=READ_LIMITS)
+    def test_error_replies_do_not_open_the_breaker(self):
+        self.patch(rate_limiter, _script=mock.Mock(side_effect=redis.ResponseError('NOSCRIPT')))
+        with self.assertLogs('project_management.throttling', 'ERROR'):
+            rate_limiter.check(self.request, {'read': 1})
+        self.assertFalse(redis_breaker.failing)
+
+    @override_settings(GRAPHQL_RATE_LIMITS=READ_LIMITS)
+    def test_view_returns_429_with_retry_after(self):
+        for _ in range(2):
+            self.assertEqual(graphql(self.user, PROJECTS_QUERY).status_code, 200)
+        response = graphql(self.user, PROJECTS_QUERY)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(json.loads(response.content)['errors'][0]['extensions']['code'], 'RATE_LIMITED')
+
+class StatementTimeoutTests(FakeRedisMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.organization = create_tenant()
+
+    @override_settings(GRAPHQL_STATEMENT_TIMEOUT_MS=250)
+    def test_timeout_is_set_before_resolver_sql_and_reset_after(self):
+        statements = []
+        execute = SQLiteCursorWrapper.execute
+
+        def record(cursor, sql, params=None):
+            statements.append(sql)
+            # SQLite has no statement_timeout; keep the statements, skip running them.
+            if sql.split()[0] in ('SET', 'RESET'):
+                return cursor
+            return execute(cursor, sql, params)
+        with mock.patch.object(connections['default'], 'vendor', 'postgresql'), mock.patch.object(SQLiteCursorWrapper, 'execute', record):
+            response = graphql(self.user, PROJECTS_QUERY)
+        self.assertEqual(response.status_code, 200, response.content)
+        resolver_sql = next((i for i, sql in enumerate(statements) if 'FROM "projects_project"' in sql))
+        self.assertIn('SET statement_timeout = 250', statements[:resolver_sql])
+        self.assertEqual(statements[-1], 'RESET statement_timeout')
+        self.assertEqual(statements.count('SET statement_timeout = 250'), 1)
@@ -0,0 +1,25 @@
+from django.test import TestCase
+from django.utils.functional import SimpleLazyObject, empty
+from organizations.models import Organization
+from project_management.throttling import rate_limiter
+from .utils import FakeRedisMixin, create_tenant, graphql
+PROJECTS_QUERY = 'query Projects { projects(first: 5) { edges { node { name } } } }'
+
+class RequestStateTests(FakeRedisMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.organization = create_tenant()
+
+    def test_lazy_organization_is_resolved_before_execution(self):
+        organization = SimpleLazyObject(lambda: Organization.objects.get(slug='acme'))
+        response = graphql(self.user, PROJECTS_QUERY, organization=organization)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertIsNot(organization._wrapped, empty)
+        self.assertEqual(rate_limiter.stats['allowed', 'organization', 'read'], 1)
+
+    def test_inaccessible_organization_counts_as_none(self):
+        response = graphql(self.user, PROJECTS_QUERY, organization=SimpleLazyObject(lambda: None))
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(rate_limiter.stats['allowed', 'organization', 'read'], 0)
+        self.assertEqual(rate_limiter.stats['allowed', 'user', 'read'], 1)
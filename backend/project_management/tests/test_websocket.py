@@ -0,0 +1,155 @@
+import asyncio
+import json
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import TransactionTestCase
+from project_management import subscriptions
+from project_management.schema import schema
+from project_management.subscriptions import InMemoryChannelLayer, comment_channel, project_stats_channel, task_channel
+from project_management.websocket import PROTOCOL, GraphQLWebSocket
+from .utils import FakeRedisMixin, create_tenant
+TASK_CHANGED = 'subscription Changed($projectId: ID!) { taskChanged(projectId: $projectId) { action task { title } } }'
+COMMENT_ADDED = 'subscription Added($taskId: ID!) { commentAdded(taskId: $taskId) { content } }'
+PROJECT_STATS = 'subscription Stats($organizationId: ID!) { projectStatsChanged(organizationId: $organizationId) { name } }'
+
+class Socket:
+    """One WebSocket connection to ``GraphQLWebSocket``, driven the way an ASGI server would."""
+
+    def __init__(self, cookie=None, subprotocols=(PROTOCOL,), origin=None):
+        headers = [] if cookie is None else [(b'cookie', cookie.encode())]
+        if origin is not None:
+            headers.append((b'origin', origin.encode()))
+        self.incoming = asyncio.Queue()
+        self.outgoing = asyncio.Queue()
+        self.incoming.put_nowait({'type': 'websocket.connect'})
+        scope = {'type': 'websocket', 'path': '/graphql/', 'subprotocols': list(subprotocols), 'headers': headers}
+        self.task = asyncio.ensure_future(GraphQLWebSocket(schema)(scope, self.incoming.get, self.outgoing.put))
+
+    async def send(self, message):
+        await self.incoming.put({'type': 'websocket.receive', 'text': json.dumps(message)})
+
+    async def receive(self):
+        message = await asyncio.wait_for(self.outgoing.get(), 5)
+        return json.loads(message['text']) if message['type'] == 'websocket.send' else message
+
+    async def open(self):
+        assert (await self.receive())['type'] == 'websocket.accept'
+        await self.send({'type': 'connection_init'})
+        assert await self.receive() == {'type': 'connection_ack'}
+
+    async def disconnect(self):
+        await self.incoming.put({'type': 'websocket.disconnect'})
+        await asyncio.wait_for(self.task, 5)
+
+class WebSocketTests(FakeRedisMixin, TransactionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.owner, self.organization = create_tenant()
+        self.project = self.organization.projects.get()
+        self.task = self.project.tasks.order_by('pk').first()
+        self.member = User.objects.create_user('member', 'member@example.com', 'password')
+        self.organization.members.add(self.member)
+        self.other_user, _ = create_tenant('other', 'globex')
+        self.layer = InMemoryChannelLayer()
+        self.patch(subscriptions, _channel_layer=self.layer)
+
+    def cookie(self, user):
+        self.client.force_login(user)
+        return f'{settings.SESSION_COOKIE_NAME}={self.client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+    async def subscribed(self, channel):
+        while channel not in self.layer._subscribers:
+            await asyncio.sleep(0.01)
+
+    def run_socket(self, scenario):
+        async def run():
+            try:
+                await asyncio.wait_for(scenario(), 10)
+            finally:
+                for task in asyncio.all_tasks() - {asyncio.current_task()}:
+                    task.cancel()
+        async_to_sync(run)()
+
+    def test_delivers_events_for_each_subscription(self):
+        cookie = self.cookie(self.member)
+
+        async def scenario():
+            socket = Socket(cookie)
+            await socket.open()
+            await socket.send({'type': 'subscribe', 'id': 'tasks', 'payload': {'query': TASK_CHANGED, 'variables': {'projectId': str(self.project.pk)}}})
+            await socket.send({'type': 'subscribe', 'id': 'stats', 'payload': {'query': PROJECT_STATS, 'variables': {'organizationId': str(self.organization.pk)}}})
+            await self.subscribed(task_channel(self.organization.pk, self.project.pk))
+            await self.subscribed(project_stats_channel(self.organization.pk))
+            self.layer.publish(task_channel(self.organization.pk, self.project.pk), {'id': self.task.pk, 'action': 'updated'})
+            self.assertEqual(await socket.receive(), {'type': 'next', 'id': 'tasks', 'payload': {'data': {'taskChanged': {'action': 'updated', 'task': {'title': self.task.title}}}}})
+            self.layer.publish(project_stats_channel(self.organization.pk), {'id': self.project.pk})
+            self.assertEqual(await socket.receive(), {'type': 'next', 'id': 'stats', 'payload': {'data': {'projectStatsChanged': {'name': 'Project 0'}}}})
+            await socket.send({'type': 'complete', 'id': 'tasks'})
+            while task_channel(self.organization.pk, self.project.pk) in self.layer._subscribers:
+                await asyncio.sleep(0.01)
+            await socket.disconnect()
+            self.assertEqual(self.layer._subscribers, {})
+        self.run_socket(scenario)
+
+    def test_stops_delivering_once_access_is_revoked(self):
+        cookie = self.cookie(self.member)
+        channel = comment_channel(self.organization.pk, self.task.pk)
+
+        async def scenario():
+            socket = Socket(cookie)
+            await socket.open()
+            await socket.send({'type': 'subscribe', 'id': '1', 'payload': {'query': COMMENT_ADDED, 'variables': {'taskId': str(self.task.pk)}}})
+            await self.subscribed(channel)
+            comment = await self.task.comments.acreate(content='Hello', author_email='owner@example.com')
+            self.layer.publish(channel, {'id': comment.pk})
+            self.assertEqual(await socket.receive(), {'type': 'next', 'id': '1', 'payload': {'data': {'commentAdded': {'content': 'Hello'}}}})
+            await sync_to_async(self.organization.members.remove)(self.member)
+            self.layer.publish(channel, {'id': comment.pk})
+            message = await socket.receive()
+            self.assertEqual((message['type'], message['payload'][0]['message']), ('error', 'Permission denied!'))
+            await socket.disconnect()
+        self.run_socket(scenario)
+
+    def test_rejects_foreign_and_anonymous_subscriptions(self):
+        cookies = {'other': self.cookie(self.other_user), 'anonymous': None}
+
+        async def scenario():
+            for name, cookie in cookies.items():
+                socket = Socket(cookie)
+                await socket.open()
+                await socket.send({'type': 'subscribe', 'id': '1', 'payload': {'query': TASK_CHANGED, 'variables': {'projectId': str(self.project.pk)}}})
+                message = await socket.receive()
+                self.assertEqual((message['type'], message['payload'][0]['message']), ('error', 'Not logged in!' if name == 'anonymous' else 'Permission denied!'))
+                await socket.disconnect()
+        self.run_socket(scenario)
+
+    def test_serves_only_subscriptions(self):
+        cookie = self.cookie(self.owner)
+
+        async def scenario():
+            socket = Socket(cookie)
+            await socket.open()
+            await socket.send({'type': 'subscribe', 'id': '1', 'payload': {'query': '{ me { username } }'}})
+            message = await socket.receive()
+            self.assertEqual(message['type'], 'error')
+            self.assertIn('Only subscriptions are served over WebSocket', message['payload'][0]['message'])
+            await socket.disconnect()
+        self.run_socket(scenario)
+
+    def test_protocol_errors_close_the_connection(self):
+        cookie = self.cookie(self.owner)
+
+        async def scenario():
+            for socket, expected in [(Socket(cookie, subprotocols=()), 4403), (Socket(cookie, origin='https://evil.example.com'), 4403)]:
+                self.assertEqual(await socket.receive(), {'type': 'websocket.close', 'code': expected})
+            socket = Socket(cookie)
+            await socket.receive()
+            await socket.send({'type': 'subscribe', 'id': '1', 'payload': {'query': TASK_CHANGED}})
+            self.assertEqual(await socket.receive(), {'type': 'websocket.close', 'code': 4401, 'reason': 'Unauthorized'})
+            socket = Socket(cookie)
+            await socket.open()
+            await socket.send({'type': 'connection_init'})
+            self.assertEqual((await socket.receive())['code'], 4429)
+        self.run_socket(scenario)
@@ -0,0 +1,68 @@
+import json
+import weakref
+from collections import Counter
+from unittest import mock
+import fakeredis
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import AsyncRequestFactory
+import cache
+from organizations.models import Organization
+from projects.models import Project
+from tasks.models import Task
+from project_management.documents import LRUCache, persisted_queries
+from project_management.throttling import LocalBuckets, rate_limiter
+from project_management.views import CostLimitedGraphQLView
+SMART_CACHES = (cache.org_cache, cache.project_cache, cache.task_cache, cache.comment_cache, cache.response_cache)
+
+class FakeRedisMixin:
+    """Point every SmartCache, the rate limiter and the persisted query store at a fresh fakeredis server per test."""
+
+    def setUp(self):
+        super().setUp()
+        self.redis_server = fakeredis.FakeServer()
+        self.redis = self.fake_redis()
+        for cache_instance in SMART_CACHES:
+            self.patch(cache_instance, redis_client=self.redis, async_redis_factory=self.fake_async_redis, _async_clients=weakref.WeakKeyDictionary(), stats={'hits': 0, 'misses': 0, 'errors': 0})
+        self.patch(rate_limiter, _script=None, local=LocalBuckets(), stats=Counter(), redis_errors=0)
+        self.patch(cache, _listener=None)
+        self.addCleanup(stop_invalidation_listener)
+        cache.redis_breaker.reset()
+        self.addCleanup(cache.redis_breaker.reset)
+        self.patch(persisted_queries, redis_client=self.redis, _manifest={}, _queries=LRUCache(100))
+
+    def patch(self, target, **attributes):
+        for name, value in attributes.items():
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def fake_redis(self):
+        return fakeredis.FakeRedis(server=self.redis_server, decode_responses=True)
+
+    def fake_async_redis(self):
+        return fakeredis.FakeAsyncRedis(server=self.redis_server, decode_responses=True)
+
+def stop_invalidation_listener():
+    if cache._listener is not None:
+        cache._listener.stop()
+
+def create_tenant(username='owner', slug='acme', projects=1, tasks=3):
+    """A user owning one organization with ``projects`` projects of ``tasks`` tasks each."""
+    user = User.objects.create_user(username, f'{username}@example.com', 'password')
+    organization = Organization.objects.create(name=slug.title(), slug=slug, contact_email=f'team@{slug}.example.com', owner=user)
+    for p in range(projects):
+        project = Project.objects.create(organization=organization, name=f'Project {p}', created_by=user)
+        for t in range(tasks):
+            Task.objects.create(project=project, title=f'Task {p}.{t}', created_by=user)
+    return (user, organization)
+
+def graphql(user, query, variables=None, organization=None, headers=None, view=None, extensions=None):
+    """POST ``query`` to the async GraphQL view as ``user`` and return the ``HttpResponse``."""
+    body = {'query': query, 'variables': variables or {}}
+    if extensions is not None:
+        body['extensions'] = extensions
+    request = AsyncRequestFactory().post('/graphql/', json.dumps(body), content_type='application/json', headers=headers or {})
+    request.user = user
+    request.organization = organization
+    return async_to_sync(view or CostLimitedGraphQLView.as_view())(request)
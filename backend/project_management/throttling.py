@@ -0,0 +1,215 @@
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import ExitStack
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from graphql import FragmentDefinitionNode, OperationType
+from graphql.execution.collect_fields import collect_fields
+import redis
+from cache import REDIS_ERRORS, org_cache, redis_breaker
+logger = logging.getLogger(__name__)
+BUCKET_PREFIX = 'pm_rl'
+LOCAL_MAX_BUCKETS = 10000
+# KEYS are bucket keys; ARGV holds ``rate, capacity, cost`` for each of them.
+# Tokens are taken from every bucket or from none, using Redis' clock so all
+# workers agree on refills. Returns ``{0, '0'}`` once charged, otherwise the
+# 1-based index of the bucket that refills last and the seconds it needs.
+TOKEN_BUCKET_SCRIPT = '\nlocal clock = redis.call(\'TIME\')\nlocal now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000\nlocal tokens = {}\nlocal wait, limiting = 0, 0\nfor i, key in ipairs(KEYS) do\n    local rate, capacity, cost = tonumber(ARGV[i * 3 - 2]), tonumber(ARGV[i * 3 - 1]), tonumber(ARGV[i * 3])\n    local state = redis.call(\'HMGET\', key, \'tokens\', \'ts\')\n    local available = tonumber(state[1]) or capacity\n    local elapsed = math.max(0, now - (tonumber(state[2]) or now))\n    tokens[i] = math.min(capacity, available + elapsed * rate)\n    if tokens[i] < cost and (cost - tokens[i]) / rate > wait then\n        wait, limiting = (cost - tokens[i]) / rate, i\n    end\nend\nif wait > 0 then\n    return {limiting, tostring(wait)}\nend\nfor i, key in ipairs(KEYS) do\n    local rate, capacity, cost = tonumber(ARGV[i * 3 - 2]), tonumber(ARGV[i * 3 - 1]), tonumber(ARGV[i * 3])\n    redis.call(\'HSET\', key, \'tokens\', tostring(tokens[i] - cost), \'ts\', tostring(now))\n    redis.call(\'PEXPIRE\', key, math.ceil(capacity / rate * 1000) + 1000)\nend\nreturn {0, \'0\'}\n'
+
+class Throttled(Exception):
+    """The request's rate limit is used up; ``retry_after`` is the number of seconds until it can be retried."""
+
+    def __init__(self, budget, scope, retry_after):
+        super().__init__(f'Rate limit exceeded for {budget} operations; retry in {retry_after:.1f}s.')
+        self.budget = budget
+        self.scope = scope
+        self.retry_after = retry_after
+
+class Bucket:
+    """One token bucket: ``capacity`` tokens, refilled at ``rate`` per second."""
+
+    def __init__(self, key, scope, budget, rate, capacity, cost):
+        self.key = key
+        self.scope = scope
+        self.budget = budget
+        self.rate = rate
+        self.capacity = capacity
+        self.cost = cost
+
+class LocalBuckets:
+    """Process-local token buckets, used while Redis is unreachable.
+
+    Each worker then enforces the limits on its own, so a tenant can use up
+    to one budget per worker until Redis is back.
+    """
+
+    def __init__(self, max_buckets=LOCAL_MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, buckets):
+        """``(None, 0.0)`` once every bucket is charged, else ``(bucket that refills last, seconds it needs)`` with nothing charged."""
+        now = time.monotonic()
+        with self._lock:
+            tokens = []
+            limiting, wait = (None, 0.0)
+            for bucket in buckets:
+                available, updated = self._buckets.get(bucket.key, (bucket.capacity, now))
+                tokens.append(min(bucket.capacity, available + (now - updated) * bucket.rate))
+                if tokens[-1] < bucket.cost and (bucket.cost - tokens[-1]) / bucket.rate > wait:
+                    limiting, wait = (bucket, (bucket.cost - tokens[-1]) / bucket.rate)
+            if limiting is not None:
+                return (limiting, wait)
+            for bucket, available in zip(buckets, tokens):
+                self._buckets[bucket.key] = (available - bucket.cost, now)
+                self._buckets.move_to_end(bucket.key)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+            return (None, 0.0)
+
+class RateLimiter:
+    """Token-bucket rate limits per organization and per user, kept in Redis.
+
+    Every operation spends from the ``read`` or ``mutation`` budget, and root
+    fields listed in ``GRAPHQL_EXPENSIVE_FIELDS`` also spend one token each
+    from the ``expensive`` budget. Buckets exist for the request's
+    organization and for its user (or client address when anonymous), with
+    rates from ``GRAPHQL_RATE_LIMITS`` overridden per tenant by
+    ``GRAPHQL_TENANT_LIMITS[slug]['rate_limits']``. All buckets are charged
+    atomically by one Lua script; if Redis fails, ``LocalBuckets`` takes over,
+    and while ``redis_breaker`` is open Redis is not tried at all.
+    """
+
+    def __init__(self, redis_client=None):
+        self._redis_client = redis_client
+        self._script = None
+        self.local = LocalBuckets()
+        self.stats = Counter()
+        self.redis_errors = 0
+        self._lock = threading.Lock()
+
+    @property
+    def redis_client(self):
+        return self._redis_client or org_cache.redis_client
+
+    def count(self, outcome, buckets):
+        with self._lock:
+            for bucket in buckets:
+                self.stats[outcome, bucket.scope, bucket.budget] += 1
+
+    def buckets(self, request, costs):
+        limits = settings.GRAPHQL_RATE_LIMITS
+        tenant = tenant_limits(request).get('rate_limits', {})
+        organization = getattr(request, 'organization', None)
+        user = getattr(request, 'user', None)
+        identities = []
+        if organization is not None:
+            identities.append(('organization', f'org:{organization.pk}'))
+        if user is not None and user.is_authenticated:
+            identities.append(('user', f'user:{user.pk}'))
+        else:
+            identities.append(('client', f"ip:{request.META.get('REMOTE_ADDR', '')}"))
+        buckets = []
+        for scope, identity in identities:
+            for budget, cost in costs.items():
+                rate, capacity = tenant.get(scope, {}).get(budget) or limits.get(scope, {}).get(budget) or (None, None)
+                if cost and rate:
+                    buckets.append(Bucket(f'{BUCKET_PREFIX}:{identity}:{budget}', scope, budget, rate, capacity, cost))
+        return buckets
+
+    def take(self, buckets):
+        """``LocalBuckets.take`` against the shared buckets in Redis."""
+        if not redis_breaker.allow():
+            return self.local.take(buckets)
+        try:
+            if self._script is None:
+                self._script = self.redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+            limiting, wait = self._script(keys=[bucket.key for bucket in buckets], args=[value for bucket in buckets for value in (bucket.rate, bucket.capacity, bucket.cost)], client=self.redis_client)
+            redis_breaker.success()
+            return (buckets[int(limiting) - 1], float(wait)) if int(limiting) else (None, 0.0)
+        except Exception as e:
+            self.redis_errors += 1
+            # An unreachable Redis is logged once per outage by the breaker;
+            # an error reply means the script itself is broken.
+            if isinstance(e, REDIS_ERRORS) and (not isinstance(e, redis.ResponseError)):
+                redis_breaker.failure(e)
+            else:
+                logger.error(f'Rate limiter Redis error, using local buckets: {e}')
+            return self.local.take(buckets)
+
+    def check(self, request, costs):
+        """Charge ``costs`` (``{budget: tokens}``) to the request's buckets, raising ``Throttled`` if any is empty."""
+        buckets = self.buckets(request, costs)
+        if not buckets:
+            return
+        limiting, wait = self.take(buckets)
+        if limiting is not None:
+            self.count('throttled', [limiting])
+            raise Throttled(limiting.budget, limiting.scope, wait)
+        self.count('allowed', buckets)
+rate_limiter = RateLimiter()
+
+def tenant_limits(request):
+    """The ``GRAPHQL_TENANT_LIMITS`` entry for the request's organization, or ``{}``."""
+    organization = getattr(request, 'organization', None)
+    return settings.GRAPHQL_TENANT_LIMITS.get(getattr(organization, 'slug', None), {})
+
+def operation_costs(schema, document, operation_ast, variables):
+    """Tokens ``{budget: count}`` an operation spends: one read or mutation, plus one per expensive root field."""
+    if operation_ast is None:
+        return {}
+    mutation = operation_ast.operation == OperationType.MUTATION
+    root_type = schema.mutation_type if mutation else schema.query_type
+    fragments = {definition.name.value: definition for definition in document.definitions if isinstance(definition, FragmentDefinitionNode)}
+    fields = collect_fields(schema, fragments, variables or {}, root_type, operation_ast.selection_set)
+    expensive = sum((len(nodes) for nodes in fields.values() if nodes[0].name.value in settings.GRAPHQL_EXPENSIVE_FIELDS))
+    return {'mutation' if mutation else 'read': 1, 'expensive': expensive}
+
+class StatementTimeout:
+    """Apply the tenant's ``statement_timeout_ms`` (default ``GRAPHQL_STATEMENT_TIMEOUT_MS``) to PostgreSQL queries run inside the block.
+
+    An ``execute_wrapper`` sets the timeout on each connection before its
+    first query, and leaving the block resets it so persistent connections do
+    not carry it into other requests. On the event loop use ``async with``:
+    resolvers query through the connections of the request's worker thread,
+    so the wrappers are installed, and the timeout reset, there.
+    """
+
+    def __init__(self, request):
+        self.timeout_ms = tenant_limits(request).get('statement_timeout_ms', settings.GRAPHQL_STATEMENT_TIMEOUT_MS)
+        self.applied = []
+        self.stack = ExitStack()
+
+    def __enter__(self):
+        if self.timeout_ms:
+            for alias in settings.DATABASES:
+                if connections[alias].vendor == 'postgresql':
+                    self.stack.enter_context(connections[alias].execute_wrapper(self.apply))
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stack.close()
+        self.reset()
+
+    async def __aenter__(self):
+        return await sync_to_async(self.__enter__)()
+
+    async def __aexit__(self, *exc_info):
+        await sync_to_async(self.__exit__)(*exc_info)
+
+    def apply(self, execute, sql, params, many, context):
+        if context['connection'] not in self.applied:
+            # The DB-API cursor skips the execute wrappers, this one included.
+            context['cursor'].cursor.execute(f'SET statement_timeout = {int(self.timeout_ms)}')
+            self.applied.append(context['connection'])
+        return execute(sql, params, many, context)
+
+    def reset(self):
+        for connection in self.applied:
+            with connection.cursor() as cursor:
+                cursor.execute('RESET statement_timeout')
+        self.applied = []
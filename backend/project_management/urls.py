@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.urls import path, include
 from django.views.decorators.csrf import csrf_exempt
-from graphene_django.views import GraphQLView
 from .health_check import health_check
-urlpatterns = [path('admin/', admin.site.urls), path('health/', health_check, name='health_check'), path('graphql/', csrf_exempt(GraphQLView.as_view(graphiql=True)))]
\ No newline at end of file
+from .metrics import metrics
+from tasks.views import export_tasks
+from .views import CostLimitedGraphQLView
+urlpatterns = [path('admin/', admin.site.urls), path('health/', health_check, name='health_check'), path('metrics/', metrics, name='metrics'), path('graphql/', csrf_exempt(CostLimitedGraphQLView.as_view(graphiql=True))), path('<slug:org_slug>/export/tasks/', export_tasks, name='export_tasks')]
\ No newline at end of file
@@ -0,0 +1,256 @@
+import inspect
+import json
+import math
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed, HttpResponseNotModified
+from django.utils.functional import SimpleLazyObject
+from graphene.validation import depth_limit_validator
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.views import GraphQLView, HttpError
+from graphql import ExecutionResult, GraphQLError, OperationType, execute, execute_sync, get_operation_ast, validate
+from .cost import query_cost_validator
+from .documents import document_cache, persisted_queries, query_hash
+from .metrics import arecord_operation, record_operation
+from .responses import aget_response, aresponse_key, astore_response, cacheable, etag_matches
+from .routers import pin_to_primary, primary_reads
+from .throttling import StatementTimeout, Throttled, operation_costs, rate_limiter, tenant_limits
+
+def query_limits(request):
+    """``(max_depth, max_cost)`` for the request's tenant, falling back to the global limits."""
+    limits = tenant_limits(request)
+    return (limits.get('max_depth', settings.GRAPHQL_MAX_DEPTH), limits.get('max_cost', settings.GRAPHQL_MAX_COST))
+
+def persisted_query_hash(request, data):
+    extensions = request.GET.get('extensions') or data.get('extensions') or {}
+    if isinstance(extensions, str):
+        try:
+            extensions = json.loads(extensions)
+        except ValueError:
+            raise HttpError(HttpResponseBadRequest('Extensions are invalid JSON.'))
+    persisted = extensions.get('persistedQuery') or {}
+    return persisted.get('sha256Hash')
+
+def load_request_state(request):
+    """Force the lazy ``request.user`` and ``request.organization`` so nothing queries for them on the event loop.
+
+    The lazy organization is replaced by what it resolves to, so ``is None``
+    checks downstream see an inaccessible slug as no organization.
+    """
+    organization = getattr(request, 'organization', None)
+    if isinstance(organization, SimpleLazyObject):
+        organization._setup()
+        organization = request.organization = organization._wrapped
+    return (request.user.is_authenticated, organization)
+
+def throttled_error(error):
+    return {'message': str(error), 'extensions': {'code': 'RATE_LIMITED', 'budget': error.budget, 'scope': error.scope, 'retryAfter': round(error.retry_after, 3)}}
+
+def operation_name_of(operation_ast, options):
+    return operation_ast.name.value if operation_ast and operation_ast.name else options['operation_name']
+
+class CostLimitedGraphQLView(GraphQLView):
+    """GraphQL endpoint with a parsed-document cache, persisted queries and cost limits.
+
+    Documents are parsed and validated once per distinct query text and reused
+    from ``document_cache``. Clients may send only an APQ ``sha256Hash``; unknown
+    hashes are registered the first time the full text accompanies them and
+    passes validation, unless ``GRAPHQL_PERSISTED_QUERIES_ONLY`` restricts the
+    endpoint to operations that are already registered. Over-deep or over-budget operations are rejected
+    before execution and the estimated cost is reported under ``extensions.cost``.
+    Operations are then charged to the caller's rate limits (see
+    ``throttling.RateLimiter``); throttled requests get a 429 with a
+    ``Retry-After`` header, and the rest run under the tenant's PostgreSQL
+    ``statement_timeout``.
+
+    With ``GRAPHQL_RESPONSE_CACHE_SECONDS`` set, error-free query responses
+    for signed-in users are cached whole (see ``responses``) and sent with a
+    strong ``ETag``; a matching ``If-None-Match`` gets a 304, and cache hits
+    skip execution entirely.
+
+    The view is async. Queries execute on the event loop so ``async def``
+    resolvers can await the ORM and Redis, with ``SyncResolverMiddleware``
+    moving the remaining resolvers to the request's worker thread. Mutations
+    take the synchronous path in that thread, so ``ATOMIC_MUTATIONS`` still
+    wraps them in a transaction.
+    """
+    view_is_async = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        await sync_to_async(load_request_state)(request)
+        try:
+            if request.method.lower() not in ('get', 'post'):
+                raise HttpError(HttpResponseNotAllowed(['GET', 'POST'], 'GraphQL only supports GET and POST requests.'))
+            data = self.parse_body(request)
+            if self.graphiql and self.can_display_graphiql(request, data):
+                return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+            if self.batch:
+                responses = [await self.get_response_async(request, entry) for entry in data]
+                result = '[{}]'.format(','.join((response[0] for response in responses)))
+                status_code = responses and max(responses, key=lambda response: response[1])[1] or 200
+            else:
+                result, status_code = await self.get_response_async(request, data)
+                etag = getattr(request, '_response_etag', None)
+                if etag is not None:
+                    response = HttpResponseNotModified() if etag_matches(request, etag) else HttpResponse(status=status_code, content=result, content_type='application/json')
+                    response['ETag'] = etag
+                    response['Cache-Control'] = 'private, no-cache'
+                    return response
+            return HttpResponse(status=status_code, content=result, content_type='application/json')
+        except Throttled as e:
+            response = HttpResponse(status=429, content=self.json_encode(request, {'errors': [throttled_error(e)]}), content_type='application/json')
+            response['Retry-After'] = str(math.ceil(e.retry_after))
+            return response
+        except HttpError as e:
+            response = e.response
+            response['Content-Type'] = 'application/json'
+            response.content = self.json_encode(request, {'errors': [self.format_error(e)]})
+            return response
+
+    async def get_response_async(self, request, data):
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+        operation = await sync_to_async(self.prepare_operation)(request, data, query, variables, operation_name)
+        key = None
+        if isinstance(operation, ExecutionResult):
+            execution_result = operation
+        elif operation[1] and operation[1].operation == OperationType.MUTATION:
+            pin_to_primary()
+            execution_result = await sync_to_async(self.execute_operation)(request, *operation)
+        elif not self.batch and cacheable(request, operation[1]):
+            document, operation_ast, options = operation
+            key = await aresponse_key(request, document, operation_name_of(operation_ast, options), options['variable_values'])
+            cached = key and await aget_response(key)
+            if cached:
+                request._response_etag = cached['etag']
+                return (cached['body'], 200)
+            # Like cached resolvers, a miss reads the primary so replica lag
+            # cannot store stale data under the version read above.
+            with primary_reads():
+                execution_result = await self.execute_operation_async(request, *operation)
+        else:
+            execution_result = await self.execute_operation_async(request, *operation)
+        status_code = 200
+        response = {}
+        if execution_result.errors:
+            response['errors'] = [self.format_error(e) for e in execution_result.errors]
+        if execution_result.errors and any((not getattr(e, 'path', None) for e in execution_result.errors)):
+            status_code = 400
+        else:
+            response['data'] = execution_result.data
+        if self.batch:
+            response['id'] = id
+            response['status'] = status_code
+        result = self.json_encode(request, response)
+        if key is not None and (not execution_result.errors):
+            request._response_etag = await astore_response(key, result)
+        return (result, status_code)
+
+    def resolve_query(self, request, data, query):
+        """Return ``(query, digest, register)`` after applying the persisted query protocol.
+
+        ``register`` is true for an APQ hash seen for the first time; the
+        caller stores it only once the document has passed validation.
+        """
+        digest = persisted_query_hash(request, data)
+        if digest is None:
+            if not query or not settings.GRAPHQL_PERSISTED_QUERIES_ONLY:
+                return (query, None, False)
+            digest = query_hash(query)
+            if persisted_queries.get(digest) is None:
+                raise GraphQLError('Only persisted queries are accepted.', extensions={'code': 'PERSISTED_QUERY_NOT_ALLOWED'})
+            return (query, digest, False)
+        if not query:
+            query = persisted_queries.get(digest)
+            if query is None:
+                raise GraphQLError('PersistedQueryNotFound', extensions={'code': 'PERSISTED_QUERY_NOT_FOUND'})
+            return (query, digest, False)
+        if query_hash(query) != digest:
+            raise GraphQLError('Provided sha256Hash does not match query.', extensions={'code': 'PERSISTED_QUERY_HASH_MISMATCH'})
+        if persisted_queries.get(digest) is None:
+            if settings.GRAPHQL_PERSISTED_QUERIES_ONLY:
+                raise GraphQLError('Only persisted queries are accepted.', extensions={'code': 'PERSISTED_QUERY_NOT_ALLOWED'})
+            return (query, digest, True)
+        return (query, digest, False)
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        try:
+            operation = self.prepare_operation(request, data, query, variables, operation_name, show_graphiql)
+        except Throttled as e:
+            return ExecutionResult(errors=[GraphQLError(**throttled_error(e))])
+        if operation is None or isinstance(operation, ExecutionResult):
+            return operation
+        return self.execute_operation(request, *operation)
+
+    def prepare_operation(self, request, data, query, variables, operation_name, show_graphiql=False):
+        """Parse, validate and cost-check the request, returning ``(document, operation_ast, options)``.
+
+        An ``ExecutionResult`` is returned instead when the operation must not run,
+        and ``Throttled`` is raised when it exceeds the caller's rate limits.
+        """
+        try:
+            query, digest, register = self.resolve_query(request, data, query)
+        except GraphQLError as e:
+            return ExecutionResult(errors=[e])
+        if not query:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest('Must provide query string.'))
+        try:
+            document, validation_errors = document_cache.get(self.schema, query, digest)
+        except GraphQLError as e:
+            return ExecutionResult(errors=[e])
+        operation_ast = get_operation_ast(document, operation_name)
+        if request.method.lower() == 'get' and operation_ast and operation_ast.operation != OperationType.QUERY:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseNotAllowed(['POST'], f'Can only perform a {operation_ast.operation.value} operation from a POST request.'))
+        if validation_errors:
+            return ExecutionResult(errors=validation_errors)
+        if operation_ast and operation_ast.operation == OperationType.SUBSCRIPTION:
+            return ExecutionResult(errors=[GraphQLError('Subscriptions are only served over WebSocket.')])
+        max_depth, max_cost = query_limits(request)
+        costs = {}
+        errors = validate(self.schema.graphql_schema, document, [depth_limit_validator(max_depth), query_cost_validator(max_cost, variables, settings.GRAPHQL_DEFAULT_LIST_SIZE, costs.update)])
+        request._query_cost = {'estimated': costs.get(operation_name or '', max(costs.values(), default=0)), 'maximum': max_cost, 'maxDepth': max_depth}
+        if errors:
+            return ExecutionResult(errors=errors)
+        if register:
+            persisted_queries.register(digest, query)
+        rate_limiter.check(request, operation_costs(self.schema.graphql_schema, document, operation_ast, variables))
+        options = {'root_value': self.get_root_value(request), 'context_value': self.get_context(request), 'variable_values': variables, 'operation_name': operation_name, 'middleware': self.get_middleware(request)}
+        if self.execution_context_class:
+            options['execution_context_class'] = self.execution_context_class
+        return (document, operation_ast, options)
+
+    def execute_operation(self, request, document, operation_ast, options):
+        resolved_name = operation_name_of(operation_ast, options)
+        try:
+            with StatementTimeout(request):
+                if operation_ast and operation_ast.operation == OperationType.MUTATION and (graphene_settings.ATOMIC_MUTATIONS is True or connection.settings_dict.get('ATOMIC_MUTATIONS', False) is True):
+                    with transaction.atomic():
+                        result = record_operation(request, resolved_name, lambda: execute_sync(self.schema.graphql_schema, document, **options))
+                        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                            transaction.set_rollback(True)
+                    return result
+                return record_operation(request, resolved_name, lambda: execute_sync(self.schema.graphql_schema, document, **options))
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+    async def execute_operation_async(self, request, document, operation_ast, options):
+
+        async def run():
+            result = execute(self.schema.graphql_schema, document, **options)
+            return await result if inspect.isawaitable(result) else result
+        try:
+            async with StatementTimeout(request):
+                return await arecord_operation(request, operation_name_of(operation_ast, options), run)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+    def json_encode(self, request, d, pretty=False):
+        cost = getattr(request, '_query_cost', None)
+        if cost is not None and isinstance(d, dict):
+            d = {**d, 'extensions': {'cost': cost}}
+        return super().json_encode(request, d, pretty)
@@ -0,0 +1,199 @@
+import asyncio
+import inspect
+import json
+from importlib import import_module
+from urllib.parse import urlparse
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import close_old_connections
+from django.http import HttpRequest
+from django.http.cookie import parse_cookie
+from django.http.request import validate_host
+from graphene.validation import depth_limit_validator
+from graphene_django.settings import graphene_settings
+from graphql import ExecutionResult, GraphQLError, OperationType, execute, get_operation_ast, validate
+from graphql.execution import create_source_event_stream
+from .cost import query_cost_validator
+from .documents import document_cache
+from .views import query_limits
+PROTOCOL = 'graphql-transport-ws'
+CONNECTION_INIT_TIMEOUT = 10
+
+class WebSocketContext:
+    """``info.context`` for operations received over a WebSocket; a fresh one is built per event."""
+
+    def __init__(self, user):
+        self.user = user
+        self.organization = None
+
+def authenticate(scope):
+    """The user owning the session cookie sent with the WebSocket handshake."""
+    headers = dict(scope.get('headers', ()))
+    request = HttpRequest()
+    request.COOKIES = parse_cookie(headers.get(b'cookie', b'').decode('latin-1'))
+    request.session = import_module(settings.SESSION_ENGINE).SessionStore(request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+    return get_user(request)
+
+def origin_allowed(scope):
+    """Reject cross-site handshakes: the session cookie would otherwise authenticate any page."""
+    origin = dict(scope.get('headers', ())).get(b'origin')
+    if origin is None:
+        return True
+    origin = origin.decode('latin-1')
+    return origin in settings.CORS_ALLOWED_ORIGINS or validate_host(urlparse(origin).hostname or '', settings.ALLOWED_HOSTS)
+
+def format_result(result):
+    payload = {'data': result.data}
+    if result.errors:
+        payload['errors'] = [error.formatted for error in result.errors]
+    return payload
+
+class GraphQLWebSocket:
+    """Serve GraphQL subscriptions over the ``graphql-transport-ws`` protocol.
+
+    Each ``subscribe`` message is validated like an HTTP operation (document
+    cache, depth and cost limits) and runs as its own task; every source event
+    is executed with a fresh context so request-scoped loaders never go stale.
+    Queries and mutations belong on the HTTP endpoint and are rejected here.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.middleware = [middleware_class() for middleware_class in graphene_settings.MIDDLEWARE]
+
+    async def __call__(self, scope, receive, send):
+        message = await receive()
+        if message['type'] != 'websocket.connect':
+            return
+        if PROTOCOL not in scope.get('subprotocols', ()) or not origin_allowed(scope):
+            await send({'type': 'websocket.close', 'code': 4403})
+            return
+        await send({'type': 'websocket.accept', 'subprotocol': PROTOCOL})
+        connection = GraphQLWebSocketConnection(self.schema, self.middleware, scope, send)
+        try:
+            await connection.run(receive)
+        finally:
+            await connection.stop()
+
+class GraphQLWebSocketConnection:
+
+    def __init__(self, schema, middleware, scope, send):
+        self.schema = schema
+        self.middleware = middleware
+        self.scope = scope
+        self.send = send
+        self.user = None
+        self.acknowledged = False
+        self.operations = {}
+        self.closed = False
+
+    async def run(self, receive):
+        init_timeout = asyncio.get_running_loop().call_later(CONNECTION_INIT_TIMEOUT, lambda: None if self.acknowledged else asyncio.ensure_future(self.close(4408, 'Connection initialisation timeout')))
+        try:
+            while not self.closed:
+                message = await receive()
+                if message['type'] == 'websocket.disconnect':
+                    return
+                if message['type'] == 'websocket.receive':
+                    await self.handle(message.get('text') or (message.get('bytes') or b'').decode())
+        finally:
+            init_timeout.cancel()
+
+    async def handle(self, text):
+        try:
+            message = json.loads(text)
+            message_type = message['type']
+        except (KeyError, TypeError, ValueError):
+            await self.close(4400, 'Invalid message received')
+            return
+        if message_type == 'connection_init':
+            if self.acknowledged:
+                await self.close(4429, 'Too many initialisation requests')
+                return
+            self.user = await sync_to_async(authenticate)(self.scope)
+            self.acknowledged = True
+            await self.send_message({'type': 'connection_ack'})
+        elif message_type == 'ping':
+            await self.send_message({'type': 'pong'})
+        elif message_type == 'pong':
+            return
+        elif message_type == 'subscribe':
+            if not self.acknowledged:
+                await self.close(4401, 'Unauthorized')
+                return
+            operation_id = message.get('id')
+            if not isinstance(operation_id, str) or not isinstance(message.get('payload'), dict):
+                await self.close(4400, 'Invalid message received')
+                return
+            if operation_id in self.operations:
+                await self.close(4409, f'Subscriber for {operation_id} already exists')
+                return
+            self.operations[operation_id] = asyncio.ensure_future(self.subscribe(operation_id, message['payload']))
+        elif message_type == 'complete':
+            task = self.operations.pop(message.get('id'), None)
+            if task is not None:
+                task.cancel()
+        else:
+            await self.close(4400, f'Unexpected message type {message_type}')
+
+    async def subscribe(self, operation_id, payload):
+        try:
+            document, errors = self.prepare(payload)
+            if errors:
+                await self.send_message({'type': 'error', 'id': operation_id, 'payload': [error.formatted for error in errors]})
+                return
+            options = {'variable_values': payload.get('variables'), 'operation_name': payload.get('operationName')}
+            stream = await create_source_event_stream(self.schema.graphql_schema, document, context_value=WebSocketContext(self.user), **options)
+            await sync_to_async(close_old_connections)()
+            if isinstance(stream, ExecutionResult):
+                await self.send_message({'type': 'error', 'id': operation_id, 'payload': [error.formatted for error in stream.errors]})
+                return
+            try:
+                async for event in stream:
+                    result = execute(self.schema.graphql_schema, document, root_value=event, context_value=WebSocketContext(self.user), middleware=self.middleware, **options)
+                    if inspect.isawaitable(result):
+                        result = await result
+                    await sync_to_async(close_old_connections)()
+                    await self.send_message({'type': 'next', 'id': operation_id, 'payload': format_result(result)})
+            except Exception as e:
+                await self.send_message({'type': 'error', 'id': operation_id, 'payload': [GraphQLError(str(e), original_error=e).formatted]})
+                return
+            finally:
+                await stream.aclose()
+            await self.send_message({'type': 'complete', 'id': operation_id})
+        finally:
+            if self.operations.get(operation_id) is asyncio.current_task():
+                del self.operations[operation_id]
+
+    def prepare(self, payload):
+        query = payload.get('query')
+        if not isinstance(query, str) or not query:
+            return (None, [GraphQLError('Must provide query string.')])
+        try:
+            document, errors = document_cache.get(self.schema, query, None)
+        except GraphQLError as e:
+            return (None, [e])
+        if errors:
+            return (None, errors)
+        operation_ast = get_operation_ast(document, payload.get('operationName'))
+        if operation_ast is None or operation_ast.operation != OperationType.SUBSCRIPTION:
+            return (None, [GraphQLError('Only subscriptions are served over WebSocket; send queries and mutations to the HTTP endpoint.')])
+        max_depth, max_cost = query_limits(WebSocketContext(self.user))
+        return (document, validate(self.schema.graphql_schema, document, [depth_limit_validator(max_depth), query_cost_validator(max_cost, payload.get('variables'), settings.GRAPHQL_DEFAULT_LIST_SIZE)]))
+
+    async def send_message(self, message):
+        if not self.closed:
+            await self.send({'type': 'websocket.send', 'text': json.dumps(message)})
+
+    async def close(self, code, reason):
+        if not self.closed:
+            self.closed = True
+            await self.send({'type': 'websocket.close', 'code': code, 'reason': reason})
+        await self.stop()
+
+    async def stop(self):
+        operations, self.operations = list(self.operations.values()), {}
+        for task in operations:
+            task.cancel()
+        await asyncio.gather(*operations, return_exceptions=True)
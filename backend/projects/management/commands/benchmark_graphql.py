@@ -0,0 +1,54 @@
+import json
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from organizations.models import Organization
+from project_management.benchmarks import SUPERUSER_OPERATIONS, benchmark, compare
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+
+class Command(BaseCommand):
+    help = 'Benchmark every GraphQL query and mutation against the generated dataset and diff the results against a stored baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organization', default='bench-org-0', help='Slug of the organization whose owner runs the benchmark')
+        parser.add_argument('--iterations', type=int, default=20, help='Executions per operation')
+        parser.add_argument('--operation', action='append', dest='operations', help='Only run this operation (repeatable)')
+        parser.add_argument('--cold-cache', action='store_true', help='Flush the caches before every execution so results measure the database path; stored under their own baseline')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Baseline JSON file, keyed by database vendor (with a -cold suffix under --cold-cache)')
+        parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline for this database vendor')
+        parser.add_argument('--threshold', type=float, default=20.0, help='Percent p95 slowdown reported as a regression')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Exit with an error when any operation regressed')
+
+    def handle(self, *args, **options):
+        organization = Organization._base_manager.select_related('owner').filter(slug=options['organization']).first()
+        if organization is None:
+            raise CommandError(f"Organization '{options['organization']}' does not exist; run generate_dataset first")
+        baseline_path = Path(options['baseline'])
+        stored = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+        vendor = f'{connection.vendor}-cold' if options['cold_cache'] else connection.vendor
+        results = benchmark(organization.owner, organization, options['iterations'], options['operations'], cold_cache=options['cold_cache'])
+        if not organization.owner.is_superuser:
+            skipped = sorted(SUPERUSER_OPERATIONS & set(options['operations'] or SUPERUSER_OPERATIONS))
+            if skipped:
+                self.stdout.write(self.style.WARNING(f"Skipping {', '.join(skipped)}: only superusers may run them and {organization.owner.username} is not one"))
+        regressions = []
+        self.stdout.write(f"{'operation':<26}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}  vs baseline ({vendor})")
+        for name, current, previous, regressed in compare(results, stored.get(vendor, {}), options['threshold']):
+            diff = ''
+            if previous:
+                diff = f"p95 {current['p95_ms'] - previous['p95_ms']:+.2f}ms, queries {current['queries'] - previous['queries']:+d}"
+            line = f"{name:<26}{current['p50_ms']:>10.2f}{current['p95_ms']:>10.2f}{current['p99_ms']:>10.2f}{current['queries']:>9}  {diff}"
+            if regressed:
+                regressions.append(name)
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+            for error in current['errors']:
+                self.stdout.write(self.style.WARNING(f'    error: {error}'))
+        if options['save_baseline']:
+            stored[vendor] = {**stored.get(vendor, {}), **results}
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(stored, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Saved baseline for {vendor} to {baseline_path}'))
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f"Regressed operations: {', '.join(regressions)}")
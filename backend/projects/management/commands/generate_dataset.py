@@ -0,0 +1,117 @@
+import random
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from cache import invalidate_scopes
+from organizations.models import Organization
+from projects.models import Project
+from tasks.models import Task, TaskComment
+BATCH_SIZE = 1000
+TASK_STATUS_WEIGHTS = {'TODO': 40, 'IN_PROGRESS': 25, 'DONE': 30, 'CANCELLED': 5}
+TASK_PRIORITY_WEIGHTS = {'LOW': 30, 'MEDIUM': 40, 'HIGH': 20, 'URGENT': 10}
+PROJECT_STATUS_WEIGHTS = {'ACTIVE': 60, 'ON_HOLD': 10, 'COMPLETED': 25, 'CANCELLED': 5}
+WORDS = ('api', 'billing', 'dashboard', 'migration', 'onboarding', 'search', 'export', 'mobile', 'release', 'security', 'reporting', 'cleanup', 'integration', 'design', 'review', 'performance')
+
+def pick(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+def phrase(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+class Command(BaseCommand):
+    help = 'Generate a deterministic multi-tenant dataset for load testing and benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organizations', type=int, default=10, help='Number of organizations')
+        parser.add_argument('--members', type=int, default=20, help='Members per organization')
+        parser.add_argument('--projects', type=int, default=10, help='Projects per organization')
+        parser.add_argument('--tasks', type=int, default=50, help='Average tasks per project (exponentially skewed)')
+        parser.add_argument('--comments', type=int, default=3, help='Average comments per task')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed always yields the same dataset')
+        parser.add_argument('--prefix', default='bench', help='Prefix for generated usernames and organization slugs')
+        parser.add_argument('--flush', action='store_true', help='Delete a previously generated dataset with the same prefix first')
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        existing = Organization._base_manager.filter(slug__startswith=f'{prefix}-org-')
+        if existing.exists():
+            if not options['flush']:
+                raise CommandError(f"A dataset with prefix '{prefix}' already exists; pass --flush to replace it")
+            self.flush(prefix, existing)
+        rng = random.Random(options['seed'])
+        now = timezone.now()
+        with transaction.atomic():
+            users = self.create_users(prefix, max(options['members'], options['organizations'] * options['members'] // 2))
+            organizations = self.create_organizations(rng, prefix, users, options['organizations'], options['members'])
+            projects = self.create_projects(rng, organizations, options['projects'], now)
+            tasks = self.create_tasks(rng, projects, options['tasks'], now)
+            comments = self.create_comments(rng, tasks, options['comments'])
+            organization_ids = [organization.pk for organization in organizations]
+            Project.objects.reconcile_task_counters(Project._base_manager.filter(organization_id__in=organization_ids))
+            Organization.objects.reconcile_counters(Organization._base_manager.filter(pk__in=organization_ids))
+            invalidate_scopes(organization_ids=organization_ids, user_ids=[user.pk for user in users])
+        self.stdout.write(self.style.SUCCESS(f'Generated {len(organizations)} organizations, {len(users)} users, {len(projects)} projects, {len(tasks)} tasks and {comments} comments'))
+
+    def flush(self, prefix, organizations):
+        # Generated datasets are large and task/comment signals would run once per
+        # row, so rows are removed bottom-up with raw deletes instead.
+        with transaction.atomic():
+            TaskComment._base_manager.filter(organization__in=organizations)._raw_delete(TaskComment._base_manager.db)
+            Task._base_manager.filter(organization__in=organizations)._raw_delete(Task._base_manager.db)
+            Project._base_manager.filter(organization__in=organizations)._raw_delete(Project._base_manager.db)
+            Organization.members.through.objects.filter(organization__in=organizations)._raw_delete(Organization._base_manager.db)
+            organization_ids = list(organizations.values_list('pk', flat=True))
+            organizations._raw_delete(Organization._base_manager.db)
+            User.objects.filter(username__startswith=f'{prefix}-user-').delete()
+            invalidate_scopes(organization_ids=organization_ids)
+
+    def create_users(self, prefix, count):
+        users = [User(username=f'{prefix}-user-{i}', email=f'{prefix}-user-{i}@example.com', password='!') for i in range(count)]
+        return User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+
+    def create_organizations(self, rng, prefix, users, count, members):
+        organizations = []
+        memberships = []
+        for i in range(count):
+            chosen = rng.sample(users, min(members, len(users)))
+            organizations.append(Organization(name=f'{prefix.capitalize()} Org {i}', slug=f'{prefix}-org-{i}', contact_email=f'contact@{prefix}-org-{i}.example.com', owner=chosen[0]))
+            memberships.append(chosen)
+        Organization.objects.bulk_create(organizations, batch_size=BATCH_SIZE)
+        through = Organization.members.through
+        through.objects.bulk_create([through(organization_id=organization.pk, user_id=user.pk) for organization, chosen in zip(organizations, memberships) for user in chosen], batch_size=BATCH_SIZE)
+        self.members = {organization.pk: chosen for organization, chosen in zip(organizations, memberships)}
+        return organizations
+
+    def create_projects(self, rng, organizations, count, now):
+        projects = []
+        for organization in organizations:
+            for i in range(count):
+                due_date = (now + timedelta(days=rng.randint(-30, 120))).date() if rng.random() < 0.7 else None
+                projects.append(Project(name=f'{phrase(rng, 2)} {i}', description=phrase(rng, 12), status=pick(rng, PROJECT_STATUS_WEIGHTS), due_date=due_date, organization=organization, created_by=rng.choice(self.members[organization.pk])))
+        return Project.objects.bulk_create(projects, batch_size=BATCH_SIZE)
+
+    def create_tasks(self, rng, projects, average, now):
+        tasks = []
+        for project in projects:
+            members = self.members[project.organization_id]
+            for i in range(int(rng.expovariate(1 / average)) if average else 0):
+                due_date = now + timedelta(days=rng.randint(-30, 60), hours=rng.randint(0, 23)) if rng.random() < 0.7 else None
+                tasks.append(Task(title=f'{phrase(rng, 3)} {i}', description=phrase(rng, 20), status=pick(rng, TASK_STATUS_WEIGHTS), priority=pick(rng, TASK_PRIORITY_WEIGHTS), assignee_email=rng.choice(members).email if rng.random() < 0.8 else '', due_date=due_date, project=project, organization_id=project.organization_id, created_by=rng.choice(members)))
+        return Task.objects.bulk_create(tasks, batch_size=BATCH_SIZE)
+
+    def create_comments(self, rng, tasks, average):
+        created = 0
+        comments = []
+        for task in tasks:
+            members = self.members[task.organization_id]
+            for _ in range(int(rng.expovariate(1 / average)) if average else 0):
+                author = rng.choice(members)
+                comments.append(TaskComment(task=task, organization_id=task.organization_id, content=phrase(rng, 15), author_email=author.email, created_by=author))
+            if len(comments) >= BATCH_SIZE:
+                TaskComment.objects.bulk_create(comments)
+                created += len(comments)
+                comments = []
+        TaskComment.objects.bulk_create(comments)
+        return created + len(comments)
@@ -0,0 +1,259 @@
+import csv
+import io
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from itertools import islice
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from cache import invalidate_scopes
+from organizations.models import Organization
+from projects.models import ImportCheckpoint, Project
+from tasks.models import Task, TaskComment
+BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 20
+TEXT_FIELDS = (models.CharField, models.TextField)
+
+def read_records(stream, input_format):
+    """Yield task records (dicts with nested ``comments``) from NDJSON or CSV, or a ``ValueError`` for unreadable input."""
+    if input_format == 'csv':
+        yield from csv_records(csv.DictReader(stream))
+        return
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield ValueError(f'line {line_number}: invalid JSON ({e})')
+            continue
+        yield record if isinstance(record, dict) else ValueError(f'line {line_number}: expected a JSON object')
+
+def csv_records(reader):
+    """Fold the comment-per-row CSV written by the task export back into task records."""
+    record = None
+    key = None
+    for row in reader:
+        row_key = row.get('task_id') or object()
+        if record is None or row_key != key:
+            if record is not None:
+                yield record
+            key = row_key
+            record = {name: row.get(f'task_{name}') for name in ('title', 'description', 'status', 'priority', 'assignee_email', 'due_date', 'created_at', 'updated_at', 'created_by')}
+            record['project'] = {'name': row.get('project_name')}
+            record['comments'] = []
+        if row.get('comment_content'):
+            record['comments'].append({name: row.get(f'comment_{name}') for name in ('content', 'author_email', 'timestamp', 'created_by')})
+    if record is not None:
+        yield record
+
+def parse_timestamp(value):
+    if not value:
+        return None
+    parsed = parse_datetime(value) if isinstance(value, str) else value
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"invalid timestamp '{value}'")
+        parsed = timezone.datetime.combine(day, timezone.datetime.min.time())
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+def copy_objects(model, objects):
+    """Insert ``objects`` (with primary keys already assigned) through PostgreSQL ``COPY``."""
+    fields = [field for field in model._meta.concrete_fields]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for obj in objects:
+        writer.writerow([field.get_db_prep_save(getattr(obj, field.attname), connection) for field in fields])
+    not_null = [connection.ops.quote_name(field.column) for field in fields if isinstance(field, TEXT_FIELDS) and not field.null]
+    columns = ', '.join((connection.ops.quote_name(field.column) for field in fields))
+    options = f", FORCE_NOT_NULL ({', '.join(not_null)})" if not_null else ''
+    sql = f'COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv{options})'
+    buffer.seek(0)
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, 'copy_expert'):
+            raw.copy_expert(sql, buffer)
+        else:
+            with raw.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+def allocate_ids(model, count):
+    """Reserve ``count`` primary keys from the table's sequence so COPY rows can reference each other."""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)', [model._meta.db_table, model._meta.pk.column, count])
+        return [row[0] for row in cursor.fetchall()]
+
+class Command(BaseCommand):
+    help = 'Import tasks and their comments into an organization from NDJSON or CSV (the formats written by the task export)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('organization', help='Slug of the organization to import into')
+        parser.add_argument('input', help="NDJSON or CSV file, or '-' for standard input")
+        parser.add_argument('--format', choices=('ndjson', 'csv'), help='Input format (default: from the file extension, else ndjson)')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Tasks validated and inserted per transaction')
+        parser.add_argument('--checkpoint', help='Name under which the number of committed records is kept in the database (default: the absolute input path)')
+        parser.add_argument('--create-projects', action='store_true', help='Create projects that do not exist yet instead of rejecting their tasks')
+
+    def handle(self, *args, **options):
+        organization = Organization._base_manager.select_related('owner').filter(slug=options['organization']).first()
+        if organization is None:
+            raise CommandError(f"Organization '{options['organization']}' does not exist")
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        path = options['input']
+        input_format = options['format'] or ('csv' if path.endswith('.csv') else 'ndjson')
+        checkpoint = options['checkpoint'] or (None if path == '-' else os.path.abspath(path))
+        self.organization = organization
+        self.create_projects = options['create_projects']
+        self.projects = {project.name: project for project in Project._base_manager.filter(organization=organization)}
+        members = list(organization.members.all()) + [organization.owner]
+        self.users = {user.username: user for user in members}
+        self.users.update({user.email.lower(): user for user in members if user.email})
+        self.errors = []
+        done = self.load_checkpoint(checkpoint)
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            records = read_records(stream, input_format)
+            if done:
+                self.stdout.write(f'Resuming after {done} records from {checkpoint}')
+                for _ in islice(records, done):
+                    pass
+            self.import_records(records, options['batch_size'], done, checkpoint)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+    def import_records(self, records, batch_size, done, checkpoint):
+        start = time.perf_counter()
+        imported_tasks = imported_comments = 0
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            tasks, comments = self.build_batch(batch, done)
+            done += len(batch)
+            # The checkpoint commits with the rows, so a crash never replays a committed batch.
+            with transaction.atomic():
+                self.insert(tasks, comments)
+                deltas_by_project = self.counter_deltas(tasks)
+                for project_id, deltas in deltas_by_project.items():
+                    Project.objects.adjust_task_counters(project_id, self.organization.pk, deltas)
+                invalidate_scopes(organization_ids=[self.organization.pk], project_ids=list(deltas_by_project))
+                self.save_checkpoint(checkpoint, done)
+            imported_tasks += len(tasks)
+            imported_comments += sum(map(len, comments))
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f'{done} records read, {imported_tasks} tasks and {imported_comments} comments imported ({(imported_tasks + imported_comments) / elapsed:,.0f} rows/s)')
+        for message in self.errors[:MAX_REPORTED_ERRORS]:
+            self.stderr.write(message)
+        if len(self.errors) > MAX_REPORTED_ERRORS:
+            self.stderr.write(f'... and {len(self.errors) - MAX_REPORTED_ERRORS} more rejected records')
+        self.stdout.write(self.style.SUCCESS(f'Imported {imported_tasks} tasks and {imported_comments} comments into {self.organization.slug} in {time.perf_counter() - start:.1f}s; rejected {len(self.errors)} records'))
+
+    def build_batch(self, batch, offset):
+        tasks = []
+        comments = []
+        now = timezone.now()
+        for index, record in enumerate(batch, offset + 1):
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                task, task_comments = self.build_task(record, now)
+            except (ValidationError, ValueError, TypeError) as e:
+                message = '; '.join((f'{field}: {error}' for field, errors in e.message_dict.items() for error in errors)) if hasattr(e, 'message_dict') else str(e)
+                self.errors.append(f'record {index}: {message}')
+                continue
+            tasks.append(task)
+            comments.append(task_comments)
+        return (tasks, comments)
+
+    def build_task(self, record, now):
+        created_at = parse_timestamp(record.get('created_at')) or now
+        task = Task(title=record.get('title') or '', description=record.get('description') or '', status=record.get('status') or 'TODO', priority=record.get('priority') or 'MEDIUM', assignee_email=self.resolve_email(record.get('assignee_email')), due_date=parse_timestamp(record.get('due_date')), created_by=self.resolve_user(record.get('created_by')), created_at=created_at, updated_at=parse_timestamp(record.get('updated_at')) or created_at)
+        task.clean_fields(exclude=['project', 'created_by', 'created_at', 'updated_at'])
+        comments = []
+        for comment_record in record.get('comments') or ():
+            comment = TaskComment(content=comment_record.get('content') or '', author_email=self.resolve_email(comment_record.get('author_email')), created_by=self.resolve_user(comment_record.get('created_by')), timestamp=parse_timestamp(comment_record.get('timestamp')) or now)
+            comment.clean_fields(exclude=['task', 'created_by', 'timestamp'])
+            comments.append(comment)
+        # Resolved last so --create-projects never creates a project for a rejected record.
+        project = record.get('project')
+        task.project = self.resolve_project(project.get('name') if isinstance(project, dict) else project)
+        task.organization = self.organization
+        return (task, comments)
+
+    def resolve_project(self, name):
+        if not name:
+            raise ValueError('missing project name')
+        project = self.projects.get(name)
+        if project is None:
+            if not self.create_projects:
+                raise ValueError(f"unknown project '{name}' (pass --create-projects to create it)")
+            project = self.projects[name] = Project._base_manager.create(name=name, organization=self.organization, created_by=self.organization.owner)
+        return project
+
+    def resolve_user(self, reference):
+        """The member with this username or email; unknown references keep the row but drop the author."""
+        return self.users.get(reference) or self.users.get((reference or '').lower()) if reference else None
+
+    def resolve_email(self, email):
+        user = self.users.get((email or '').strip().lower())
+        return user.email if user else (email or '').strip()
+
+    def insert(self, tasks, task_comments):
+        if connection.vendor == 'postgresql':
+            for task, pk in zip(tasks, allocate_ids(Task, len(tasks))):
+                task.pk = pk
+            copy_objects(Task, tasks)
+            comments = self.attach_comments(tasks, task_comments)
+            for comment, pk in zip(comments, allocate_ids(TaskComment, len(comments))):
+                comment.pk = pk
+            copy_objects(TaskComment, comments)
+            return
+        # bulk_create applies auto_now/auto_now_add, so the imported timestamps
+        # are written back afterwards.
+        created_at = [(task.created_at, task.updated_at) for task in tasks]
+        Task.objects.bulk_create(tasks, batch_size=1000)
+        for task, (created, updated) in zip(tasks, created_at):
+            task.created_at, task.updated_at = (created, updated)
+        Task.objects.bulk_update(tasks, ['created_at', 'updated_at'], batch_size=1000)
+        comments = self.attach_comments(tasks, task_comments)
+        timestamps = [comment.timestamp for comment in comments]
+        TaskComment.objects.bulk_create(comments, batch_size=1000)
+        for comment, timestamp in zip(comments, timestamps):
+            comment.timestamp = timestamp
+        TaskComment.objects.bulk_update(comments, ['timestamp'], batch_size=1000)
+
+    @staticmethod
+    def attach_comments(tasks, task_comments):
+        comments = []
+        for task, task_comment_list in zip(tasks, task_comments):
+            for comment in task_comment_list:
+                comment.task = task
+                comment.organization = task.organization
+                comments.append(comment)
+        return comments
+
+    @staticmethod
+    def counter_deltas(tasks):
+        """Task counter increments per project for a batch of new tasks, as the bulk mutations apply them."""
+        deltas_by_project = defaultdict(lambda: defaultdict(int))
+        for task in tasks:
+            for field, value in Task.counter_values(task.status, task.due_date).items():
+                deltas_by_project[task.project_id][field] += value
+        return deltas_by_project
+
+    def load_checkpoint(self, checkpoint):
+        if not checkpoint:
+            return 0
+        return ImportCheckpoint._base_manager.filter(organization=self.organization, source=checkpoint).values_list('records', flat=True).first() or 0
+
+    def save_checkpoint(self, checkpoint, records):
+        if checkpoint:
+            ImportCheckpoint._base_manager.update_or_create(organization=self.organization, source=checkpoint, defaults={'records': records})
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from project_management.search import SEARCH_TABLE, get_search_backend
+
+class Command(BaseCommand):
+    help = 'Create the full-text search table and its triggers if missing, and re-index every organization, project, task and comment'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database to index')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        backend = get_search_backend(connection)
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            backend.install(cursor)
+            backend.rebuild(cursor)
+            cursor.execute(f'SELECT count(*) FROM {SEARCH_TABLE}')
+            count = cursor.fetchone()[0]
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} rows into {SEARCH_TABLE}'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from cache import invalidate_scopes
+from organizations.models import Organization
+from projects.models import Project
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized task counters on projects and organizations and repair any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organization', help='Only reconcile the organization with this slug')
+
+    def handle(self, *args, **options):
+        organizations = Organization._base_manager.all()
+        if options['organization']:
+            organizations = organizations.filter(slug=options['organization'])
+            if not organizations.exists():
+                raise CommandError(f"Organization '{options['organization']}' does not exist")
+        with transaction.atomic():
+            projects_fixed = Project.objects.reconcile_task_counters(Project._base_manager.filter(organization__in=organizations))
+            organizations_fixed = Organization.objects.reconcile_counters(organizations)
+            invalidate_scopes(organization_ids=organizations.values_list('pk', flat=True))
+        self.stdout.write(self.style.SUCCESS(f'Repaired counters on {projects_fixed} projects and {organizations_fixed} organizations'))
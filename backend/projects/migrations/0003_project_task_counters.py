@@ -0,0 +1,57 @@
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_task_counters(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    Task = apps.get_model('tasks', 'Task')
+
+    def task_count(**filters):
+        tasks = Task.objects.filter(project=OuterRef('pk'), **filters).order_by().values('project').annotate(count=Count('pk')).values('count')
+        return Coalesce(Subquery(tasks, output_field=IntegerField()), 0)
+
+    Project.objects.update(
+        total_tasks_count=task_count(),
+        todo_tasks_count=task_count(status='TODO'),
+        in_progress_tasks_count=task_count(status='IN_PROGRESS'),
+        done_tasks_count=task_count(status='DONE'),
+        open_due_tasks_count=task_count(status__in=['TODO', 'IN_PROGRESS'], due_date__isnull=False),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_add_indexes'),
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='total_tasks_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='todo_tasks_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='in_progress_tasks_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='done_tasks_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='open_due_tasks_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_task_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+from project_management.indexes import AddIndexConcurrently, DropIndexIfExists
+
+
+class Migration(migrations.Migration):
+
+    # Concurrent index builds cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('projects', '0003_project_task_counters'),
+    ]
+
+    operations = [
+        AddIndexConcurrently('project', models.Index(fields=['organization', 'status', 'created_at'], name='idx_project_org_status')),
+        AddIndexConcurrently('project', models.Index(fields=['organization', 'created_at'], name='idx_project_org_created')),
+        AddIndexConcurrently('project', models.Index(fields=['status', 'created_at'], name='idx_project_status_created')),
+        AddIndexConcurrently('project', models.Index(fields=['due_date'], name='idx_project_due_date')),
+        # Superseded by the search index.
+        DropIndexIfExists('idx_project_name_search'),
+        DropIndexIfExists('idx_project_desc_search'),
+    ]
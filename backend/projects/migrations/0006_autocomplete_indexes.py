@@ -0,0 +1,20 @@
+from django.contrib.postgres.indexes import OpClass
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Lower
+
+from project_management.indexes import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # Concurrent index builds cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('projects', '0005_import_checkpoint'),
+    ]
+
+    operations = [
+        AddIndexConcurrently('project', models.Index(F('organization'), OpClass(Lower('name'), name='text_pattern_ops'), name='idx_project_org_name_lower')),
+    ]
@@ -1,14 +1,22 @@
 from django .db import models
 from django .contrib .auth .models import User
-from django .db .models import Case ,When ,IntegerField ,Count ,Q
+from django .apps import apps
+from django .db .models import Case ,When ,IntegerField ,Count ,Q ,F ,OuterRef ,Subquery ,Value
+from django .db .models .functions import Coalesce ,Lower
+from django .contrib .postgres .indexes import OpClass
 from organizations .models import Organization
+from organizations .access import accessible_organization_ids
+from project_management .search import search_queryset
+
+OPEN_TASK_STATUSES =['TODO','IN_PROGRESS']
+TASK_COUNTER_FIELDS =('total_tasks_count','todo_tasks_count','in_progress_tasks_count','done_tasks_count','open_due_tasks_count')
 
 
 class ProjectManager (models .Manager ):
     """Manager for Project model with multi-tenancy support and performance optimizations"""
 
     def get_queryset (self ):
-        return super ().get_queryset ().select_related ('organization','created_by').prefetch_related ('tasks')
+        return super ().get_queryset ()
 
     def for_organization (self ,organization ):
         """Return projects for a specific organization with optimized query"""
@@ -20,73 +28,78 @@ class ProjectManager (models .Manager ):
             return self .get_queryset ()
 
 
-        user_organizations =Organization .objects .for_user (user )
-        return self .get_queryset ().filter (organization__in =user_organizations ).select_related ('organization','created_by')
+        return self .get_queryset ().filter (organization_id__in =accessible_organization_ids (user )).select_related ('organization','created_by')
 
     def with_task_stats (self ,user =None ):
         """Return projects with task statistics using optimized queries"""
         base_qs =self .get_queryset ()
 
         if user and not user .is_superuser :
-            user_organizations =Organization .objects .for_user (user )
-            base_qs =base_qs .filter (organization__in =user_organizations )
+            base_qs =base_qs .filter (organization_id__in =accessible_organization_ids (user ))
 
         return base_qs .annotate (
-        task_count =Count ('tasks',distinct =True ),
-        completed_tasks_count =Count (
-        Case (
-        When (tasks__status ='DONE',then =1 ),
-        output_field =IntegerField (),
-        ),
-        distinct =True
-        ),
-        in_progress_tasks_count =Count (
-        Case (
-        When (tasks__status ='IN_PROGRESS',then =1 ),
-        output_field =IntegerField (),
-        ),
-        distinct =True
-        ),
-        todo_tasks_count =Count (
-        Case (
-        When (tasks__status ='TODO',then =1 ),
-        output_field =IntegerField (),
-        ),
-        distinct =True
-        ),
-        overdue_tasks_count =Count (
-        Case (
-        When (
-        tasks__due_date__lt =models .functions .Now (),
-        ~Q (tasks__status__in =['DONE','CANCELLED']),
-        then =1
-        ),
+        overdue_tasks_count =Case (
+        When (open_due_tasks_count =0 ,then =Value (0 )),
+        default =self ._task_count_subquery (due_date__lt =models .functions .Now (),status__in =OPEN_TASK_STATUSES ),
         output_field =IntegerField (),
         ),
-        distinct =True
-        ),
         ).select_related ('organization','created_by')
 
+    def _task_count_subquery (self ,**filters ):
+        Task =apps .get_model ('tasks','Task')
+        tasks =Task ._base_manager .filter (project =OuterRef ('pk'),**filters ).order_by ().values ('project').annotate (count =Count ('pk')).values ('count')
+        return Coalesce (Subquery (tasks ,output_field =IntegerField ()),0 )
+
+    def expected_task_counters (self ):
+        """Counter values recomputed from the tasks table, keyed by counter field"""
+        return {
+        'total_tasks_count':self ._task_count_subquery (),
+        'todo_tasks_count':self ._task_count_subquery (status ='TODO'),
+        'in_progress_tasks_count':self ._task_count_subquery (status ='IN_PROGRESS'),
+        'done_tasks_count':self ._task_count_subquery (status ='DONE'),
+        'open_due_tasks_count':self ._task_count_subquery (status__in =OPEN_TASK_STATUSES ,due_date__isnull =False ),
+        }
+
+    def adjust_task_counters (self ,project_id ,organization_id ,deltas ):
+        """Atomically apply task counter deltas to a project and its organization rollups"""
+        deltas ={field :delta for field ,delta in deltas .items ()if delta }
+        if not deltas :
+            return
+        self .model ._base_manager .filter (pk =project_id ).update (**{field :F (field )+delta for field ,delta in deltas .items ()})
+        Organization .objects .adjust_counters (organization_id ,total_tasks =deltas .get ('total_tasks_count',0 ),completed_tasks =deltas .get ('done_tasks_count',0 ))
+
+    def reconcile_task_counters (self ,queryset =None ):
+        """Repair drifted task counters and return the number of projects fixed"""
+        queryset =self .model ._base_manager .all ()if queryset is None else queryset
+        expected =self .expected_task_counters ()
+        drift =Q ()
+        for field in TASK_COUNTER_FIELDS :
+            drift |=~Q (**{field :F (f'expected_{field }')})
+        drifted_ids =list (
+        queryset .order_by ().annotate (**{f'expected_{field }':value for field ,value in expected .items ()})
+        .filter (drift ).values_list ('pk',flat =True )
+        )
+        if drifted_ids :
+            self .model ._base_manager .filter (pk__in =drifted_ids ).update (**expected )
+        return len (drifted_ids )
+
     def search (self ,query ,user =None ):
-        """Full-text search on projects with performance optimization"""
+        """Projects matching ``query`` in the full-text index, best match first"""
         base_qs =self .get_queryset ()
+        organization_ids =None
 
         if user and not user .is_superuser :
-            user_organizations =Organization .objects .for_user (user )
-            base_qs =base_qs .filter (organization__in =user_organizations )
+            organization_ids =accessible_organization_ids (user )
+            base_qs =base_qs .filter (organization_id__in =organization_ids )
 
-        return base_qs .filter (
-        Q (name__icontains =query )|
-        Q (description__icontains =query )
-        ).select_related ('organization','created_by')
+        return search_queryset (base_qs ,query ,organization_ids ).select_related ('organization','created_by')
 
     def by_status (self ,status ,user =None ):
         """Filter projects by status with optimized query"""
         base_qs =self .get_queryset ()
 
         if user and not user .is_superuser :
-            user_organizations =Organization .objects .for_user (user )
-            base_qs =base_qs .filter (organization__in =user_organizations )
+            base_qs =base_qs .filter (organization_id__in =accessible_organization_ids (user ))
 
         return base_qs .filter (status =status ).select_related ('organization','created_by')
 
@@ -98,8 +111,7 @@ class ProjectManager (models .Manager ):
         base_qs =self .get_queryset ()
 
         if user and not user .is_superuser :
-            user_organizations =Organization .objects .for_user (user )
-            base_qs =base_qs .filter (organization__in =user_organizations )
+            base_qs =base_qs .filter (organization_id__in =accessible_organization_ids (user ))
 
         due_date =timezone .now ().date ()+timedelta (days =days )
         return base_qs .filter (
@@ -126,23 +138,37 @@ class Project (models .Model ):
     updated_at =models .DateTimeField (auto_now =True )
     created_by =models .ForeignKey (User ,on_delete =models .SET_NULL ,null =True ,related_name ='created_projects')
 
+    # Maintained by the task signal handlers; repair with ``manage.py reconcile_task_counters``
+    total_tasks_count =models .IntegerField (default =0 ,editable =False )
+    todo_tasks_count =models .IntegerField (default =0 ,editable =False )
+    in_progress_tasks_count =models .IntegerField (default =0 ,editable =False )
+    done_tasks_count =models .IntegerField (default =0 ,editable =False )
+    open_due_tasks_count =models .IntegerField (default =0 ,editable =False )
+
     objects =ProjectManager ()
 
     class Meta :
         ordering =['-created_at']
         verbose_name ='Project'
         verbose_name_plural ='Projects'
+        indexes =[
+        models .Index (fields =['organization','status','created_at'],name ='idx_project_org_status'),
+        models .Index (fields =['organization','created_at'],name ='idx_project_org_created'),
+        models .Index (fields =['status','created_at'],name ='idx_project_status_created'),
+        models .Index (fields =['due_date'],name ='idx_project_due_date'),
+        models .Index (F ('organization'),OpClass (Lower ('name'),name ='text_pattern_ops'),name ='idx_project_org_name_lower'),
+        ]
 
     def __str__ (self ):
         return f"{self .name } - {self .organization .name }"
 
     @property
     def task_count (self ):
-        return self .tasks .count ()
+        return self .total_tasks_count
 
     @property
     def completed_tasks_count (self ):
-        return self .tasks .filter (status ='DONE').count ()
+        return self .done_tasks_count
 
     @property
     def completion_rate (self ):
@@ -152,4 +178,16 @@ class Project (models .Model ):
 
     def user_has_access (self ,user ):
         """Check if user has access to this project"""
-        return user .is_superuser or self .organization .user_has_access (user )
\ No newline at end of file
+        return user .is_superuser or self .organization_id in accessible_organization_ids (user )
+
+class ImportCheckpoint (models .Model ):
+    """Records of an ``import_org`` source already committed, saved in the same transaction as each batch"""
+    organization =models .ForeignKey (Organization ,on_delete =models .CASCADE ,related_name ='+')
+    source =models .CharField (max_length =500 )
+    records =models .PositiveBigIntegerField (default =0 )
+    updated_at =models .DateTimeField (auto_now =True )
+
+    class Meta :
+        constraints =[
+        models .UniqueConstraint (fields =['organization','source'],name ='uniq_import_checkpoint_source'),
+        ]
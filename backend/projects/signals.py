@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from cache import invalidate_scopes
+from organizations.models import Organization
+from .models import Project
+
+@receiver(post_init, sender=Project)
+def remember_project_organization(sender, instance, **kwargs):
+    instance._original_organization_id = instance.__dict__.get('organization_id')
+
+def move_project_tasks(project):
+    """Point the tenant key of the project's tasks and comments at its new organization."""
+    from tasks.models import Task, TaskComment
+    Task._base_manager.filter(project=project).update(organization_id=project.organization_id)
+    TaskComment._base_manager.filter(task__project=project).update(organization_id=project.organization_id)
+
+def move_project_counters(project, old_organization_id, new_organization_id):
+    counters = Project._base_manager.filter(pk=project.pk).values('total_tasks_count', 'done_tasks_count').first()
+    if counters is None:
+        return
+    for organization_id, sign in ((old_organization_id, -1), (new_organization_id, 1)):
+        Organization.objects.adjust_counters(organization_id, project_count=sign, total_tasks=sign * counters['total_tasks_count'], completed_tasks=sign * counters['done_tasks_count'])
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, created, **kwargs):
+    if created:
+        Organization.objects.adjust_counters(instance.organization_id, project_count=1)
+    elif instance._original_organization_id not in (None, instance.organization_id):
+        move_project_counters(instance, instance._original_organization_id, instance.organization_id)
+        move_project_tasks(instance)
+    invalidate_scopes(organization_ids=[instance.organization_id, instance._original_organization_id], project_ids=[instance.pk])
+    instance._original_organization_id = instance.organization_id
+
+@receiver(post_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+    Organization.objects.adjust_counters(instance.organization_id, project_count=-1)
+    invalidate_scopes(organization_ids=[instance.organization_id], project_ids=[instance.pk])
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+from project_management.search import install_search_index, uninstall_search_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_organization'),
+        ('projects', '0003_project_task_counters'),
+        ('organizations', '0003_organization_counters'),
+    ]
+
+    operations = [
+        # The search table and the triggers that keep it in sync span all three
+        # apps; they are created with raw SQL because the table is a tsvector
+        # table on PostgreSQL and an FTS5 virtual table on SQLite.
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
@@ -0,0 +1,29 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import BtreeGinExtension, TrigramExtension
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Lower
+
+from project_management.indexes import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # Concurrent index builds cannot run inside a transaction; building the
+    # indexes concurrently keeps the task table writable while they build.
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0004_search_index'),
+        ('projects', '0003_project_task_counters'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        # btree_gin lets the trigram index lead with the integer tenant column.
+        BtreeGinExtension(),
+        AddIndexConcurrently('task', models.Index(F('organization'), OpClass(Lower('title'), name='text_pattern_ops'), name='idx_task_org_title_lower')),
+        AddIndexConcurrently('task', GinIndex(F('organization'), OpClass(Lower('title'), name='gin_trgm_ops'), name='idx_task_org_title_trgm')),
+        AddIndexConcurrently('task', models.Index(F('organization'), OpClass(Lower('assignee_email'), name='text_pattern_ops'), name='idx_task_org_assignee_lower')),
+        AddIndexConcurrently('task', models.Index(fields=['organization', 'updated_at'], name='idx_task_org_updated')),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+from project_management.indexes import AddIndexConcurrently, DropIndexIfExists
+
+OPEN = models.Q(status__in=['TODO', 'IN_PROGRESS'])
+
+
+class Migration(migrations.Migration):
+
+    # Concurrent index builds cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0005_autocomplete_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently('task', models.Index(fields=['project', 'status', 'created_at'], name='idx_task_project_status')),
+        AddIndexConcurrently('task', models.Index(fields=['status', 'created_at'], name='idx_task_status_created')),
+        AddIndexConcurrently('task', models.Index(fields=['due_date'], condition=OPEN, name='idx_task_open_due')),
+        AddIndexConcurrently('task', models.Index(fields=['project', 'priority'], condition=OPEN, name='idx_task_open_project_priority')),
+        AddIndexConcurrently('task', models.Index(Lower('assignee_email'), name='idx_task_assignee_lower')),
+        AddIndexConcurrently('taskcomment', models.Index(fields=['task', 'timestamp'], name='idx_comment_task_timestamp')),
+        AddIndexConcurrently('taskcomment', models.Index(fields=['organization', 'timestamp'], name='idx_comment_org_timestamp')),
+        AddIndexConcurrently('taskcomment', models.Index(Lower('author_email'), name='idx_comment_author_lower')),
+        # Replaced by the open-task, lower() and tenant indexes above, and by
+        # the search index for the full-text ones.
+        DropIndexIfExists('idx_task_project_priority'),
+        DropIndexIfExists('idx_task_assignee_email'),
+        DropIndexIfExists('idx_task_due_date'),
+        DropIndexIfExists('idx_task_title_search'),
+        DropIndexIfExists('idx_task_desc_search'),
+        DropIndexIfExists('idx_task_comment_task_timestamp'),
+        DropIndexIfExists('idx_task_comment_author'),
+        DropIndexIfExists('idx_task_comment_timestamp'),
+        DropIndexIfExists('idx_task_comment_content_search'),
+    ]
@@ -1,88 +1,99 @@
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models import Case, When, IntegerField, Count, Q
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models import Case, When, IntegerField, Count, F, Q, Value
+from django.db.models.functions import Lower
 from django.utils import timezone
 from datetime import timedelta
-from projects.models import Project
+from organizations.models import Organization
+from projects.models import OPEN_TASK_STATUSES, Project
+from organizations.access import accessible_organization_ids
+from project_management.search import search_queryset
+
+class IsOpen(models.Func):
+    """``status IN OPEN_TASK_STATUSES`` with the statuses written into the SQL instead of bound as parameters.
+
+    SQLite only uses a partial index when the query repeats the index condition
+    literally, and the open-task indexes on ``Task`` are partial on this one.
+    """
+    template = '%(expressions)s IN (' + ', '.join((f"'{status}'" for status in OPEN_TASK_STATUSES)) + ')'
+    output_field = models.BooleanField()
 
 class TaskManager(models.Manager):
 
     def get_queryset(self):
-        return super().get_queryset().select_related('project', 'project__organization', 'created_by').prefetch_related('comments')
+        return super().get_queryset()
 
     def for_organization(self, organization):
-        return self.get_queryset().filter(project__organization=organization).select_related('project', 'project__organization', 'created_by')
+        return self.get_queryset().filter(organization=organization).select_related('project', 'project__organization', 'created_by')
 
     def for_project(self, project):
-        return self.get_queryset().filter(project=project).select_related('project', 'created_by').prefetch_related('comments')
+        return self.get_queryset().filter(project=project).select_related('project', 'created_by')
 
     def for_user(self, user):
         if user.is_superuser:
             return self.get_queryset()
-        user_projects = Project.objects.for_user(user)
-        return self.get_queryset().filter(project__in=user_projects).select_related('project', 'project__organization', 'created_by')
+        return self.get_queryset().filter(organization_id__in=accessible_organization_ids(user)).select_related('project', 'project__organization', 'created_by')
 
     def by_status(self, status, user=None):
         base_qs = self.get_queryset()
         if user and (not user.is_superuser):
-            user_projects = Project.objects.for_user(user)
-            base_qs = base_qs.filter(project__in=user_projects)
+            base_qs = base_qs.filter(organization_id__in=accessible_organization_ids(user))
         return base_qs.filter(status=status).select_related('project', 'created_by')
 
     def by_priority(self, priority, user=None):
         base_qs = self.get_queryset()
         if user and (not user.is_superuser):
-            user_projects = Project.objects.for_user(user)
-            base_qs = base_qs.filter(project__in=user_projects)
+            base_qs = base_qs.filter(organization_id__in=accessible_organization_ids(user))
         return base_qs.filter(priority=priority).select_related('project', 'created_by')
 
     def by_assignee(self, email, user=None):
         base_qs = self.get_queryset()
         if user and (not user.is_superuser):
-            user_projects = Project.objects.for_user(user)
-            base_qs = base_qs.filter(project__in=user_projects)
-        return base_qs.filter(assignee_email__iexact=email).select_related('project', 'created_by')
+            base_qs = base_qs.filter(organization_id__in=accessible_organization_ids(user))
+        return base_qs.alias(assignee_email_lower=Lower('assignee_email')).filter(assignee_email_lower=Lower(Value(email))).select_related('project', 'created_by')
 
     def overdue(self, user=None):
         base_qs = self.get_queryset()
         if user and (not user.is_superuser):
-            user_projects = Project.objects.for_user(user)
-            base_qs = base_qs.filter(project__in=user_projects)
-        return base_qs.filter(due_date__lt=timezone.now(), status__in=['TODO', 'IN_PROGRESS']).select_related('project', 'created_by').order_by('due_date')
+            base_qs = base_qs.filter(organization_id__in=accessible_organization_ids(user))
+        return base_qs.filter(IsOpen('status'), due_date__lt=timezone.now()).select_related('project', 'created_by').order_by('due_date')
 
     def due_soon(self, days=3, user=None):
         base_qs = self.get_queryset()
         if user and (not user.is_superuser):
-            user_projects = Project.objects.for_user(user)
-            base_qs = base_qs.filter(project__in=user_projects)
+            base_qs = base_qs.filter(organization_id__in=accessible_organization_ids(user))
         due_date = timezone.now() + timedelta(days=days)
-        return base_qs.filter(due_date__lte=due_date, due_date__gte=timezone.now(), status__in=['TODO', 'IN_PROGRESS']).select_related('project', 'created_by').order_by('due_date')
+        return base_qs.filter(IsOpen('status'), due_date__lte=due_date, due_date__gte=timezone.now()).select_related('project', 'created_by').order_by('due_date')
 
     def high_priority(self, user=None):
         base_qs = self.get_queryset()
         if user and (not user.is_superuser):
-            user_projects = Project.objects.for_user(user)
-            base_qs = base_qs.filter(project__in=user_projects)
-        return base_qs.filter(priority__in=['HIGH', 'URGENT'], status__in=['TODO', 'IN_PROGRESS']).select_related('project', 'created_by').order_by('-priority', 'due_date')
+            base_qs = base_qs.filter(organization_id__in=accessible_organization_ids(user))
+        return base_qs.filter(IsOpen('status'), priority__in=['HIGH', 'URGENT']).select_related('project', 'created_by').order_by('-priority', 'due_date')
 
     def search(self, query, user=None):
+        """Tasks matching ``query`` in the full-text index, best match first"""
         base_qs = self.get_queryset()
+        organization_ids = None
         if user and (not user.is_superuser):
-            user_projects = Project.objects.for_user(user)
-            base_qs = base_qs.filter(project__in=user_projects)
-        return base_qs.filter(Q(title__icontains=query) | Q(description__icontains=query) | Q(assignee_email__icontains=query)).select_related('project', 'created_by')
+            organization_ids = accessible_organization_ids(user)
+            base_qs = base_qs.filter(organization_id__in=organization_ids)
+        return search_queryset(base_qs, query, organization_ids).select_related('project', 'created_by')
 
     def with_comment_count(self, user=None):
         base_qs = self.get_queryset()
         if user and (not user.is_superuser):
-            user_projects = Project.objects.for_user(user)
-            base_qs = base_qs.filter(project__in=user_projects)
+            base_qs = base_qs.filter(organization_id__in=accessible_organization_ids(user))
         return base_qs.annotate(comment_count=Count('comments', distinct=True)).select_related('project', 'created_by')
 
 class Task(models.Model):
     STATUS_CHOICES = [('TODO', 'To Do'), ('IN_PROGRESS', 'In Progress'), ('DONE', 'Done'), ('CANCELLED', 'Cancelled')]
     PRIORITY_CHOICES = [('LOW', 'Low'), ('MEDIUM', 'Medium'), ('HIGH', 'High'), ('URGENT', 'Urgent')]
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='tasks')
+    # Copied from the project on save (and by the project move signal) so tenant
+    # filters never join through projects.
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='+', editable=False)
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='TODO')
@@ -98,20 +109,39 @@ class Task(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Task'
         verbose_name_plural = 'Tasks'
+        # The open-task indexes are partial on OPEN_TASK_STATUSES, which the
+        # manager queries filter on with IsOpen. The lower() indexes match the
+        # Lower() autocomplete filters on; text_pattern_ops lets PostgreSQL
+        # use them for LIKE 'prefix%' under any collation, and the trigram
+        # index serves title "contains".
+        indexes = [models.Index(fields=['organization', 'status', 'due_date'], name='idx_task_org_status_due'), models.Index(fields=['project', 'status', 'created_at'], name='idx_task_project_status'), models.Index(fields=['status', 'created_at'], name='idx_task_status_created'), models.Index(fields=['due_date'], condition=Q(status__in=OPEN_TASK_STATUSES), name='idx_task_open_due'), models.Index(fields=['project', 'priority'], condition=Q(status__in=OPEN_TASK_STATUSES), name='idx_task_open_project_priority'), models.Index(Lower('assignee_email'), name='idx_task_assignee_lower'), models.Index(F('organization'), OpClass(Lower('title'), name='text_pattern_ops'), name='idx_task_org_title_lower'), GinIndex(F('organization'), OpClass(Lower('title'), name='gin_trgm_ops'), name='idx_task_org_title_trgm'), models.Index(F('organization'), OpClass(Lower('assignee_email'), name='text_pattern_ops'), name='idx_task_org_assignee_lower'), models.Index(fields=['organization', 'updated_at'], name='idx_task_org_updated')]
 
     def __str__(self):
         return f'{self.title} - {self.project.name}'
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if self.project_id is not None and (update_fields is None or 'project' in update_fields):
+            self.organization_id = self.project.organization_id
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'organization'}
+        super().save(*args, **kwargs)
+
     def user_has_access(self, user):
-        return user.is_superuser or self.project.user_has_access(user)
+        return user.is_superuser or self.organization_id in accessible_organization_ids(user)
+
+    @staticmethod
+    def counter_values(status, due_date):
+        """This task's contribution to its project's denormalized task counters."""
+        return {'total_tasks_count': 1, 'todo_tasks_count': int(status == 'TODO'), 'in_progress_tasks_count': int(status == 'IN_PROGRESS'), 'done_tasks_count': int(status == 'DONE'), 'open_due_tasks_count': int(status in OPEN_TASK_STATUSES and due_date is not None)}
 
 class TaskCommentManager(models.Manager):
 
     def get_queryset(self):
-        return super().get_queryset().select_related('task', 'task__project', 'task__project__organization', 'created_by')
+        return super().get_queryset()
 
     def for_organization(self, organization):
-        return self.get_queryset().filter(task__project__organization=organization).select_related('task', 'created_by')
+        return self.get_queryset().filter(organization=organization).select_related('task', 'created_by')
 
     def for_project(self, project):
         return self.get_queryset().filter(task__project=project).select_related('task', 'created_by')
@@ -122,34 +152,34 @@ class TaskCommentManager(models.Manager):
     def for_user(self, user):
         if user.is_superuser:
             return self.get_queryset()
-        user_tasks = Task.objects.for_user(user)
-        return self.get_queryset().filter(task__in=user_tasks).select_related('task', 'created_by')
+        return self.get_queryset().filter(organization_id__in=accessible_organization_ids(user)).select_related('task', 'created_by')
 
     def recent(self, days=7, user=None):
         from datetime import timedelta
         base_qs = self.get_queryset()
         if user and (not user.is_superuser):
-            user_tasks = Task.objects.for_user(user)
-            base_qs = base_qs.filter(task__in=user_tasks)
+            base_qs = base_qs.filter(organization_id__in=accessible_organization_ids(user))
         start_date = timezone.now() - timedelta(days=days)
         return base_qs.filter(timestamp__gte=start_date).select_related('task', 'created_by').order_by('-timestamp')
 
     def by_author(self, email, user=None):
         base_qs = self.get_queryset()
         if user and (not user.is_superuser):
-            user_tasks = Task.objects.for_user(user)
-            base_qs = base_qs.filter(task__in=user_tasks)
-        return base_qs.filter(author_email__iexact=email).select_related('task', 'created_by').order_by('-timestamp')
+            base_qs = base_qs.filter(organization_id__in=accessible_organization_ids(user))
+        return base_qs.alias(author_email_lower=Lower('author_email')).filter(author_email_lower=Lower(Value(email))).select_related('task', 'created_by').order_by('-timestamp')
 
     def search(self, query, user=None):
+        """Comments matching ``query`` in the full-text index, best match first"""
         base_qs = self.get_queryset()
+        organization_ids = None
         if user and (not user.is_superuser):
-            user_tasks = Task.objects.for_user(user)
-            base_qs = base_qs.filter(task__in=user_tasks)
-        return base_qs.filter(Q(content__icontains=query) | Q(author_email__icontains=query)).select_related('task', 'created_by').order_by('-timestamp')
+            organization_ids = accessible_organization_ids(user)
+            base_qs = base_qs.filter(organization_id__in=organization_ids)
+        return search_queryset(base_qs, query, organization_ids).select_related('task', 'created_by')
 
 class TaskComment(models.Model):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='comments')
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='+', editable=False)
     content = models.TextField()
     author_email = models.EmailField()
     timestamp = models.DateTimeField(auto_now_add=True)
@@ -160,9 +190,18 @@ class TaskComment(models.Model):
         ordering = ['-timestamp']
         verbose_name = 'Task Comment'
         verbose_name_plural = 'Task Comments'
+        indexes = [models.Index(fields=['task', 'timestamp'], name='idx_comment_task_timestamp'), models.Index(fields=['organization', 'timestamp'], name='idx_comment_org_timestamp'), models.Index(Lower('author_email'), name='idx_comment_author_lower')]
 
     def __str__(self):
         return f'Comment on {self.task.title} by {self.author_email}'
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if self.task_id is not None and (update_fields is None or 'task' in update_fields):
+            self.organization_id = self.task.organization_id
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'organization'}
+        super().save(*args, **kwargs)
+
     def user_has_access(self, user):
-        return user.is_superuser or self.task.user_has_access(user)
\ No newline at end of file
+        return user.is_superuser or self.organization_id in accessible_organization_ids(user)
\ No newline at end of file
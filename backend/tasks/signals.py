@@ -0,0 +1,72 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from cache import invalidate_scopes
+from organizations.models import Organization
+from projects.models import TASK_COUNTER_FIELDS, Project
+from .models import Task, TaskComment
+
+def organization_id_for(project_id):
+    if project_id is None:
+        return None
+    return Project._base_manager.filter(pk=project_id).values_list('organization_id', flat=True).first()
+
+def invalidate_task(task, project_ids):
+    organization_ids = [task.organization_id, getattr(task, '_original_organization_id', None)]
+    invalidate_scopes(organization_ids=organization_ids, project_ids=project_ids, task_ids=[task.pk])
+
+def update_task_counters(task, old_project_id, old_counters, new_project_id, new_counters):
+    if old_counters is None:
+        projects = Project._base_manager.filter(pk__in=[old_project_id, new_project_id])
+        Project.objects.reconcile_task_counters(projects)
+        Organization.objects.reconcile_counters(Organization._base_manager.filter(projects__in=projects))
+        return
+    if old_project_id == new_project_id:
+        changes = [(new_project_id, {field: new_counters.get(field, 0) - old_counters.get(field, 0) for field in TASK_COUNTER_FIELDS})]
+    else:
+        changes = [(old_project_id, {field: -value for field, value in old_counters.items()}), (new_project_id, new_counters)]
+    for project_id, deltas in changes:
+        if project_id is None or not any(deltas.values()):
+            continue
+        cached_project = task.project if project_id == task.project_id and Task.project.is_cached(task) else None
+        organization_id = task.organization_id if project_id == task.project_id else task._original_organization_id
+        organization_id = organization_id or organization_id_for(project_id)
+        Project.objects.adjust_task_counters(project_id, organization_id, deltas)
+        if cached_project:
+            for field, delta in deltas.items():
+                setattr(cached_project, field, getattr(cached_project, field) + delta)
+
+@receiver(post_init, sender=Task)
+def remember_task_state(sender, instance, **kwargs):
+    instance._original_project_id = instance.__dict__.get('project_id')
+    instance._original_organization_id = instance.__dict__.get('organization_id')
+    if instance.pk is None:
+        instance._original_counters = {}
+    elif 'status' in instance.__dict__ and 'due_date' in instance.__dict__:
+        instance._original_counters = Task.counter_values(instance.status, instance.due_date)
+    else:
+        instance._original_counters = None
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, **kwargs):
+    new_counters = Task.counter_values(instance.status, instance.due_date)
+    update_task_counters(instance, instance._original_project_id, instance._original_counters, instance.project_id, new_counters)
+    if instance._original_organization_id not in (None, instance.organization_id):
+        TaskComment._base_manager.filter(task=instance).update(organization_id=instance.organization_id)
+    invalidate_task(instance, [instance.project_id, instance._original_project_id])
+    instance._original_project_id = instance.project_id
+    instance._original_organization_id = instance.organization_id
+    instance._original_counters = new_counters
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    update_task_counters(instance, instance._original_project_id, instance._original_counters, None, {})
+    invalidate_task(instance, [instance.project_id])
+
+@receiver(post_save, sender=TaskComment)
+@receiver(post_delete, sender=TaskComment)
+def comment_changed(sender, instance, **kwargs):
+    if TaskComment.task.is_cached(instance):
+        invalidate_task(instance.task, [instance.task.project_id])
+    else:
+        project_id = Task._base_manager.filter(pk=instance.task_id).values_list('project_id', flat=True).first()
+        invalidate_scopes(organization_ids=[instance.organization_id], project_ids=[project_id], task_ids=[instance.task_id])
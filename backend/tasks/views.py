@@ -0,0 +1,128 @@
+import csv
+import io
+import json
+import zlib
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from django.http import Http404, HttpResponseBadRequest, HttpResponseNotAllowed, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from project_management.routers import read_database
+from .models import Task, TaskComment
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_BUFFER_SIZE = 64 * 1024
+EXPORT_CONTENT_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+TASK_COLUMNS = ('id', 'title', 'description', 'status', 'priority', 'assignee_email', 'due_date', 'created_at', 'updated_at')
+COMMENT_COLUMNS = ('id', 'content', 'author_email', 'timestamp')
+CSV_HEADER = [f'task_{name}' for name in TASK_COLUMNS] + ['task_created_by', 'project_id', 'project_name', 'project_status'] + [f'comment_{name}' for name in COMMENT_COLUMNS] + ['comment_created_by']
+
+def export_queryset(organization, using):
+    """Every task of ``organization`` in primary key order, with its comments prefetched per chunk."""
+    comments = TaskComment._base_manager.select_related('created_by').order_by('timestamp', 'pk')
+    return Task.objects.for_organization(organization).using(using).prefetch_related(None).prefetch_related(Prefetch('comments', queryset=comments)).order_by('pk')
+
+def username(user):
+    return user.username if user else None
+
+def task_record(task):
+    record = {name: getattr(task, name) for name in TASK_COLUMNS}
+    record['created_by'] = username(task.created_by)
+    record['project'] = {'id': task.project_id, 'name': task.project.name, 'status': task.project.status}
+    record['comments'] = [dict({name: getattr(comment, name) for name in COMMENT_COLUMNS}, created_by=username(comment.created_by)) for comment in task.comments.all()]
+    return record
+
+def ndjson_lines(tasks):
+    for task in tasks:
+        yield json.dumps(task_record(task), cls=DjangoJSONEncoder) + '\n'
+
+def csv_lines(tasks):
+    """One row per comment, left-joined to its task and project; tasks without comments get one row."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    for task in tasks:
+        prefix = [getattr(task, name) for name in TASK_COLUMNS] + [username(task.created_by), task.project_id, task.project.name, task.project.status]
+        for comment in task.comments.all() or [None]:
+            writer.writerow(prefix + ([getattr(comment, name) for name in COMMENT_COLUMNS] + [username(comment.created_by)] if comment else [''] * (len(COMMENT_COLUMNS) + 1)))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+def export_chunks(lines, compress):
+    """Join ``lines`` into byte chunks of about ``EXPORT_BUFFER_SIZE``, gzipping them on the fly if asked."""
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    pending = []
+    size = 0
+    for line in lines:
+        pending.append(line.encode())
+        size += len(pending[-1])
+        if size >= EXPORT_BUFFER_SIZE:
+            chunk = b''.join(pending)
+            pending = []
+            size = 0
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+    chunk = b''.join(pending)
+    yield compressor.compress(chunk) + compressor.flush() if compressor else chunk
+
+async def stream(chunks):
+    """Drive the synchronous ``chunks`` generator from the worker thread so the server-side cursor stays on one connection."""
+    try:
+        while True:
+            chunk = await sync_to_async(next)(chunks, None)
+            if chunk is None:
+                return
+            if chunk:
+                yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
+
+def accepts_gzip(accept_encoding):
+    """Whether an ``Accept-Encoding`` value allows gzip, by name or through ``*``; a coding with ``q=0`` is not acceptable."""
+    qualities = {}
+    for coding in accept_encoding.split(','):
+        name, *params = [part.strip() for part in coding.split(';')]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            qualities[name.lower()] = quality
+    quality = qualities.get('gzip', qualities.get('x-gzip', qualities.get('*', 0.0)))
+    return quality > 0
+
+def get_organization(request):
+    return getattr(request, 'organization', None) or None
+
+async def export_tasks(request, org_slug):
+    """Stream every task of the organization in the URL, with its project and comments, as NDJSON or CSV.
+
+    Tasks are read with ``iterator(chunk_size=...)`` (a server-side cursor on
+    PostgreSQL) and comments are prefetched per chunk, so memory stays flat no
+    matter how many tasks the organization has. The response is gzipped when
+    the client accepts it. The ``OrganizationMiddleware`` resolves the slug and
+    checks the caller's access; organizations they cannot see are reported as
+    not found.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in EXPORT_CONTENT_TYPES:
+        return HttpResponseBadRequest(f"Unsupported export format '{export_format}'; use one of: {', '.join(EXPORT_CONTENT_TYPES)}")
+    organization = await sync_to_async(get_organization)(request)
+    if organization is None:
+        raise Http404('Organization not found')
+    tasks = export_queryset(organization, read_database()).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    lines = ndjson_lines(tasks) if export_format == 'ndjson' else csv_lines(tasks)
+    compress = accepts_gzip(request.headers.get('Accept-Encoding', ''))
+    response = StreamingHttpResponse(stream(export_chunks(lines, compress)), content_type=EXPORT_CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{organization.slug}-tasks.{export_format}"'
+    if compress:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
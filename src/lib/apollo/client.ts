@@ -2,11 +2,23 @@
 
 import { ApolloClient, InMemoryCache, createHttpLink } from '@apollo/client';
 import { setContext } from '@apollo/client/link/context';
+import { createPersistedQueryLink } from '@apollo/client/link/persisted-queries';
 
 const httpLink = createHttpLink({
   uri: process.env.NEXT_PUBLIC_GRAPHQL_ENDPOINT || 'http://localhost:8000/graphql/',
 });
 
+// Send only the sha256 of each operation; the server asks for the full text once.
+const persistedQueryLink = createPersistedQueryLink({
+  sha256: async (query: string) => {
+    const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(query));
+    return Array.from(new Uint8Array(digest))
+      .map((byte) => byte.toString(16).padStart(2, '0'))
+      .join('');
+  },
+  useGETForHashedQueries: false,
+});
+
 const authLink = setContext((_, { headers }) => {
   // Get the authentication token from local storage if it exists
   let token = '';
@@ -29,7 +41,7 @@ const authLink = setContext((_, { headers }) => {
 });
 
 const client = new ApolloClient({
-  link: authLink.concat(httpLink),
+  link: authLink.concat(persistedQueryLink).concat(httpLink),
   cache: new InMemoryCache({
     typePolicies: {
       Query: {
@@ -4,21 +4,25 @@ import { gql } from '@apollo/client';
 export const GET_ORGANIZATIONS = gql`
   query GetOrganizations {
     organizations {
-      id
-      name
-      slug
-      contactEmail
-      createdAt
-      updatedAt
-      owner {
-        id
-        username
-        email
-      }
-      members {
-        id
-        username
-        email
+      edges {
+        node {
+          id
+          name
+          slug
+          contactEmail
+          createdAt
+          updatedAt
+          owner {
+            id
+            username
+            email
+          }
+          members {
+            id
+            username
+            email
+          }
+        }
       }
     }
   }
@@ -27,12 +31,16 @@ export const GET_ORGANIZATIONS = gql`
 export const GET_MY_ORGANIZATIONS = gql`
   query GetMyOrganizations {
     myOrganizations {
-      id
-      name
-      slug
-      contactEmail
-      createdAt
-      updatedAt
+      edges {
+        node {
+          id
+          name
+          slug
+          contactEmail
+          createdAt
+          updatedAt
+        }
+      }
     }
   }
 `;
@@ -129,26 +137,30 @@ export const GET_PROJECTS = gql`
 export const GET_MY_PROJECTS = gql`
   query GetMyProjects {
     myProjects {
-      id
-      name
-      description
-      status
-      dueDate
-      createdAt
-      updatedAt
-      organization {
-        id
-        name
-        slug
-      }
-      createdBy {
-        id
-        username
-        email
+      edges {
+        node {
+          id
+          name
+          description
+          status
+          dueDate
+          createdAt
+          updatedAt
+          organization {
+            id
+            name
+            slug
+          }
+          createdBy {
+            id
+            username
+            email
+          }
+          taskCount
+          completedTasksCount
+          completionRate
+        }
       }
-      taskCount
-      completedTasksCount
-      completionRate
     }
   }
 `;
@@ -156,26 +168,30 @@ export const GET_MY_PROJECTS = gql`
 export const GET_PROJECTS_BY_ORGANIZATION = gql`
   query GetProjectsByOrganization($organizationSlug: String!) {
     projectsByOrganization(organizationSlug: $organizationSlug) {
-      id
-      name
-      description
-      status
-      dueDate
-      createdAt
-      updatedAt
-      organization {
-        id
-        name
-        slug
-      }
-      createdBy {
-        id
-        username
-        email
+      edges {
+        node {
+          id
+          name
+          description
+          status
+          dueDate
+          createdAt
+          updatedAt
+          organization {
+            id
+            name
+            slug
+          }
+          createdBy {
+            id
+            username
+            email
+          }
+          taskCount
+          completedTasksCount
+          completionRate
+        }
       }
-      taskCount
-      completedTasksCount
-      completionRate
     }
   }
 `;
@@ -261,28 +277,32 @@ export const GET_TASKS = gql`
 export const GET_MY_TASKS = gql`
   query GetMyTasks {
     myTasks {
-      id
-      title
-      description
-      status
-      priority
-      assigneeEmail
-      dueDate
-      createdAt
-      updatedAt
-      project {
-        id
-        name
-        organization {
+      edges {
+        node {
           id
-          name
+          title
+          description
+          status
+          priority
+          assigneeEmail
+          dueDate
+          createdAt
+          updatedAt
+          project {
+            id
+            name
+            organization {
+              id
+              name
+            }
+          }
+          createdBy {
+            id
+            username
+            email
+          }
         }
       }
-      createdBy {
-        id
-        username
-        email
-      }
     }
   }
 `;
@@ -290,23 +310,27 @@ export const GET_MY_TASKS = gql`
 export const GET_TASKS_BY_PROJECT = gql`
   query GetTasksByProject($projectId: ID!) {
     tasksByProject(projectId: $projectId) {
-      id
-      title
-      description
-      status
-      priority
-      assigneeEmail
-      dueDate
-      createdAt
-      updatedAt
-      project {
-        id
-        name
-      }
-      createdBy {
-        id
-        username
-        email
+      edges {
+        node {
+          id
+          title
+          description
+          status
+          priority
+          assigneeEmail
+          dueDate
+          createdAt
+          updatedAt
+          project {
+            id
+            name
+          }
+          createdBy {
+            id
+            username
+            email
+          }
+        }
       }
     }
   }
@@ -360,18 +384,22 @@ export const UPDATE_TASK = gql`
 export const GET_COMMENTS_BY_TASK = gql`
   query GetCommentsByTask($taskId: ID!) {
     commentsByTask(taskId: $taskId) {
-      id
-      content
-      authorEmail
-      timestamp
-      task {
-        id
-        title
-      }
-      createdBy {
-        id
-        username
-        email
+      edges {
+        node {
+          id
+          content
+          authorEmail
+          timestamp
+          task {
+            id
+            title
+          }
+          createdBy {
+            id
+            username
+            email
+          }
+        }
       }
     }
   }
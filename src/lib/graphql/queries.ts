@@ -4,15 +4,19 @@ import { gql } from '@apollo/client';
 export const GET_ORGANIZATIONS = gql`
   query GetOrganizations {
     organizations {
-      id
-      name
-      slug
-      contactEmail
-      createdAt
-      owner {
-        id
-        username
-        email
+      edges {
+        node {
+          id
+          name
+          slug
+          contactEmail
+          createdAt
+          owner {
+            id
+            username
+            email
+          }
+        }
       }
     }
   }
@@ -21,15 +25,19 @@ export const GET_ORGANIZATIONS = gql`
 export const GET_MY_ORGANIZATIONS = gql`
   query GetMyOrganizations {
     myOrganizations {
-      id
-      name
-      slug
-      contactEmail
-      createdAt
-      owner {
-        id
-        username
-        email
+      edges {
+        node {
+          id
+          name
+          slug
+          contactEmail
+          createdAt
+          owner {
+            id
+            username
+            email
+          }
+        }
       }
     }
   }
@@ -90,23 +98,27 @@ export const GET_PROJECTS = gql`
 export const GET_PROJECTS_BY_ORGANIZATION = gql`
   query GetProjectsByOrganization($organizationSlug: String!) {
     projectsByOrganization(organizationSlug: $organizationSlug) {
-      id
-      name
-      description
-      status
-      dueDate
-      createdAt
-      taskCount
-      completedTasksCount
-      completionRate
-      organization {
-        id
-        name
-        slug
-      }
-      createdBy {
-        id
-        username
+      edges {
+        node {
+          id
+          name
+          description
+          status
+          dueDate
+          createdAt
+          taskCount
+          completedTasksCount
+          completionRate
+          organization {
+            id
+            name
+            slug
+          }
+          createdBy {
+            id
+            username
+          }
+        }
       }
     }
   }
@@ -115,23 +127,27 @@ export const GET_PROJECTS_BY_ORGANIZATION = gql`
 export const GET_MY_PROJECTS = gql`
   query GetMyProjects {
     myProjects {
-      id
-      name
-      description
-      status
-      dueDate
-      createdAt
-      taskCount
-      completedTasksCount
-      completionRate
-      organization {
-        id
-        name
-        slug
-      }
-      createdBy {
-        id
-        username
+      edges {
+        node {
+          id
+          name
+          description
+          status
+          dueDate
+          createdAt
+          taskCount
+          completedTasksCount
+          completionRate
+          organization {
+            id
+            name
+            slug
+          }
+          createdBy {
+            id
+            username
+          }
+        }
       }
     }
   }
@@ -173,21 +189,25 @@ export const GET_TASKS = gql`
 export const GET_TASKS_BY_PROJECT = gql`
   query GetTasksByProject($projectId: ID!) {
     tasksByProject(projectId: $projectId) {
-      id
-      title
-      description
-      status
-      priority
-      assigneeEmail
-      dueDate
-      createdAt
-      project {
-        id
-        name
-      }
-      createdBy {
-        id
-        username
+      edges {
+        node {
+          id
+          title
+          description
+          status
+          priority
+          assigneeEmail
+          dueDate
+          createdAt
+          project {
+            id
+            name
+          }
+          createdBy {
+            id
+            username
+          }
+        }
       }
     }
   }
@@ -196,27 +216,31 @@ export const GET_TASKS_BY_PROJECT = gql`
 export const GET_MY_TASKS = gql`
   query GetMyTasks {
     myTasks {
-      id
-      title
-      description
-      status
-      priority
-      assigneeEmail
-      dueDate
-      createdAt
-      project {
-        id
-        name
-        organization {
+      edges {
+        node {
           id
-          name
-          slug
+          title
+          description
+          status
+          priority
+          assigneeEmail
+          dueDate
+          createdAt
+          project {
+            id
+            name
+            organization {
+              id
+              name
+              slug
+            }
+          }
+          createdBy {
+            id
+            username
+          }
         }
       }
-      createdBy {
-        id
-        username
-      }
     }
   }
 `;
@@ -225,13 +249,17 @@ export const GET_MY_TASKS = gql`
 export const GET_COMMENTS_BY_TASK = gql`
   query GetCommentsByTask($taskId: ID!) {
     commentsByTask(taskId: $taskId) {
-      id
-      content
-      authorEmail
-      timestamp
-      createdBy {
-        id
-        username
+      edges {
+        node {
+          id
+          content
+          authorEmail
+          timestamp
+          createdBy {
+            id
+            username
+          }
+        }
       }
     }
   }
@@ -240,18 +268,22 @@ export const GET_COMMENTS_BY_TASK = gql`
 export const GET_ORGANIZATIONS_WITH_STATS = gql`
   query GetOrganizationsWithStats {
     organizationsWithStats {
-      id
-      name
-      slug
-      contactEmail
-      createdAt
-      projectCount
-      totalTasks
-      completedTasks
-      owner {
-        id
-        username
-        email
+      edges {
+        node {
+          id
+          name
+          slug
+          contactEmail
+          createdAt
+          projectCount
+          totalTasks
+          completedTasks
+          owner {
+            id
+            username
+            email
+          }
+        }
       }
     }
   }
@@ -260,15 +292,19 @@ export const GET_ORGANIZATIONS_WITH_STATS = gql`
 export const SEARCH_ORGANIZATIONS = gql`
   query SearchOrganizations($query: String!) {
     searchOrganizations(query: $query) {
-      id
-      name
-      slug
-      contactEmail
-      createdAt
-      owner {
-        id
-        username
-        email
+      edges {
+        node {
+          id
+          name
+          slug
+          contactEmail
+          createdAt
+          owner {
+            id
+            username
+            email
+          }
+        }
       }
     }
   }
@@ -278,26 +314,30 @@ export const SEARCH_ORGANIZATIONS = gql`
 export const GET_PROJECTS_WITH_STATS = gql`
   query GetProjectsWithStats {
     projectsWithStats {
-      id
-      name
-      description
-      status
-      dueDate
-      createdAt
-      taskCount
-      completedTasksCount
-      inProgressTasksCount
-      todoTasksCount
-      overdueTasksCount
-      completionRate
-      organization {
-        id
-        name
-        slug
-      }
-      createdBy {
-        id
-        username
+      edges {
+        node {
+          id
+          name
+          description
+          status
+          dueDate
+          createdAt
+          taskCount
+          completedTasksCount
+          inProgressTasksCount
+          todoTasksCount
+          overdueTasksCount
+          completionRate
+          organization {
+            id
+            name
+            slug
+          }
+          createdBy {
+            id
+            username
+          }
+        }
       }
     }
   }
@@ -306,23 +346,27 @@ export const GET_PROJECTS_WITH_STATS = gql`
 export const SEARCH_PROJECTS = gql`
   query SearchProjects($query: String!) {
     searchProjects(query: $query) {
-      id
-      name
-      description
-      status
-      dueDate
-      createdAt
-      taskCount
-      completedTasksCount
-      completionRate
-      organization {
-        id
-        name
-        slug
-      }
-      createdBy {
-        id
-        username
+      edges {
+        node {
+          id
+          name
+          description
+          status
+          dueDate
+          createdAt
+          taskCount
+          completedTasksCount
+          completionRate
+          organization {
+            id
+            name
+            slug
+          }
+          createdBy {
+            id
+            username
+          }
+        }
       }
     }
   }
@@ -331,23 +375,27 @@ export const SEARCH_PROJECTS = gql`
 export const GET_PROJECTS_BY_STATUS = gql`
   query GetProjectsByStatus($status: String!) {
     projectsByStatus(status: $status) {
-      id
-      name
-      description
-      status
-      dueDate
-      createdAt
-      taskCount
-      completedTasksCount
-      completionRate
-      organization {
-        id
-        name
-        slug
-      }
-      createdBy {
-        id
-        username
+      edges {
+        node {
+          id
+          name
+          description
+          status
+          dueDate
+          createdAt
+          taskCount
+          completedTasksCount
+          completionRate
+          organization {
+            id
+            name
+            slug
+          }
+          createdBy {
+            id
+            username
+          }
+        }
       }
     }
   }
@@ -356,23 +404,27 @@ export const GET_PROJECTS_BY_STATUS = gql`
 export const GET_PROJECTS_DUE_SOON = gql`
   query GetProjectsDueSoon($days: Int) {
     projectsDueSoon(days: $days) {
-      id
-      name
-      description
-      status
-      dueDate
-      createdAt
-      taskCount
-      completedTasksCount
-      completionRate
-      organization {
-        id
-        name
-        slug
-      }
-      createdBy {
-        id
-        username
+      edges {
+        node {
+          id
+          name
+          description
+          status
+          dueDate
+          createdAt
+          taskCount
+          completedTasksCount
+          completionRate
+          organization {
+            id
+            name
+            slug
+          }
+          createdBy {
+            id
+            username
+          }
+        }
       }
     }
   }
@@ -382,27 +434,31 @@ export const GET_PROJECTS_DUE_SOON = gql`
 export const GET_TASKS_BY_STATUS = gql`
   query GetTasksByStatus($status: String!) {
     tasksByStatus(status: $status) {
-      id
-      title
-      description
-      status
-      priority
-      assigneeEmail
-      dueDate
-      createdAt
-      project {
-        id
-        name
-        organization {
+      edges {
+        node {
           id
-          name
-          slug
+          title
+          description
+          status
+          priority
+          assigneeEmail
+          dueDate
+          createdAt
+          project {
+            id
+            name
+            organization {
+              id
+              name
+              slug
+            }
+          }
+          createdBy {
+            id
+            username
+          }
         }
       }
-      createdBy {
-        id
-        username
-      }
     }
   }
 `;
@@ -410,27 +466,31 @@ export const GET_TASKS_BY_STATUS = gql`
 export const GET_TASKS_BY_PRIORITY = gql`
   query GetTasksByPriority($priority: String!) {
     tasksByPriority(priority: $priority) {
-      id
-      title
-      description
-      status
-      priority
-      assigneeEmail
-      dueDate
-      createdAt
-      project {
-        id
-        name
-        organization {
+      edges {
+        node {
           id
-          name
-          slug
+          title
+          description
+          status
+          priority
+          assigneeEmail
+          dueDate
+          createdAt
+          project {
+            id
+            name
+            organization {
+              id
+              name
+              slug
+            }
+          }
+          createdBy {
+            id
+            username
+          }
         }
       }
-      createdBy {
-        id
-        username
-      }
     }
   }
 `;
@@ -438,27 +498,31 @@ export const GET_TASKS_BY_PRIORITY = gql`
 export const GET_TASKS_BY_ASSIGNEE = gql`
   query GetTasksByAssignee($email: String!) {
     tasksByAssignee(email: $email) {
-      id
-      title
-      description
-      status
-      priority
-      assigneeEmail
-      dueDate
-      createdAt
-      project {
-        id
-        name
-        organization {
+      edges {
+        node {
           id
-          name
-          slug
+          title
+          description
+          status
+          priority
+          assigneeEmail
+          dueDate
+          createdAt
+          project {
+            id
+            name
+            organization {
+              id
+              name
+              slug
+            }
+          }
+          createdBy {
+            id
+            username
+          }
         }
       }
-      createdBy {
-        id
-        username
-      }
     }
   }
 `;
@@ -466,27 +530,31 @@ export const GET_TASKS_BY_ASSIGNEE = gql`
 export const GET_OVERDUE_TASKS = gql`
   query GetOverdueTasks {
     overdueTasks {
-      id
-      title
-      description
-      status
-      priority
-      assigneeEmail
-      dueDate
-      createdAt
-      project {
-        id
-        name
-        organization {
+      edges {
+        node {
           id
-          name
-          slug
+          title
+          description
+          status
+          priority
+          assigneeEmail
+          dueDate
+          createdAt
+          project {
+            id
+            name
+            organization {
+              id
+              name
+              slug
+            }
+          }
+          createdBy {
+            id
+            username
+          }
         }
       }
-      createdBy {
-        id
-        username
-      }
     }
   }
 `;
@@ -494,27 +562,31 @@ export const GET_OVERDUE_TASKS = gql`
 export const GET_TASKS_DUE_SOON = gql`
   query GetTasksDueSoon($days: Int) {
     tasksDueSoon(days: $days) {
-      id
-      title
-      description
-      status
-      priority
-      assigneeEmail
-      dueDate
-      createdAt
-      project {
-        id
-        name
-        organization {
+      edges {
+        node {
           id
-          name
-          slug
+          title
+          description
+          status
+          priority
+          assigneeEmail
+          dueDate
+          createdAt
+          project {
+            id
+            name
+            organization {
+              id
+              name
+              slug
+            }
+          }
+          createdBy {
+            id
+            username
+          }
         }
       }
-      createdBy {
-        id
-        username
-      }
     }
   }
 `;
@@ -522,27 +594,31 @@ export const GET_TASKS_DUE_SOON = gql`
 export const GET_HIGH_PRIORITY_TASKS = gql`
   query GetHighPriorityTasks {
     highPriorityTasks {
-      id
-      title
-      description
-      status
-      priority
-      assigneeEmail
-      dueDate
-      createdAt
-      project {
-        id
-        name
-        organization {
+      edges {
+        node {
           id
-          name
-          slug
+          title
+          description
+          status
+          priority
+          assigneeEmail
+          dueDate
+          createdAt
+          project {
+            id
+            name
+            organization {
+              id
+              name
+              slug
+            }
+          }
+          createdBy {
+            id
+            username
+          }
         }
       }
-      createdBy {
-        id
-        username
-      }
     }
   }
 `;
@@ -550,27 +626,31 @@ export const GET_HIGH_PRIORITY_TASKS = gql`
 export const SEARCH_TASKS = gql`
   query SearchTasks($query: String!) {
     searchTasks(query: $query) {
-      id
-      title
-      description
-      status
-      priority
-      assigneeEmail
-      dueDate
-      createdAt
-      project {
-        id
-        name
-        organization {
+      edges {
+        node {
           id
-          name
-          slug
+          title
+          description
+          status
+          priority
+          assigneeEmail
+          dueDate
+          createdAt
+          project {
+            id
+            name
+            organization {
+              id
+              name
+              slug
+            }
+          }
+          createdBy {
+            id
+            username
+          }
         }
       }
-      createdBy {
-        id
-        username
-      }
     }
   }
 `;
@@ -578,28 +658,32 @@ export const SEARCH_TASKS = gql`
 export const GET_TASKS_WITH_COMMENT_COUNT = gql`
   query GetTasksWithCommentCount {
     tasksWithCommentCount {
-      id
-      title
-      description
-      status
-      priority
-      assigneeEmail
-      dueDate
-      createdAt
-      commentCount
-      project {
-        id
-        name
-        organization {
+      edges {
+        node {
           id
-          name
-          slug
+          title
+          description
+          status
+          priority
+          assigneeEmail
+          dueDate
+          createdAt
+          commentCount
+          project {
+            id
+            name
+            organization {
+              id
+              name
+              slug
+            }
+          }
+          createdBy {
+            id
+            username
+          }
         }
       }
-      createdBy {
-        id
-        username
-      }
     }
   }
 `;
@@ -608,17 +692,21 @@ export const GET_TASKS_WITH_COMMENT_COUNT = gql`
 export const GET_RECENT_COMMENTS = gql`
   query GetRecentComments($days: Int) {
     recentComments(days: $days) {
-      id
-      content
-      authorEmail
-      timestamp
-      task {
-        id
-        title
-      }
-      createdBy {
-        id
-        username
+      edges {
+        node {
+          id
+          content
+          authorEmail
+          timestamp
+          task {
+            id
+            title
+          }
+          createdBy {
+            id
+            username
+          }
+        }
       }
     }
   }
@@ -627,17 +715,21 @@ export const GET_RECENT_COMMENTS = gql`
 export const GET_COMMENTS_BY_AUTHOR = gql`
   query GetCommentsByAuthor($email: String!) {
     commentsByAuthor(email: $email) {
-      id
-      content
-      authorEmail
-      timestamp
-      task {
-        id
-        title
-      }
-      createdBy {
-        id
-        username
+      edges {
+        node {
+          id
+          content
+          authorEmail
+          timestamp
+          task {
+            id
+            title
+          }
+          createdBy {
+            id
+            username
+          }
+        }
       }
     }
   }
@@ -646,17 +738,21 @@ export const GET_COMMENTS_BY_AUTHOR = gql`
 export const SEARCH_COMMENTS = gql`
   query SearchComments($query: String!) {
     searchComments(query: $query) {
-      id
-      content
-      authorEmail
-      timestamp
-      task {
-        id
-        title
-      }
-      createdBy {
-        id
-        username
+      edges {
+        node {
+          id
+          content
+          authorEmail
+          timestamp
+          task {
+            id
+            title
+          }
+          createdBy {
+            id
+            username
+          }
+        }
       }
     }
   }